@@ -1,5 +1,8 @@
+import sys
+
 from src.controller.controller import Controller
 
 if __name__ == "__main__":
-    controller = Controller()
+    # python main.py [recording], a recording written with python -m src.sim --record is played instead of a game
+    controller = Controller(sys.argv[1] if len(sys.argv) > 1 else None)
     controller.game_loop()
@@ -2,22 +2,32 @@ import time
 import sys
 
 from src.controller.utils import create_thread
+from src.controller.simulation import SimulationThread, ReplayThread
 
 from src.model.player import Player
 from src.model.game_state import GameState
+from src.model.replay import ReplayReader
 
 from src.view.view import View
 
+from src.instrumentation import instrumentation, VIEW_SYNC, DRAW
 from src.settings import all_params
 
 
 class Controller:
-    def __init__(self):
+    def __init__(self, replay_path=None):
+        """
+        :param replay_path: (str) directory of a recording written by ReplayWriter to play instead of a new game
+        """
 
         # self.player = Player()
         self.view = View(1300, 800)
         self.view.change_view_state(View.STARTVIEW)
         self.game_state = None
+        # Updates the game state on its own thread once the game started
+        self.simulation = None
+        self._synced_tick = None
+        self.replay_path = replay_path
 
         self.event_list_start_view = {
             'start_button': self.start_button_pressed,
@@ -31,6 +41,11 @@ class Controller:
             'quit_game': self.exit_game
         }
 
+        if replay_path is not None:
+            # A recording cannot be changed, so there are no ants to create
+            for event in ('build_scout', 'build_worker', 'show_build_ants'):
+                del self.event_list_game_view[event]
+
         self.event_list = {
             'start_view': self.event_list_start_view,
             'game_view': self.event_list_game_view
@@ -41,10 +56,14 @@ class Controller:
         Event-handler for the start button to change Viewstate from Startview to Gameview
         :param color: Color chosen by player
         :param player_name: Name chosen by player
-        :return: returns a game_state object for initialization of the game
+        :return: returns a game_state object for initialization of the game, None when a recording is played
         """
         if player_name:
             self.view.change_view_state(View.GAMEVIEW, color)
+            if self.replay_path is not None:
+                # The recording is shown without a game state, and without the dialog to create ants
+                self.view.remove_element('view_box_id_add_ants_box')
+                return None
             player = Player(player_name, color)
             player_list = [player]
             game_state = GameState(player_list)
@@ -69,8 +88,9 @@ class Controller:
         :return:
         """
         time.sleep(all_params.controller_params.create_ant_time)
-        nest = self.game_state.get_nests()[0]
-        self.game_state.create_ants(nest, amount=1, ant_type=ant_type)
+        with self.simulation.lock:
+            nest = self.game_state.get_nests()[0]
+            self.game_state.create_ants(nest, amount=1, ant_type=ant_type)
         self.view.increment_ant_count(type=button.ant_type)
 
     def create_worker(self, identifier):
@@ -132,26 +152,44 @@ class Controller:
     def game_state_init(self):
         """
         Function to initialize game state
-        when game state is none
+        while no thread runs yet, and to start the simulation thread once it is created, or the replay thread
+        when a recording is played, once the start button was pressed
         :return: nothing
         """
 
         self.get_events('start_view')
+        if self.view.state != View.GAMEVIEW:
+            return
+        if self.replay_path is None:
+            self.simulation = SimulationThread(self.game_state, self.view_region)
+        else:
+            self.simulation = ReplayThread(ReplayReader(self.replay_path), self.view_region)
+        self.simulation.start()
+
+    def view_region(self):
+        """
+        Corners of the region of the world in view, copied since the view moves them
+        :return: top left and bottom right corner
+        """
+        return self.view.pos[0].copy(), self.view.pos[1].copy()
 
     def game_state_update(self):
         """
-        Function to update game state
+        Function to show the latest snapshot of the game state, which is updated by the simulation thread,
         when game state is not none
         :return: nothing
         """
 
-        self.view.update(self.game_state.get_objects_in_region(self.view.pos[0], self.view.pos[1]))
+        snapshot = self.simulation.snapshots.read()
+        if snapshot is not None and snapshot.tick != self._synced_tick:
+            with instrumentation.phase(VIEW_SYNC):
+                self.view.update(snapshot)
+            self._synced_tick = snapshot.tick
         self.get_events('game_view')
-        self.game_state.update()
 
     def game_loop(self):
         """
-        Main game loop
+        Main game loop, it draws the view at the frame rate while the simulation thread updates the game state
         :return: nothing
         """
 
@@ -160,13 +198,13 @@ class Controller:
 
             current_time = time.time()
 
-            if self.game_state is None:
+            with instrumentation.phase(DRAW):
                 self.view.draw(self.view.width, self.view.height)
+            if self.simulation is None:
                 self.game_state_init()
-
             else:
-                self.view.draw(self.view.width, self.view.height)
                 self.game_state_update()
+            instrumentation.end_tick()
 
             # For frame rate adjustment
             exit_time = time.time()
@@ -0,0 +1,164 @@
+from threading import Event, Lock, Thread
+from time import perf_counter
+
+from src.instrumentation import instrumentation, TICK, QUERY
+from src.settings import all_params
+
+
+class SnapshotBuffer:
+    """
+            A class used to hand the latest snapshot of the game from the simulation thread to the render thread.
+            The simulation writes into the back buffer and then swaps it to the front with one assignment, which is
+            atomic, so reading never blocks and never returns a half written snapshot.
+
+            ...
+
+            Methods
+            -------
+            publish(snapshot)
+                Make a new snapshot the latest one
+
+            read()
+                Return the latest snapshot, None before the first one was published
+
+    """
+
+    def __init__(self):
+        self._buffers = [None, None]
+        self._front = 0
+
+    def publish(self, snapshot):
+        back = 1 - self._front
+        self._buffers[back] = snapshot
+        self._front = back
+
+    def read(self):
+        return self._buffers[self._front]
+
+
+class SimulationThread(Thread):
+    """
+            A class used to update the game at a fixed rate on its own thread, independent of the frame rate.
+            After every tick a snapshot of the region in view is published to snapshots, with the changes since the
+            previously published one.
+
+            ...
+
+            Attributes
+            ----------
+            game_state: GameState
+                the game to update
+            region: function
+                returns the top left and bottom right corner of the region to take snapshots of
+            timestep: float
+                seconds per tick
+            snapshots: SnapshotBuffer
+                the latest snapshot
+            lock: Lock
+                held while the game is changed, other threads have to hold it to change the game as well
+
+            Methods
+            -------
+            step()
+                Update the game once and publish a snapshot
+
+            stop()
+                Stop the thread after the current tick
+
+    """
+
+    def __init__(self, game_state, region, tick_rate=None, max_catch_up_ticks=None):
+        """
+        :param game_state: (GameState) the game to update
+        :param region: (function) returns the corners (top_left, bottom_right) of the region in view
+        :param tick_rate: (float) updates per second, default from the controller parameters
+        :param max_catch_up_ticks: (int) ticks a late simulation runs back to back before it skips the rest
+        """
+        super(SimulationThread, self).__init__(daemon=True)
+        if tick_rate is None:
+            tick_rate = all_params.controller_params.tick_rate
+        if max_catch_up_ticks is None:
+            max_catch_up_ticks = all_params.controller_params.max_catch_up_ticks
+        self.game_state = game_state
+        self.region = region
+        self.timestep = 1. / tick_rate
+        self.max_catch_up_ticks = max_catch_up_ticks
+        self.snapshots = SnapshotBuffer()
+        self.lock = Lock()
+        self._stopped = Event()
+
+    def step(self):
+        with self.lock, instrumentation.phase(TICK):
+            self.game_state.update()
+            top_left, bottom_right = self.region()
+            with instrumentation.phase(QUERY):
+                snapshot = self.game_state.snapshot(top_left, bottom_right, self.snapshots.read())
+        self.snapshots.publish(snapshot)
+        # The phases of the simulation make up a tick of this thread, the main thread ends its ticks per frame
+        instrumentation.end_tick()
+
+    def run(self):
+        next_tick = perf_counter()
+        while not self._stopped.is_set():
+            now = perf_counter()
+            if now < next_tick:
+                self._stopped.wait(next_tick - now)
+                continue
+            self.step()
+            next_tick += self.timestep
+            # Skip the ticks a slow simulation cannot catch up with instead of falling further behind
+            if perf_counter() - next_tick > self.max_catch_up_ticks * self.timestep:
+                next_tick = perf_counter()
+
+    def stop(self):
+        self._stopped.set()
+
+
+class ReplayThread(SimulationThread):
+    """
+            A class used to play a recorded game instead of simulating it. It publishes a snapshot of the next
+            recorded tick at the tick rate, the same way SimulationThread does for a running game, and stays on the
+            last tick at the end of the recording.
+
+            ...
+
+            Attributes
+            ----------
+            reader: ReplayReader
+                the recording
+            frame: int
+                index of the next recorded tick to show
+
+            Methods
+            -------
+            seek(tick)
+                Continue playing at a tick
+
+    """
+
+    def __init__(self, reader, region, tick_rate=None):
+        """
+        :param reader: (ReplayReader) the recording
+        :param region: (function) returns the corners (top_left, bottom_right) of the region in view
+        :param tick_rate: (float) recorded ticks shown per second, default from the controller parameters
+        """
+        super(ReplayThread, self).__init__(None, region, tick_rate)
+        self.reader = reader
+        self.frame = 0
+
+    def seek(self, tick):
+        with self.lock:
+            self.frame = self.reader.frame_of_tick(tick)
+
+    def step(self):
+        snapshot = None
+        with self.lock, instrumentation.phase(TICK):
+            if self.frame < len(self.reader):
+                top_left, bottom_right = self.region()
+                with instrumentation.phase(QUERY):
+                    snapshot = self.reader.snapshot(self.frame, top_left, bottom_right, self.snapshots.read())
+                self.frame += 1
+        # At the end of the recording the last snapshot stays, but the tick still ends
+        if snapshot is not None:
+            self.snapshots.publish(snapshot)
+        instrumentation.end_tick()
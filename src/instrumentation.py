@@ -0,0 +1,265 @@
+"""
+Opt-in timing of the phases of a tick. Time spent in a phase is summed over a tick and kept per tick in a ring
+buffer, so the last ticks can be summarized with percentiles to find out where a slow frame went.
+Instrumentation is disabled by default, then timing a phase costs one method call and no clock reads.
+
+Every thread has a tick of its own: the simulation thread ends its tick once per update and the main thread once
+per frame, so the buffer of a phase only holds durations of the thread that times it.
+
+Usage:
+    instrumentation.enable()
+    with instrumentation.phase(ANT_UPDATE):
+        ...
+    instrumentation.end_tick()
+    instrumentation.percentiles(ANT_UPDATE)
+"""
+from functools import wraps
+from threading import Lock, get_ident
+from time import perf_counter
+
+import numpy as np
+
+# Phases of a tick
+TICK = "tick"
+QUERY = "query"
+ANT_UPDATE = "ant_update"
+PHEROMONE_UPDATE = "pheromone_update"
+INDEX_REBUILD = "index_rebuild"
+VIEW_SYNC = "view_sync"
+DRAW = "draw"
+
+
+class RingBuffer:
+    """
+            A class used to keep the last values of a series in a fixed amount of memory
+
+            ...
+
+            Attributes
+            ----------
+            capacity: int
+                number of values that are kept, older values are overwritten
+            count: int
+                number of values appended so far
+
+            Methods
+            -------
+            append(value)
+                Add a value, overwriting the oldest one if the buffer is full
+
+            values()
+                Return the kept values from oldest to newest
+
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("The capacity of a ring buffer has to be at least 1, got {}.".format(capacity))
+        self.capacity = capacity
+        self.count = 0
+        self._values = np.zeros(capacity)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, value):
+        self._values[self.count % self.capacity] = value
+        self.count += 1
+
+    def values(self):
+        """ Return the kept values
+
+        :return: (array) values from oldest to newest
+
+        """
+        if self.count <= self.capacity:
+            return self._values[:self.count].copy()
+        return np.roll(self._values, -(self.count % self.capacity))
+
+
+class _Phase:
+    """Context manager adding the time spent inside it to a phase of the current tick"""
+
+    __slots__ = ("instrumentation", "name", "start")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.record(self.name, perf_counter() - self.start)
+        return False
+
+
+class _NoPhase:
+    """Context manager doing nothing, returned while instrumentation is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_no_phase = _NoPhase()
+
+
+class Instrumentation:
+    """
+            A class used to record how long the phases of every tick take
+
+            ...
+
+            Attributes
+            ----------
+            enabled: bool
+                whether phases are timed, nothing is recorded otherwise
+            capacity: int
+                number of ticks kept per phase
+            buffers: dict
+                one RingBuffer of durations in seconds per phase, with one value per tick of the thread timing it
+
+            Methods
+            -------
+            enable(), disable()
+                Start and stop recording
+
+            phase(name)
+                Return a context manager timing the code inside it as part of a phase
+
+            timed(name)
+                Decorator timing every call of a function as part of a phase
+
+            record(name, seconds)
+                Add a duration to a phase of the current tick of the calling thread
+
+            end_tick()
+                Store the durations of the current tick of the calling thread and start its next one
+
+            percentiles(name, q)
+                Return percentiles of the durations of a phase over the kept ticks
+
+            summary()
+                Return percentiles of all phases
+
+            reset()
+                Forget all recorded durations
+
+    """
+
+    def __init__(self, capacity=1024, enabled=False):
+        """
+        :param capacity: (int) number of ticks kept per phase
+        :param enabled: (bool) whether to start recording right away
+        """
+        self.enabled = enabled
+        self.capacity = capacity
+        self.buffers = {}
+        # Durations of the current tick and names of the phases seen so far, per thread
+        self._current = {}
+        self._phases = {}
+        self._lock = Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def phase(self, name):
+        """ Time the code of a with block as part of a phase
+
+        :param name: (string) name of the phase, e.g. ANT_UPDATE
+        :return: context manager
+
+        """
+        if not self.enabled:
+            return _no_phase
+        return _Phase(self, name)
+
+    def timed(self, name):
+        """ Decorator timing every call of a function as part of a phase
+
+        :param name: (string) name of the phase
+        :return: (function) decorator
+
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                with _Phase(self, name):
+                    return f(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record(self, name, seconds):
+        """ Add time spent in a phase to the current tick of the calling thread
+
+        :param name: (string) name of the phase
+        :param seconds: (float) duration
+
+        """
+        # Only the calling thread changes its own dict, so the durations need no lock
+        current = self._current.setdefault(get_ident(), {})
+        current[name] = current.get(name, 0.) + seconds
+
+    def end_tick(self):
+        """ Store the time spent in every phase during the current tick of the calling thread and start its next
+        tick. Phases the thread timed before but did not enter during the tick get a duration of zero.
+        """
+        if not self.enabled:
+            return
+        thread = get_ident()
+        with self._lock:
+            current = self._current.pop(thread, {})
+            phases = self._phases.setdefault(thread, set())
+            phases.update(current)
+            for name in phases:
+                if name not in self.buffers:
+                    self.buffers[name] = RingBuffer(self.capacity)
+                self.buffers[name].append(current.get(name, 0.))
+
+    def percentiles(self, name, q=(50, 95, 99)):
+        """ Return percentiles of the time spent in a phase per tick
+
+        :param name: (string) name of the phase
+        :param q: (tuple) percentiles to compute
+        :return: (dict) duration in seconds per percentile, e.g. {"p50": ..., "p95": ..., "p99": ...}, empty if the
+                 phase was never recorded
+
+        """
+        with self._lock:
+            buffer = self.buffers.get(name)
+            values = None if buffer is None else buffer.values()
+        if values is None or len(values) == 0:
+            return {}
+        return {"p{:g}".format(p): value for p, value in zip(q, np.percentile(values, q))}
+
+    def summary(self, q=(50, 95, 99)):
+        """ Return the percentiles of all phases
+
+        :param q: (tuple) percentiles to compute
+        :return: (dict) maps names of phases to the result of percentiles
+
+        """
+        return {name: self.percentiles(name, q) for name in list(self.buffers)}
+
+    def reset(self):
+        with self._lock:
+            self.buffers = {}
+            self._current = {}
+            self._phases = {}
+
+
+# Shared by the model, view and controller
+instrumentation = Instrumentation()
@@ -1,22 +1,43 @@
-import numpy as np
 from abc import ABC, abstractmethod
 
 from .game_object import GameObject
+from .ant_population import AntPopulation, Column, VectorColumn
 
-from src.utils import array, random
 from src.settings import all_params
 
-distance = np.linalg.norm
-
 
 class Ant(GameObject, ABC):
+    __slots__ = ("population", "slot", "owner")
+
+    # Kind of the row of the ant in its population, set by every ant type
+    kind = None
+
+    # The state and the traits of all ants are stored in the population of the ant
+    position = VectorColumn("position")
+    direction = VectorColumn("direction")
+    home_position = VectorColumn("home_position")
+    energy = Column("energy")
+    foodiness = Column("foodiness")
+    inscentiveness = Column("inscentiveness")
+    directionism = Column("directionism")
+    explorativeness = Column("explorativeness")
+    speed = Column("speed")
+    loading_capacity = Column("loading_capacity")
+    pheromone_strength = Column("pheromone_strength")
+
     def __init__(self, player, home_nest, energy=0.,
                  foodiness=0., inscentiveness=0., directionism=0., explorativeness=0., speed=0., loading_capacity=0.,
-                 pheromone_strength=0.):
+                 pheromone_strength=0., population=None):
         """Initialize ant object owner and position
         :param player: (Player) Owning Player of the ant
         :param home_nest: (Nest) Coordinates of ant position
+        :param population: (AntPopulation) population that stores the state of the ant, a new one if None
         """
+        if population is None:
+            population = AntPopulation()
+        self.population = population
+        self.slot = population.add(self)
+
         position = home_nest.position.copy()
         super(Ant, self).__init__(position)
         self.owner = player
@@ -26,12 +47,8 @@ class Ant(GameObject, ABC):
         # All ants always have these
         self.direction = all_params.ant_model_params.initial_direction
         self.home = home_nest
-        self.direction_memory = all_params.ant_model_params.direction_memory
 
-        # Different ant types use a different subset of these parameters. All ants ar instantiated with all present
-        # parameters, and the ant type itself decides which ones to use. This mechanism is consists of the fact that
-        # the abstract class has setters for all of these values that automatically set these parameters to an invalid
-        # value and each Ant type should override only the setters of the variables that it actually uses.
+        # All ants are instantiated with all traits, and the ant type itself decides which ones to use
         self.energy = energy
         self.foodiness = foodiness
         self.inscentiveness = inscentiveness
@@ -42,69 +59,12 @@ class Ant(GameObject, ABC):
         self.speed = speed
 
     @property
-    def energy(self):
-        return self.__energy
-
-    @energy.setter
-    def energy(self, value):
-        self.__energy = None
-
-    @property
-    def foodiness(self):
-        return self.__foodiness
-
-    @foodiness.setter
-    def foodiness(self, value):
-        self.__foodiness = None
-
-    @property
-    def inscentiveness(self):
-        return self.__inscentiveness
-
-    @inscentiveness.setter
-    def inscentiveness(self, value):
-        self.__inscentiveness = None
-
-    @property
-    def directionism(self):
-        return self.__directionism
-
-    @directionism.setter
-    def directionism(self, value):
-        print("Used superclass setter")
-        self.__directionism = None
-
-    @property
-    def explorativeness(self):
-        return self.__explorativeness
-
-    @explorativeness.setter
-    def explorativeness(self, value):
-        self.__explorativeness = None
-
-    @property
-    def speed(self):
-        return self.__speed
-
-    @speed.setter
-    def speed(self, value):
-        self.__speed = None
-
-    @property
-    def loading_capacity(self):
-        return self.__loading_capacity
-
-    @loading_capacity.setter
-    def loading_capacity(self, value):
-        self.__loading_capacity = None
-
-    @property
-    def pheromone_strength(self):
-        return self.__pheromone_strength
+    def home(self):
+        return self.population.nests[self.population.home[self.slot]]
 
-    @pheromone_strength.setter
-    def pheromone_strength(self, value):
-        self.__pheromone_strength = None
+    @home.setter
+    def home(self, nest):
+        self.population.set_home(self.slot, nest)
 
     def __str__(self):
         return ("Ant {} at position {} and energy lvl {} from player {} \n with character variables Foodiness {},  "
@@ -129,46 +89,17 @@ class Ant(GameObject, ABC):
         return self.position
 
     @abstractmethod
-    def update(self, *args):
+    def update(self, noticeable_objects, pheromone_field=None):
         if self.energy <= all_params.ant_model_params.min_energy:
-            return None, None
-
-    def increase_energy(self):
-        """
-        energy of ant is increased (it should happen only when ant is at nest)
-        """
-        if self.energy < all_params.ant_model_params.maximum_energy:
-            self.energy += all_params.ant_model_params.energy_increase
-
-    @abstractmethod
-    def move_randomly(self):
-        """
-        changes the position of the ant using a random walk and combining it with the previous direction
-        direction is updated
-        :return: the updated position is returned
-        """
-        while True:  # to avoid standing still and divide by zero
-            # movement = randint(low=-1, high=2, size=2)  # random move
-            movement = 2 * random(size=2) - 1  # random move
-            # self.direction += self.direction_memory * self.direction + movement
-            self.direction = self.direction_memory * self.direction + movement
-            if distance(self.direction) > 0.:
-                break
-        self.direction /= distance(self.direction)
-        self.position = self.position + (self.direction * self.speed)
+            return None
         return self.position
 
-    def move_to(self, obj_position):
+    def get_pheromone_fields(self, pheromone_field):
         """
-        changing the position of the ant towards the given obj_position with step size of one
-        direction is updated
-        :param obj_position: the position of object which the ant should move towards
-        :return: the updated position
+        Get the pheromone fields of all nests of the population of the ant, as expected by its batched updates
+        :param pheromone_field: (PheromoneField) pheromone of the owner of the ant, None if it has none
+        :return: (list) the given field for the home nest of the ant and None for all other nests
         """
-        # Go towards the position of obj_position
-        if distance(obj_position - self.position) > 0.:
-            self.direction = (obj_position - self.position) / distance(obj_position - self.position)
-        else:
-            self.direction = array([0., 0.])  # THIS IS NOT THE BEST IMPLEMENTATION
-        self.position = self.position + (self.direction * self.speed)
-        return self.position
+        fields = [None] * len(self.population.nests)
+        fields[self.population.home[self.slot]] = pheromone_field
+        return fields
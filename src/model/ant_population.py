@@ -0,0 +1,528 @@
+import numpy as np
+
+from src.utils import zeros, empty, dtype
+from src.settings import all_params
+
+# Kinds of population rows, FREE rows do not hold an ant
+FREE = 0
+WORKER = 1
+SCOUT = 2
+
+
+class Column:
+    """
+            Attribute of an ant that is stored in a column of the AntPopulation of the ant instead of on the ant object
+
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        """
+
+        :param name: (str) name of the column of the AntPopulation
+
+        """
+        self.name = name
+
+    def __get__(self, ant, owner=None):
+        if ant is None:
+            return self
+        return getattr(ant.population, self.name).item(ant.slot)
+
+    def __set__(self, ant, value):
+        getattr(ant.population, self.name)[ant.slot] = value
+
+
+class VectorColumn(Column):
+    """
+            Like Column, for attributes with one row per ant (e.g. position). Reading it returns a copy, so the value
+            does not change under the hands of the caller when the population is updated.
+
+    """
+
+    __slots__ = ()
+
+    def __get__(self, ant, owner=None):
+        if ant is None:
+            return self
+        return getattr(ant.population, self.name)[ant.slot].copy()
+
+
+class AntPopulation:
+    """
+            A class used to store the state of many ants as a structure of arrays
+            Every ant owns one row (slot) of the population, and each of its attributes is stored in a column array.
+            This way the behaviour of a whole colony can be computed with a few array operations per tick instead of
+            one Python method call per ant. The Ant objects themselves only hold a reference to their row.
+
+            ...
+
+            Attributes
+            ----------
+            ants: list
+                ant objects by slot, None for free slots
+            kind: array
+                FREE, WORKER or SCOUT per slot
+            position, direction: array
+                coordinates of the ants, one per row
+            energy, has_food, pheromone_strength: array
+                state of the ants. For scouts, has_food holds whether they found food.
+            foodiness, inscentiveness, directionism, explorativeness, speed, loading_capacity: array
+                traits of the ants
+            home: array
+                index of the home nest of every ant in nests
+            home_position: array
+                coordinates of the home nest of every ant
+            nests: list
+                all home nests of the ants of the population
+            rng: Generator
+                random generator for all random decisions of the ants
+
+            Methods
+            -------
+            add(ant), remove(ant)
+                Reserve or free the row of an ant
+
+            update(worker_slots, worker_foods, scout_slots, scout_foods, pheromone_fields)
+                Update the given workers and scouts for one iteration with batched array operations
+
+            update_workers(slots, foods, pheromone_fields), update_scouts(slots, foods, pheromone_fields)
+                Update only workers or only scouts
+
+    """
+
+    vector_columns = ("position", "direction", "home_position")
+    scalar_columns = ("energy", "has_food", "pheromone_strength", "foodiness", "inscentiveness", "directionism",
+                      "explorativeness", "speed", "loading_capacity")
+
+    def __init__(self, capacity=1, rng=None):
+        """
+
+        :param capacity: (int) number of rows to reserve in advance
+        :param rng: (Generator) random generator for all random decisions of the ants, a fresh one if None
+
+        """
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.ants = []
+        self.nests = []
+        self._nest_index = {}
+        self._free_slots = []
+
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.home = np.zeros(capacity, dtype=np.intp)
+        for name in self.vector_columns:
+            setattr(self, name, zeros((capacity, 2)))
+        for name in self.scalar_columns:
+            setattr(self, name, zeros(capacity))
+
+    def __len__(self):
+        return len(self.ants) - len(self._free_slots)
+
+    def add(self, ant):
+        """ Reserve a row for a new ant
+
+        :param ant: (Ant) the ant, its kind attribute decides the kind of the row
+        :return: (int) slot of the ant
+
+        """
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self.ants[slot] = ant
+        else:
+            slot = len(self.ants)
+            self.ants.append(ant)
+            if slot >= len(self.kind):
+                self._grow(2 * len(self.kind))
+        self.kind[slot] = ant.kind
+        return slot
+
+    def remove(self, ant):
+        """ Free the row of an ant, the ant object must not be used afterwards
+
+        :param ant: (Ant) the ant to be removed
+
+        """
+        self.ants[ant.slot] = None
+        self.kind[ant.slot] = FREE
+        self._free_slots.append(ant.slot)
+
+    def reserve(self, capacity):
+        """ Grow the columns so that they hold at least capacity ants without growing again
+
+        :param capacity: (int) number of ants
+
+        """
+        if capacity > len(self.kind):
+            self._grow(capacity)
+
+    def set_home(self, slot, nest):
+        """ Set the home nest of an ant
+
+        :param slot: (int) slot of the ant
+        :param nest: (Nest) the new home nest
+
+        """
+        index = self._nest_index.get(nest.id)
+        if index is None:
+            index = self._nest_index[nest.id] = len(self.nests)
+            self.nests.append(nest)
+        self.home[slot] = index
+        self.home_position[slot] = nest.position
+
+    def get_slots(self, kind):
+        """ Return the slots of all ants of a kind
+
+        :param kind: (int) WORKER or SCOUT
+        :return: (array of ints) slots of these ants
+
+        """
+        return np.flatnonzero(self.kind == kind)
+
+    def update(self, worker_slots, worker_foods, scout_slots, scout_foods, pheromone_fields=None):
+        """ Update workers and scouts for one iteration. The random steps of all ants that have nothing to go for
+        are taken together, with one draw from the random generator of the population.
+
+        :param worker_slots: (array of ints) slots of the workers to be updated
+        :param worker_foods: (list) for every worker the list of food objects it perceives
+        :param scout_slots: (array of ints) slots of the scouts to be updated
+        :param scout_foods: (list) for every scout the list of food objects it perceives
+        :param pheromone_fields: (list) PheromoneField of the owner of every nest in nests (None if it has none),
+                                 or None if no ant has one
+
+        """
+        wandering = np.concatenate((self._update_workers(worker_slots, worker_foods, pheromone_fields),
+                                    self._update_scouts(scout_slots, scout_foods, pheromone_fields)))
+        self._move_randomly(wandering)
+
+    def update_workers(self, slots, foods, pheromone_fields=None):
+        """ Update workers for one iteration with masked array operations, Worker.update runs it for a single ant:
+            1- workers with food at their nest unload it, the others with food move towards the nest and lay pheromone
+            2- workers without food at a food source load some of it
+            3- the other workers move towards a food source, or else follow pheromone, or else move randomly
+
+        :param slots: (array of ints) slots of the workers to be updated
+        :param foods: (list) for every worker the list of food objects it perceives
+        :param pheromone_fields: (list) PheromoneField of the owner of every nest in nests (None if it has none),
+                                 or None if no ant has one
+
+        """
+        self._move_randomly(self._update_workers(slots, foods, pheromone_fields))
+
+    def update_scouts(self, slots, foods, pheromone_fields=None):
+        """ Update scouts for one iteration with masked array operations, Scout.update runs it for a single ant:
+            1- scouts that found food finish their trail at their nest, the others move towards the nest and lay
+               pheromone
+            2- scouts without food at a food source start a trail
+            3- the other scouts move towards a food source, or else move randomly
+
+        :param slots: (array of ints) slots of the scouts to be updated
+        :param foods: (list) for every scout the list of food objects it perceives
+        :param pheromone_fields: (list) PheromoneField of the owner of every nest in nests (None if it has none),
+                                 or None if no ant has one
+
+        """
+        self._move_randomly(self._update_scouts(slots, foods, pheromone_fields))
+
+    def _update_workers(self, slots, foods, pheromone_fields):
+        """ Update workers like update_workers, except for the random steps
+
+        :return: (array of ints) slots of the workers that have to move randomly
+
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        params = all_params.ant_model_params
+        if pheromone_fields is None:
+            pheromone_fields = [None] * len(self.nests)
+
+        carrying = self.has_food[slots] > 0
+        to_nest = distance(self.position[slots] - self.home_position[slots])
+
+        # 1- workers with food
+        arrived = slots[carrying & (to_nest <= params.min_dist_to_nest)]
+        self._unload_food(arrived)
+        returning = slots[carrying & (to_nest > params.min_dist_to_nest)]
+        self._move_to(returning, self.home_position[returning])
+        self._set_trace(returning, pheromone_fields)
+
+        # 2- workers without food at a food source
+        searching = np.flatnonzero(~carrying)
+        offsets, food_objects, food_positions = _flatten(foods, searching)
+        at_food = self._load_food(slots[searching], offsets, food_objects, food_positions)
+
+        # 3- all other workers without food
+        moving = searching[~at_food]
+        offsets, food_objects, food_positions = _flatten(foods, moving)
+        has_target = self._move_to_food(slots[moving], offsets, food_objects, food_positions)
+
+        smelling = slots[moving[~has_target]]
+        following = self._move_to_pheromone(smelling, pheromone_fields)
+        return smelling[~following]
+
+    def _update_scouts(self, slots, foods, pheromone_fields):
+        """ Update scouts like update_scouts, except for the random steps
+
+        :return: (array of ints) slots of the scouts that have to move randomly
+
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        params = all_params.ant_model_params
+        if pheromone_fields is None:
+            pheromone_fields = [None] * len(self.nests)
+
+        found_food = self.has_food[slots] > 0
+        to_nest = distance(self.position[slots] - self.home_position[slots])
+
+        # 1- scouts that found food
+        arrived = slots[found_food & (to_nest <= params.min_dist_to_nest_scout)]
+        self.position[arrived] = self.home_position[arrived]
+        self.has_food[arrived] = 0.
+        self.pheromone_strength[arrived] = 0.
+        self._increase_energy(arrived)
+        returning = slots[found_food & (to_nest > params.min_dist_to_nest_scout)]
+        self._move_to(returning, self.home_position[returning])
+        self._set_trace(returning, pheromone_fields)
+
+        # 2- scouts without food at a food source
+        searching = np.flatnonzero(~found_food)
+        offsets, food_objects, food_positions = _flatten(foods, searching)
+        at_food = self._start_food_trail(slots[searching], offsets, food_objects, food_positions)
+
+        # 3- all other scouts
+        moving = searching[~at_food]
+        offsets, food_objects, food_positions = _flatten(foods, moving)
+        has_target = self._move_to_food(slots[moving], offsets, food_objects, food_positions)
+        return slots[moving[~has_target]]
+
+    def _unload_food(self, slots):
+        """Unload the food of workers at their nest and refill their energy"""
+        if len(slots) == 0:
+            return
+        self.position[slots] = self.home_position[slots]
+        food_per_nest = np.bincount(self.home[slots], weights=self.has_food[slots], minlength=len(self.nests))
+        for index in np.flatnonzero(food_per_nest):
+            self.nests[index].increase_food(float(food_per_nest[index]))
+        self.has_food[slots] = 0.
+        self.pheromone_strength[slots] = 0.
+        self._increase_energy(slots)
+
+    def _increase_energy(self, slots):
+        """Increase the energy of ants at their nest, as long as it is below the maximum"""
+        slots = slots[self.energy[slots] < all_params.ant_model_params.maximum_energy]
+        self.energy[slots] += all_params.ant_model_params.energy_increase
+
+    def _set_trace(self, slots, pheromone_fields):
+        """Let ants lay pheromone at their current position into the field of their owner"""
+        params = all_params.ant_model_params
+        self.pheromone_strength[slots] = np.maximum(params.min_pheromone_strength,
+                                                    params.pheromone_dist_decay * self.pheromone_strength[slots])
+        homes = self.home[slots]
+        for index in np.unique(homes):
+            field = pheromone_fields[index]
+            if field is not None:
+                colony = slots[homes == index]
+                field.deposit(self.position[colony], self.pheromone_strength[colony])
+
+    def _load_food(self, slots, offsets, food_objects, food_positions):
+        """ Let ants that are at one of the food sources they perceive load some of it
+
+        :return: (array of bools) for every ant whether it was at a food source
+
+        """
+        params = all_params.ant_model_params
+        owners = np.repeat(np.arange(len(slots)), np.diff(offsets))
+        close = distance(self.position[slots[owners]] - food_positions) <= params.min_dist_to_food
+        at_food = np.zeros(len(slots), dtype=bool)
+
+        # Every ant takes the first food source in reach. The amount taken depends on what the ants before left.
+        for i in np.flatnonzero(close):
+            owner = owners[i]
+            if at_food[owner]:
+                continue
+            at_food[owner] = True
+            slot = slots[owner]
+            food = food_objects[i]
+            self.position[slot] = food.position
+            self.has_food[slot] = food.take_some(float(self.loading_capacity[slot]))
+            to_nest = np.linalg.norm(self.position[slot] - self.home_position[slot])
+            self.pheromone_strength[slot] = min(100. * (food.size / to_nest),
+                                                params.max_pheromone_strength) / params.pheromone_dist_decay
+        return at_food
+
+    def _start_food_trail(self, slots, offsets, food_objects, food_positions):
+        """ Let scouts that are at one of the food sources they perceive start a pheromone trail from it
+
+        :return: (array of bools) for every scout whether it was at a food source
+
+        """
+        params = all_params.ant_model_params
+        owners = np.repeat(np.arange(len(slots)), np.diff(offsets))
+        to_food = distance(self.position[slots[owners]] - food_positions)
+        close = np.flatnonzero(to_food <= params.min_dist_to_food_scout)
+
+        # Every scout takes the first food source in reach
+        found, first = np.unique(owners[close], return_index=True)
+        first = close[first]
+        found_slots = slots[found]
+        self.position[found_slots] = food_positions[first]
+        self.has_food[found_slots] = 1.
+        sizes = np.array([food_objects[i].size for i in first], dtype=float)
+        with np.errstate(divide='ignore'):
+            strength = 200. * sizes / distance(self.position[found_slots] - self.home_position[found_slots])
+        strength = np.minimum(strength, params.max_pheromone_strength)
+        self.pheromone_strength[found_slots] = strength / params.pheromone_dist_decay
+
+        at_food = np.zeros(len(slots), dtype=bool)
+        at_food[found] = True
+        return at_food
+
+    def _move_to_food(self, slots, offsets, food_objects, food_positions):
+        """ Move ants towards one of the food sources they perceive. Sources are drawn with probabilities given by
+        their size and distance to the nest, and empty sources or sources at the nest are ignored, unless an ant
+        perceives only one source.
+
+        :return: (array of bools) for every ant whether it moved towards a food source
+
+        """
+        counts = np.diff(offsets)
+        owners = np.repeat(np.arange(len(slots)), counts)
+        sizes = np.array([food.size for food in food_objects], dtype=float)
+        to_nest = distance(food_positions - self.home_position[slots[owners]])
+        valid = (counts[owners] == 1) | ((sizes != 0) & (to_nest != 0))
+        owners, sizes, to_nest, food_positions = owners[valid], sizes[valid], to_nest[valid], food_positions[valid]
+
+        chosen_owners = np.unique(owners)
+        if len(chosen_owners):
+            probs = _rescale(sizes, owners, len(slots)) ** self.foodiness[slots[owners]]
+            probs *= _rescale(to_nest, owners, len(slots)) ** self.explorativeness[slots[owners]]
+            choice = _choose(probs, owners, len(slots), self.rng)[chosen_owners]
+            self._move_to(slots[chosen_owners], food_positions[choice])
+
+        has_target = np.zeros(len(slots), dtype=bool)
+        has_target[chosen_owners] = True
+        return has_target
+
+    def _move_to_pheromone(self, slots, pheromone_fields):
+        """ Move ants towards one of the pheromone cells of their owner they perceive. Cells are drawn with
+        probabilities given by their strength, their distance to the nest and how little the ant has to turn to reach
+        them, weighted by inscentiveness, explorativeness and directionism.
+
+        :return: (array of bools) for every ant whether it perceived pheromone
+
+        """
+        following = np.zeros(len(slots), dtype=bool)
+        homes = self.home[slots]
+        for index in np.unique(homes):
+            field = pheromone_fields[index]
+            if field is None:
+                continue
+            colony = np.flatnonzero(homes == index)
+            offsets, positions, strengths = field.get_circular_region_list(
+                self.position[slots[colony]], all_params.tree_model_params.circular_region_radius_worker)
+            counts = np.diff(offsets)
+            owners = np.repeat(np.arange(len(colony)), counts)
+            colony_slots = slots[colony[owners]]
+
+            to_nest = distance(positions - self.home_position[colony_slots])
+            probs = _rescale(strengths, owners, len(colony)) ** self.inscentiveness[colony_slots]
+            probs *= _rescale(to_nest, owners, len(colony)) ** self.explorativeness[colony_slots]
+            probs *= _alignment(positions - self.position[colony_slots], self.direction[colony_slots]) \
+                ** self.directionism[colony_slots]
+
+            smelled = np.flatnonzero(counts)
+            if len(smelled):
+                choice = _choose(probs, owners, len(colony), self.rng)[smelled]
+                self._move_to(slots[colony[smelled]], positions[choice])
+                following[colony[smelled]] = True
+        return following
+
+    def _move_randomly(self, slots):
+        """Move ants with a random walk that is combined with their previous direction"""
+        direction = self.direction[slots]
+        redraw = np.ones(len(slots), dtype=bool)
+        while np.any(redraw):  # to avoid standing still and divide by zero
+            movement = 2 * self.rng.random((np.count_nonzero(redraw), 2), dtype=dtype) - 1
+            direction[redraw] = all_params.ant_model_params.direction_memory * self.direction[slots[redraw]] + movement
+            redraw = distance(direction) == 0.
+        self.direction[slots] = direction / distance(direction)[:, np.newaxis]
+        self.position[slots] += self.direction[slots] * self.speed[slots, np.newaxis]
+
+    def _move_to(self, slots, targets):
+        """Move ants one step of their speed towards the given positions"""
+        offset = targets - self.position[slots]
+        length = distance(offset)
+        direction = np.zeros_like(offset)
+        np.divide(offset, length[:, np.newaxis], out=direction, where=length[:, np.newaxis] > 0.)
+        self.direction[slots] = direction
+        self.position[slots] += direction * self.speed[slots, np.newaxis]
+
+    def _grow(self, capacity):
+        """Resize all columns to the given capacity"""
+        for name in ("kind", "home") + self.vector_columns + self.scalar_columns:
+            column = getattr(self, name)
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+
+def distance(vectors):
+    """Euclidean length of every row"""
+    return np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+
+
+def _alignment(offsets, directions):
+    """ Rate how well every offset agrees with a direction, from 0 for opposite over 0.5 for orthogonal to 1 for the
+    same direction. Offsets or directions of length 0 are rated 0.5, so that they favour no cell.
+    """
+    lengths = distance(offsets) * distance(directions)
+    cosines = np.divide(np.einsum('ij,ij->i', offsets, directions), lengths, out=np.zeros(len(offsets)),
+                        where=lengths > 0)
+    return (1. + cosines) / 2.
+
+
+def _flatten(foods, indices):
+    """ Flatten the food lists of some ants into arrays grouped by ant
+
+    :param foods: (list) food lists of all ants
+    :param indices: (array of ints) the ants whose lists are wanted
+    :return offsets: (array of ints) the food of ant i are food_objects[offsets[i]:offsets[i + 1]]
+    :return food_objects: (list) the food objects of all selected ants
+    :return food_positions: (array) positions of these food objects
+
+    """
+    selected = [foods[i] for i in indices]
+    offsets = np.zeros(len(selected) + 1, dtype=np.intp)
+    np.cumsum([len(food_list) for food_list in selected], out=offsets[1:])
+    food_objects = [food for food_list in selected for food in food_list]
+    food_positions = empty((len(food_objects), 2))
+    if food_objects:
+        food_positions[:] = [food.position for food in food_objects]
+    return offsets, food_objects, food_positions
+
+
+def _rescale(values, groups, n_groups):
+    """Divide values by the maximum of their group, so that they are bounded by 1"""
+    maxima = np.zeros(n_groups)
+    np.maximum.at(maxima, groups, values)
+    maxima = maxima[groups]
+    return np.divide(values, maxima, out=np.ones(len(values)), where=maxima > 0)
+
+
+def _choose(weights, groups, n_groups, rng):
+    """ Draw one element per group with probabilities proportional to the weights
+
+    :param weights: (array) non-negative weight of every element
+    :param groups: (array of ints) group of every element, sorted
+    :param n_groups: (int) number of groups
+    :param rng: (Generator) random generator to draw with
+    :return: (array of ints) index of the element drawn for every group, meaningless for empty groups
+
+    """
+    counts = np.bincount(groups, minlength=n_groups)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    cumulative = np.concatenate(([0.], np.cumsum(weights)))
+    totals = cumulative[ends] - cumulative[starts]
+    targets = cumulative[starts] + rng.random(n_groups) * totals
+    choice = np.searchsorted(cumulative, targets, side='right') - 1
+    return np.clip(choice, starts, np.maximum(ends - 1, starts))
@@ -0,0 +1,165 @@
+"""
+Integer handles for all game objects. A handle packs the index of the object in the registry and a generation
+counter, which is increased every time the index is released, so handles of removed objects never match the
+objects that later reuse their index. The registry only holds weak references, an object that is garbage collected
+releases its handle, so games that are dropped without removing their objects do not stay alive.
+
+Garbage collection can run on any thread, so the weak reference callbacks only queue the collected references. The
+queue is drained under the lock of the registry by the next registration or release.
+"""
+from collections import deque
+from threading import Lock
+import weakref
+
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+class _Reference(weakref.ref):
+    """Weak reference to a registered object, remembering the index and the generation it was registered with"""
+
+    __slots__ = ("index", "generation")
+
+    def __new__(cls, obj, callback, index, generation):
+        reference = super().__new__(cls, obj, callback)
+        reference.index = index
+        reference.generation = generation
+        return reference
+
+    def __init__(self, obj, callback, index, generation):
+        super().__init__(obj, callback)
+
+
+class EntityRegistry:
+    """
+            A class used to hand out integer handles for game objects and to look objects up by handle in O(1)
+
+            ...
+
+            Attributes
+            ----------
+            objects: list
+                weak references to the registered objects by index, None for free indices
+            generations: list
+                current generation of every index
+            index_offset: int
+                added to all indices, so registries of different processes can hand out handles that never collide
+            capacity: int
+                maximum number of indices that can be in use at the same time
+
+            Methods
+            -------
+            register(obj)
+                Return a new handle for an object
+
+            release(handle)
+                Free the index of a handle so it can be reused
+
+            get(handle)
+                Return the object of a handle, or None if the handle was released
+
+    """
+
+    def __init__(self, index_offset=0, capacity=1 << INDEX_BITS):
+        """
+        :param index_offset: (int) first index handed out
+        :param capacity: (int) maximum number of indices in use at the same time
+        """
+        self.objects = []
+        self.generations = []
+        self._free_indices = []
+        self.index_offset = index_offset
+        self.capacity = capacity
+        self._lock = Lock()
+        # References of objects that were garbage collected without being released, and the one callback of all
+        # references, which only queues them
+        self._collected = deque()
+        self._on_collected = self._collected.append
+
+    def __len__(self):
+        with self._lock:
+            self._release_collected()
+            return len(self.objects) - len(self._free_indices)
+
+    def __contains__(self, handle):
+        return self.get(handle) is not None
+
+    def register(self, obj):
+        """ Register an object and return its handle
+
+        :param obj: (GameObject) the object, it must support weak references
+        :return: (int) handle of the object
+
+        """
+        with self._lock:
+            if self._collected:
+                self._release_collected()
+            if self._free_indices:
+                index = self._free_indices.pop()
+            else:
+                index = len(self.objects)
+                if index >= self.capacity or index + self.index_offset > INDEX_MASK:
+                    raise OverflowError("The registry cannot hold more than {} objects.".format(self.capacity))
+                self.objects.append(None)
+                self.generations.append(0)
+            generation = self.generations[index]
+            self.objects[index] = _Reference(obj, self._on_collected, index, generation)
+        return make_handle(index + self.index_offset, generation)
+
+    def release(self, handle):
+        """ Release the handle of an object that is no longer used, its index will be reused by a new object
+
+        :param handle: (int) handle of the object
+
+        """
+        index = get_index(handle) - self.index_offset
+        with self._lock:
+            if self._collected:
+                self._release_collected()
+            if self.get(handle) is None:
+                raise KeyError("Handle {} is not registered.".format(handle))
+            self._free(index)
+
+    def _release_collected(self):
+        """Release the indices of garbage collected objects, unless they were released already"""
+        while self._collected:
+            reference = self._collected.popleft()
+            if self.generations[reference.index] == reference.generation:
+                self._free(reference.index)
+
+    def _free(self, index):
+        self.objects[index] = None
+        self.generations[index] += 1
+        self._free_indices.append(index)
+
+    def get(self, handle):
+        """ Look up an object by its handle
+
+        :param handle: (int) handle of the object
+        :return: (GameObject) the object, or None if the handle was released
+
+        """
+        index = get_index(handle) - self.index_offset
+        if 0 <= index < len(self.objects) and self.generations[index] == get_generation(handle):
+            reference = self.objects[index]
+            return None if reference is None else reference()
+        return None
+
+
+def make_handle(index, generation):
+    """Pack an index and a generation into a handle"""
+    return (generation << INDEX_BITS) | index
+
+
+def get_index(handle):
+    """Return the index of a handle in the registry"""
+    return handle & INDEX_MASK
+
+
+def get_generation(handle):
+    """Return the generation of a handle"""
+    return handle >> INDEX_BITS
+
+
+# All game objects are registered here
+registry = EntityRegistry()
@@ -3,6 +3,7 @@ from src.settings import all_params
 
 
 class Food(GameObject):
+    __slots__ = ("position", "size")
 
     def __init__(self, position, size):
         super(Food, self).__init__(position)
@@ -1,12 +1,16 @@
 from abc import abstractmethod
-import uuid
+
+from .entity_registry import registry
 
 
 class GameObject:
+    # Subclasses declare their own attributes, position included, so that no object carries a __dict__. The registry
+    # only keeps weak references to the objects.
+    __slots__ = ("id", "__weakref__")
 
     def __init__(self, position):
         self.position = position
-        self.id = uuid.uuid4()
+        self.id = registry.register(self)
 
     @abstractmethod
     def update(self, *args):
@@ -1,6 +1,19 @@
-from src.utils import random, array
+from src.utils import array, dtype
 import numpy as np
 from .kd_tree import KDTree
+from .kd_tree_and_dict import KdTreeAndDict
+from .spatial_hash import SpatialHash
+from .snapshot import Snapshot
+from .persistence import save_game_state, load_game_state
+
+from src.settings import all_params
+
+# World implementations GameState can be built with, by name
+world_types = {
+    "kd_tree": KDTree,
+    "kd_tree_and_dict": KdTreeAndDict,
+    "spatial_hash": SpatialHash,
+}
 
 # Interface with controller
 # GameState calls world interface
@@ -16,12 +29,24 @@ class GameState:
                 a list of players id that are currently in the game
             world: list
                 a list of all game objects and their positions
+            seed_sequence: SeedSequence
+                root of all random streams of the game, spawn children from it for further streams
+            rng: Generator
+                random generator used to set up the game (nest and food positions)
+            tick: int
+                number of updates so far
 
             Methods
             -------
             get_objects_in_region(top_left, bottom_right):
                 Return positions of objects in specific area
 
+            snapshot(top_left, bottom_right)
+                Return an immutable copy of the objects in specific area
+
+            save(path), load(path)
+                Write the game to a file and read it back
+
             update()
                 Return states and positions of all objects a each time iteration
 
@@ -30,20 +55,74 @@ class GameState:
 
     """
 
-    def __init__(self, player_list):
+    def __init__(self, player_list, world_type=None, seed=None, create_objects=True):
         """ Initialize player list and create nests for all the players
 
         :param player_list: (list) that contains current players IDs
+        :param world_type: (string) name of the World implementation to use, one of the keys of world_types.
+                           Defaults to all_params.tree_model_params.world_type
+        :param seed: (int) seed of all random decisions of the game, games with the same seed play out the same.
+                     A random seed is used if None.
+        :param create_objects: (bool) create a nest per player and the initial food, an empty world otherwise
 
         """
+        if world_type is None:
+            world_type = all_params.tree_model_params.world_type
+        if world_type not in world_types:
+            raise ValueError("Unknown world type {}, use one of {}.".format(world_type, list(world_types)))
+
+        # One stream to set up the game and one for the ants, so that the setup does not change the moves of the ants
+        self.seed_sequence = np.random.SeedSequence(seed)
+        setup_seed, = self.seed_sequence.spawn(1)
+        self.rng = np.random.default_rng(setup_seed)
+
         self.players = player_list
-        self.world = KDTree()
+        self.tick = 0
+        self._create_world(world_type)
+        if not create_objects:
+            return
         positions = []
         for i in range(len(player_list)):
-            positions.append(random(2) * 250)
-        self.world.create_nests(player_list, positions, health=100, size=10)
+            positions.append(array(self.rng.random(2)) * 250)
+        self.create_nest(positions, player_list, health=100, size=10)
         self.generate_random_food(array([-250, 250]), array([250, -250]), 50, [5] * 50)
 
+    def _create_world(self, world_type):
+        """ Create the world the objects of the game live in, with the second stream of the seed sequence
+
+        :param world_type: (string) name of the World implementation, one of the keys of world_types
+
+        """
+        world_seed, = self.seed_sequence.spawn(1)
+        self.world = world_types[world_type](rng=np.random.default_rng(world_seed))
+
+    def save(self, path):
+        """ Write the game to a file, see persistence.save_game_state
+
+        :param path: (str) the file, .npz is appended if it has another suffix
+
+        """
+        save_game_state(self, path)
+
+    @staticmethod
+    def load(path):
+        """ Read a game written by save
+
+        :param path: (str) the file
+        :return: (GameState) the game
+
+        """
+        return load_game_state(path)
+
+    def spawn_seeds(self, amount):
+        """ Return independent seeds for further random streams of the game, e.g. one per process
+
+        :param amount: (int) number of seeds
+        :return: (list) SeedSequence objects
+
+        """
+        return self.seed_sequence.spawn(amount)
+
     def get_objects_in_region(self, top_left, bottom_right):
         """ Get list of positions and all included objects (ants, nests, foods, pheromones, etc) in a specific
             rectangular area
@@ -55,9 +134,21 @@ class GameState:
         """
         return self.world.get_rectangle_region(top_left, bottom_right)
 
+    def snapshot(self, top_left, bottom_right, previous=None):
+        """ Copy the state of all objects in a rectangular area, so it can be read while the game goes on
+
+        :param top_left: (ndarray) Coordinates of top left point of the rectangle
+        :param bottom_right: (ndarray) Coordinates of bottom right point of the rectangle
+        :param previous: (Snapshot) the last snapshot, to also record the spawn, move and despawn events since then
+        :return: (Snapshot) the state of the objects after the last update
+
+        """
+        return Snapshot(self.tick, self.get_objects_in_region(top_left, bottom_right), previous)
+
     def update(self):
         """Return the states of all the objects and their positions at each time iteration """
         self.world.update()
+        self.tick += 1
 
     def create_ants(self, nest, ant_type="worker", amount=1):
         """Create new ant objects in the specific nest with the given positions
@@ -71,7 +162,7 @@ class GameState:
         return self.world.create_ants(nest, ant_type, amount)
 
     def create_nest(self, nest_position, player, size, health):
-        return self.world.create_nests(nest_position, player, size, health)
+        return self.world.create_nests(player, nest_position, size, health)
 
     def create_food(self, position_list, size_list):
         return self.world.create_food(position_list, size_list)
@@ -86,8 +177,8 @@ class GameState:
         position_list = []
         for i in range(amount):
             x_span = bottom_right[0] - top_left[0]
-            x_position = top_left[0] + x_span * random(1)
+            x_position = top_left[0] + x_span * self.rng.random(1, dtype=dtype)
             y_span = top_left[1] - bottom_right[1]
-            y_position = top_left[0] + y_span * random(1)
+            y_position = top_left[0] + y_span * self.rng.random(1, dtype=dtype)
             position_list.append(np.concatenate((x_position, y_position)))
         self.create_food(position_list, size_list)
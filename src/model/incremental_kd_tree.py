@@ -0,0 +1,442 @@
+from itertools import chain
+
+from scipy.spatial import cKDTree
+import numpy as np
+
+from src.utils import empty
+
+FREE = 0
+STATIC = 1
+DYNAMIC = 2
+
+
+class IncrementalKDTree:
+    """
+            A spatial index over game objects that does not rebuild a cKDTree on every change.
+            Objects live in one of three cKDTrees:
+            - a static tree with everything that has not moved since the last merge
+            - a dynamic tree with the objects that kept moving. It is built at positions its objects may have left
+              since, a move only updates the position of the object and the slack, the largest distance an object
+              of the tree moved away from the position it was indexed at. Queries search the tree with their radius
+              grown by the slack and check the hits against the current positions.
+            - a small buffer tree with everything inserted or moved out of the static tree since the dynamic tree was
+              built, rebuilt whenever it changes
+            So a commit costs array operations over the staged changes only. The dynamic tree is rebuilt once the
+            slack or the buffer grew too large, and the static tree is rebuilt (merged) once enough of it went stale.
+
+            ...
+
+            Attributes
+            ----------
+            objects: list
+                game objects by slot, None for free slots
+            positions: array
+                positions of the objects by slot, as of the last commit
+            slack: float
+                largest distance an object of the dynamic tree moved since the tree was built
+            merge_fraction: float
+                the static tree is merged once stale and cold dynamic entries exceed this fraction of it
+            min_merge_size: int
+                number of stale and cold dynamic entries that never triggers a merge, and number of buffered entries
+                that never triggers a rebuild of the dynamic tree
+            max_slack: float
+                the dynamic tree is rebuilt once the slack exceeds this distance
+            buffer_fraction: float
+                the dynamic tree is rebuilt once the buffered entries exceed this fraction of it
+
+            Methods
+            -------
+            insert(obj), move(obj), remove(obj)
+                Stage a change, it becomes visible to queries with the next commit()
+
+            commit()
+                Apply all staged changes, and rebuild the trees that need it
+
+    """
+
+    def __init__(self, merge_fraction=0.25, min_merge_size=64, max_slack=16., buffer_fraction=0.25):
+        self.objects = []
+        self.positions = empty((0, 2))
+        self.slack = 0.
+        self.merge_fraction = merge_fraction
+        self.min_merge_size = min_merge_size
+        self.max_slack = max_slack
+        self.buffer_fraction = buffer_fraction
+
+        self._location = np.zeros(0, dtype=np.int8)
+        # Commit in which every slot last moved, and row of every slot in the dynamic tree (-1 if it has none)
+        self._moved_at = np.zeros(0, dtype=np.int64)
+        self._dynamic_row = np.zeros(0, dtype=np.intp)
+        self._commits = 0
+        self._slots = {}
+        self._free_slots = []
+        self._pending_inserts = []
+        # Staged moves by object id, so objects moved several times are moved once, and moves staged with positions
+        self._pending_moves = {}
+        self._pending_position_moves = []
+        self._pending_removals = []
+
+        self._static_tree = None
+        self._static_slots = np.zeros(0, dtype=np.intp)
+        self._n_static_valid = 0
+        self._dynamic_tree = None
+        self._dynamic_slots = np.zeros(0, dtype=np.intp)
+        self._n_dynamic_stale = 0
+        self._n_dynamic = 0
+        self._buffer = set()
+        self._buffer_tree = None
+        self._buffer_slots = np.zeros(0, dtype=np.intp)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __iter__(self):
+        return iter([obj for obj in self.objects if obj is not None])
+
+    def __contains__(self, obj):
+        return obj.id in self._slots
+
+    def insert(self, obj):
+        """ Stage a new object for insertion
+
+        :param obj: (GameObject) object to be inserted at its current position
+
+        """
+        self._pending_inserts.append(obj)
+
+    def move(self, obj):
+        """ Stage the new position of an already inserted object
+
+        :param obj: (GameObject) object whose position changed
+
+        """
+        self._pending_moves[obj.id] = obj
+
+    def move_all(self, objects, positions):
+        """ Stage the new positions of already inserted objects, given as an array instead of read from the objects
+
+        :param objects: (list) objects whose position changed, each at most once
+        :param positions: (array) their new positions, one per row
+
+        """
+        self._pending_position_moves.append((objects, positions))
+
+    def remove(self, obj):
+        """ Stage the removal of an already inserted object
+
+        :param obj: (GameObject) object to be removed
+
+        """
+        self._pending_removals.append(obj)
+
+    def commit(self):
+        """ Apply all staged inserts, moves and removals.
+
+        Inserted objects and objects moving out of the static tree go to the buffer. Objects of the dynamic tree stay
+        in it, their moves only grow the slack. The static tree is merged when the number of stale static entries plus
+        dynamic entries that did not move in this commit is large compared to it, else the dynamic tree is rebuilt
+        when the slack or the buffer is too large, else only the buffer tree is rebuilt if the buffer changed.
+
+        """
+        pending = (self._pending_inserts, self._pending_moves, self._pending_position_moves, self._pending_removals)
+        if not any(pending):
+            return
+        self._commits += 1
+
+        inserted = np.array([self._allocate(obj) for obj in self._pending_inserts], dtype=np.intp)
+        slots = self._slots
+        moved = np.fromiter((slots[handle] for handle in self._pending_moves if handle in slots), dtype=np.intp)
+        changed = np.concatenate((inserted, moved))
+        if len(changed):
+            self.positions[changed] = np.array([self.objects[slot].position for slot in changed], dtype=float)
+        if self._pending_position_moves:
+            moved = [moved]
+            for objects, positions in self._pending_position_moves:
+                position_slots = np.fromiter((slots.get(obj.id, -1) for obj in objects), dtype=np.intp,
+                                             count=len(objects))
+                known = position_slots >= 0
+                self.positions[position_slots[known]] = positions[known]
+                moved.append(position_slots[known])
+            moved = np.concatenate(moved)
+            # An object can only have been staged twice if moves were staged in several ways
+            if len(self._pending_position_moves) + bool(self._pending_moves) > 1:
+                moved = np.unique(moved)
+
+        self._location[inserted] = DYNAMIC
+        leaving = moved[self._location[moved] == STATIC]
+        self._location[leaving] = DYNAMIC
+        self._n_static_valid -= len(leaving)
+        self._n_dynamic += len(inserted) + len(leaving)
+        self._buffer.update(inserted.tolist())
+        self._buffer.update(leaving.tolist())
+        self._moved_at[moved] = self._commits
+
+        in_tree = moved[self._dynamic_row[moved] >= 0]
+        if len(in_tree):
+            offsets = self.positions[in_tree] - self._dynamic_tree.data[self._dynamic_row[in_tree]]
+            self.slack = max(self.slack, float(np.sqrt(np.einsum("ij,ij->i", offsets, offsets).max())))
+        buffer_changed = len(inserted) > 0 or len(in_tree) < len(moved)
+
+        for obj in self._pending_removals:
+            slot = self._slots.pop(obj.id, None)
+            if slot is None:
+                continue
+            self.objects[slot] = None
+            if self._location[slot] == STATIC:
+                self._n_static_valid -= 1
+            elif self._dynamic_row[slot] >= 0:
+                self._dynamic_row[slot] = -1
+                self._n_dynamic_stale += 1
+                self._n_dynamic -= 1
+            else:
+                self._buffer.discard(slot)
+                self._n_dynamic -= 1
+                buffer_changed = True
+            self._location[slot] = FREE
+            self._free_slots.append(slot)
+
+        self._pending_inserts = []
+        self._pending_moves = {}
+        self._pending_position_moves = []
+        self._pending_removals = []
+
+        n_stale = len(self._static_slots) - self._n_static_valid
+        n_cold = self._n_dynamic - np.count_nonzero(self._location[moved] == DYNAMIC)
+        n_dynamic_valid = len(self._dynamic_slots) - self._n_dynamic_stale
+        if n_stale + n_cold > self.merge_fraction * self._n_static_valid + self.min_merge_size:
+            self._merge()
+        elif self.slack > self.max_slack or len(self._buffer) > self.buffer_fraction * n_dynamic_valid + \
+                self.min_merge_size:
+            self._rebuild_dynamic(np.flatnonzero(self._location == DYNAMIC))
+        elif buffer_changed:
+            self._buffer_slots = np.fromiter(self._buffer, dtype=np.intp, count=len(self._buffer))
+            self._buffer_tree = self._build(self._buffer_slots)
+
+    def query(self, position, k=1):
+        """ Get the k nearest objects to a position
+
+        :param position: (list) Coordinates of the position of interest
+        :param k: (int) Number of nearest neighbours
+        :return dists: (array of floats) Distances to the nearest neighbours, sorted
+        :return objects: (list) The nearest objects, in the same order
+
+        """
+        position = np.asarray(position, dtype=float)
+        dists, slots = [], []
+        for tree, tree_slots, slack, n_stale in self._trees():
+            if tree is None:
+                continue
+            k_tree = min(k + n_stale, tree.n)
+            tree_dists, idx = tree.query(position, k_tree)
+            tree_dists, idx = np.atleast_1d(tree_dists), np.atleast_1d(idx)
+            if slack > 0 and k_tree < tree.n:
+                # No object was indexed more than the slack away from where it is, so all objects nearer than the k
+                # nearest rows are indexed within their distance plus twice the slack
+                idx = np.asarray(tree.query_ball_point(position, tree_dists[-1] + 2 * slack), dtype=np.intp)
+            found, valid = self._valid_slots(tree, tree_slots, idx)
+            if slack > 0:
+                tree_dists = np.linalg.norm(self.positions[found] - position, axis=1)
+            elif valid is not None:
+                tree_dists = tree_dists[valid]
+            dists.append(tree_dists)
+            slots.append(found)
+
+        if not dists:
+            return np.zeros(0), []
+        dists = np.concatenate(dists)
+        slots = np.concatenate(slots)
+        order = np.argsort(dists, kind="stable")[:k]
+        return dists[order], [self.objects[slot] for slot in slots[order]]
+
+    def query_ball_point(self, center, radius, p=2.):
+        """ Return all objects within a distance of a point
+
+        :param center: (list) Coordinates of the center
+        :param radius: (float) Maximum distance
+        :param p: (float) Which Minkowski p-norm to use, np.inf gives a square region
+        :return: (list) All objects in the region
+
+        """
+        return [self.objects[slot] for slot in self.query_ball_point_slots(center, radius, p)]
+
+    def query_ball_point_slots(self, center, radius, p=2.):
+        """ Like query_ball_point, but return the slots of the objects instead of the objects
+
+        :param center: (list) Coordinates of the center
+        :param radius: (float) Maximum distance
+        :param p: (float) Which Minkowski p-norm to use
+        :return: (array of ints) Slots of all objects in the region
+
+        """
+        center = np.asarray(center, dtype=float)
+        result = []
+        for tree, tree_slots, slack, _ in self._trees():
+            if tree is None:
+                continue
+            idx = np.asarray(tree.query_ball_point(center, radius + slack, p=p), dtype=np.intp)
+            slots, _ = self._valid_slots(tree, tree_slots, idx)
+            if slack > 0:
+                slots = slots[np.linalg.norm(self.positions[slots] - center, ord=p, axis=1) <= radius]
+            result.append(slots)
+
+        if not result:
+            return np.zeros(0, dtype=np.intp)
+        return np.concatenate(result)
+
+    def query_rectangle(self, lower, upper):
+        """ Return all objects in an axis-aligned rectangle, borders included
+
+        :param lower: (list) Smallest x and y in the rectangle
+        :param upper: (list) Largest x and y in the rectangle
+        :return: (list) All objects in the rectangle
+
+        """
+        return [self.objects[slot] for slot in self.query_rectangle_slots(lower, upper)]
+
+    def query_rectangle_slots(self, lower, upper):
+        """ Like query_rectangle, but return the slots of the objects instead of the objects.
+        The positions of all slots are compared at once, which is cheaper than collecting the candidates of a
+        tree query in Python, and exact for rectangles of any aspect ratio.
+
+        :param lower: (list) Smallest x and y in the rectangle
+        :param upper: (list) Largest x and y in the rectangle
+        :return: (array of ints) Slots of all objects in the rectangle, in increasing order
+
+        """
+        n_slots = len(self.objects)
+        positions = self.positions[:n_slots]
+        inside = np.all((positions >= lower) & (positions <= upper), axis=1)
+        return np.flatnonzero(inside & (self._location[:n_slots] != FREE))
+
+    def query_ball_point_list(self, center_list, radius):
+        """ Return the objects within a distance of each of several points, using one query per tree for all points
+
+        :param center_list: (array) Coordinates of the centers, one row per center
+        :param radius: (float or array) Maximum distance, either shared or one per center
+        :return: (list) For each center the list of objects in its region
+
+        """
+        offsets, slots = self.query_ball_point_list_slots(center_list, radius)
+        objects = [self.objects[slot] for slot in slots]
+        return [objects[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def query_ball_point_list_slots(self, center_list, radius):
+        """ Like query_ball_point_list, but return the slots of the objects grouped by center
+
+        :param center_list: (array) Coordinates of the centers, one row per center
+        :param radius: (float or array) Maximum distance, either shared or one per center
+        :return offsets: (array of ints) The slots of center i are slots[offsets[i]:offsets[i + 1]]
+        :return slots: (array of ints) Slots of the objects in all regions, grouped by center
+
+        """
+        center_list = np.asarray(center_list, dtype=float).reshape(-1, 2)
+        radius = np.asarray(radius, dtype=float)
+        n_centers = len(center_list)
+        centers, slots = [], []
+        for tree, tree_slots, slack, _ in self._trees():
+            if tree is None or n_centers == 0:
+                continue
+            idx_lists = tree.query_ball_point(center_list, radius + slack)
+            lengths = np.fromiter(map(len, idx_lists), dtype=np.intp, count=n_centers)
+            idx = np.fromiter(chain.from_iterable(idx_lists), dtype=np.intp, count=lengths.sum())
+            tree_centers = np.repeat(np.arange(n_centers), lengths)
+            found, valid = self._valid_slots(tree, tree_slots, idx)
+            if valid is not None:
+                tree_centers = tree_centers[valid]
+            if slack > 0:
+                offsets = self.positions[found] - center_list[tree_centers]
+                radii = radius if radius.ndim == 0 else radius[tree_centers]
+                inside = np.einsum("ij,ij->i", offsets, offsets) <= radii ** 2
+                tree_centers, found = tree_centers[inside], found[inside]
+            centers.append(tree_centers)
+            slots.append(found)
+
+        if not slots:
+            return np.zeros(n_centers + 1, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        centers = np.concatenate(centers)
+        slots = np.concatenate(slots)
+        order = np.argsort(centers, kind="stable")
+        offsets = np.zeros(n_centers + 1, dtype=np.intp)
+        np.cumsum(np.bincount(centers, minlength=n_centers), out=offsets[1:])
+        return offsets, slots[order]
+
+    def _trees(self):
+        """ Return the trees with the slots of their rows, the slack their rows have to be searched with and the
+        number of their rows that are stale
+        """
+        return ((self._static_tree, self._static_slots, 0., len(self._static_slots) - self._n_static_valid),
+                (self._dynamic_tree, self._dynamic_slots, self.slack, self._n_dynamic_stale),
+                (self._buffer_tree, self._buffer_slots, 0., 0))
+
+    def _valid_slots(self, tree, tree_slots, idx):
+        """ Map rows of a tree to slots, dropping rows whose object was removed or moved to another tree
+
+        :return slots: (array of ints) slots of the valid rows
+        :return valid: (array of bools) which rows are valid, None if all of them are
+
+        """
+        slots = tree_slots[idx]
+        if tree is self._static_tree:
+            valid = self._location[slots] == STATIC
+        elif tree is self._dynamic_tree:
+            valid = self._dynamic_row[slots] == idx
+        else:
+            return slots, None
+        return slots[valid], valid
+
+    def _allocate(self, obj):
+        """Reserve a slot for a new object, growing the slot arrays if none is free"""
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self.objects[slot] = obj
+        else:
+            slot = len(self.objects)
+            self.objects.append(obj)
+            if slot >= len(self._location):
+                self._grow(max(16, 2 * len(self._location)))
+        self._slots[obj.id] = slot
+        self._dynamic_row[slot] = -1
+        return slot
+
+    def _grow(self, capacity):
+        """Resize the per-slot arrays to the given capacity"""
+        n_new = capacity - len(self._location)
+        positions = empty((capacity, 2))
+        positions[:len(self.positions)] = self.positions
+        self.positions = positions
+        self._location = np.concatenate((self._location, np.zeros(n_new, dtype=np.int8)))
+        self._moved_at = np.concatenate((self._moved_at, np.zeros(n_new, dtype=np.int64)))
+        self._dynamic_row = np.concatenate((self._dynamic_row, np.full(n_new, -1, dtype=np.intp)))
+
+    def _merge(self):
+        """Rebuild the static tree from everything that did not move in the last commit, and the dynamic tree"""
+        live = self._location != FREE
+        hot = self._moved_at == self._commits
+        static_slots = np.flatnonzero(live & ~hot)
+        dynamic_slots = np.flatnonzero(live & hot)
+
+        self._location[static_slots] = STATIC
+        self._location[dynamic_slots] = DYNAMIC
+        self._static_slots = static_slots
+        self._static_tree = self._build(static_slots)
+        self._n_static_valid = len(static_slots)
+        self._rebuild_dynamic(dynamic_slots)
+
+    def _rebuild_dynamic(self, dynamic_slots):
+        """Rebuild the dynamic tree at the current positions of the given slots, which empties the buffer"""
+        self._dynamic_row[:] = -1
+        self._dynamic_row[dynamic_slots] = np.arange(len(dynamic_slots))
+        self._dynamic_slots = dynamic_slots
+        self._dynamic_tree = self._build(dynamic_slots)
+        self._n_dynamic = len(dynamic_slots)
+        self._n_dynamic_stale = 0
+        self.slack = 0.
+        self._buffer = set()
+        self._buffer_slots = np.zeros(0, dtype=np.intp)
+        self._buffer_tree = None
+
+    def _build(self, slots):
+        """Build a cKDTree over the positions of the given slots, or None if there are none"""
+        if len(slots) == 0:
+            return None
+        return cKDTree(self.positions[slots])
@@ -1,81 +1,84 @@
-from scipy.spatial import cKDTree
 import numpy as np
 
-from .worker import Worker
 from .ant import Ant
-from .scout import Scout
 from .food import Food
 from .nest import Nest
+from .incremental_kd_tree import IncrementalKDTree
 
-from src.utils import empty
-from src.settings import all_params
-from .world import World
+from src.instrumentation import instrumentation, INDEX_REBUILD
+from .world import World, get_partitions, get_partition_type, rectangle_bounds
 
 class KDTree(World):
-    def __init__(self):
-        self.all_objects = []
-        self.tree = None
+    """
+            A class used to implement the world as a kd-tree (alternative to KdTreeAndDict)
+            It inherits from World class
 
-    def get_k_nearest(self, position, k=1):
-        """ Get k nearest neighbour ants for specific position using kd_tree that uses Euclidean distance.
+            ...
+
+            Attributes
+            ----------
+            trees: dict
+                one IncrementalKDTree per partition class (Nest, Food, Ant), holding the objects of that
+                class. Queries for one class never touch the objects of the others, and a partition whose objects did
+                not change is not rebuilt.
+
+    """
+
+    partition_types = (Nest, Food, Ant)
+
+    def __init__(self, rng=None):
+        """
+        :param rng: (Generator) random generator for the ants of the world, a fresh one if None
+        """
+        super().__init__(rng)
+        self.trees = {partition_type: IncrementalKDTree() for partition_type in self.partition_types}
+
+    def get_k_nearest(self, position, k=1, object_type=None):
+        """ Get k nearest neighbour objects for specific position using kd_tree that uses Euclidean distance.
         :param position: (list) Coordinates of the position of interest
         :param k: (int) Number of nearest neighbours
-        :return point_matrix: (array) ### Add this
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return dists: (array of floats) Distances to the nearest neighbours
+        :return k_nearest_obj: (list) The k nearest objects
         """
-        dists, idx = self.tree.query(position, k, p=2, n_jobs=-1)
-
-        k_nearest_obj = []
-        for i in idx:
-            k_nearest_obj.append(self.all_object[i])
-
-        return dists, k_nearest_obj
-
-    def get_at_position(self, position):
+        dists, objects = [], []
+        for tree, filter_type in self._get_trees(object_type):
+            # Ask for all objects of the partition if it has to be filtered, so the filter cannot drop below k
+            tree_dists, tree_objects = tree.query(position, len(tree) if filter_type else k)
+            for dist, obj in zip(tree_dists, tree_objects):
+                if filter_type is None or isinstance(obj, filter_type):
+                    dists.append(dist)
+                    objects.append(obj)
+
+        order = np.argsort(dists, kind="stable")[:k]
+        return np.array(dists)[order], [objects[i] for i in order]
+
+    def get_at_position(self, position, object_type=None):
         """ Return all the objects (ants/food/nest) in specific position
         :param position: (list) Coordinates of specific position
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return: (list) ALL objects in the given position
         """
-        return_idx = self.tree.query_ball_point(position, r=0)
-        obj_at_pos = []
-        for obj in return_idx:
-            obj_at_pos.append(self.all_objects[obj])
+        return self.get_circular_region(position, 0, object_type)
 
-        return obj_at_pos
-
-    def get_rectangle_region(self, top_left, bottom_right):
+    def get_rectangle_region(self, top_left, bottom_right, object_type=None):
         """ Return all the objects in the given rectangular region
         :param top_left: (list) Coordinates of top left point of the rectangle
         :param bottom_right: (list) Coordinates of bottom right point of the rectangle
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return result: (list) All objects in the specified rectangular region
         """
-        longest_side = max(bottom_right[0] - top_left[0], top_left[1] - bottom_right[1])
-        center = (top_left + bottom_right) / 2
-        large_square_objects = self.get_square_region(center, longest_side)
-
-        x_min = top_left[0]
-        y_min = bottom_right[1]
-        x_max = bottom_right[0]
-        y_max = top_left[1]
-
-        result = []
-        for obj in large_square_objects:
-            if self._is_in_rectangle(obj.position, x_min, x_max, y_min, y_max):
-                result.append(obj)
-        return result
+        lower, upper = rectangle_bounds(top_left, bottom_right)
+        return self._query_trees(object_type, lambda tree: tree.query_rectangle(lower, upper))
 
-    def get_circular_region(self, center, radius):
+    def get_circular_region(self, center, radius, object_type=None):
         """ Return all the objects in the given circular region
         :param center: (list) Coordinates of center of the circle
         :param radius: (int) Radius of the circle
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return result: (list) All objects in the specified circular region
         """
-        position_idx = self.tree.query_ball_point(center, radius, p=2, n_jobs=-1)
-        obj_at_pos = []
-        for i in position_idx:
-            obj_at_pos.append(self.all_objects[i])
-
-        return obj_at_pos
+        return self._query_trees(object_type, lambda tree: tree.query_ball_point(center, radius))
 
     # def get_k_nearest_list(self, position_list, k):
     #     """ Get k nearest neighbour ants for list of positions using kd_tree that uses Euclidean distance.
@@ -102,51 +105,51 @@ class KDTree(World):
     #
     #     return result, dists
 
-    # def get_circular_region_list(self, center_list, radius_list):
-    #     """ Return all the objects in each of the circles of interest
-    #
-    #     :param center_list: (list) Coordinates of the centers of circles of interest
-    #     :param radius_list: (list) Radii of the circles of interest
-    #     :return: (list) All objects in each of the specified circular region
-    #
-    #     """
-    #
-    #     position_idx_list = self.kd_tree.query_ball_point(center_list, radius_list,
-    #                                                       p=2, n_jobs=-1)
-    #     result = []
-    #     for position_idx in position_idx_list:
-    #         positions = self.point_matrix[position_idx]
-    #         sub_result = []
-    #         for position in positions:
-    #             sub_result.extend(self.all_objects.get(tuple(position)))
-    #         result.append(sub_result)
-    #     return result
+    def get_circular_region_list(self, center_list, radius_list, object_type=None):
+        """ Return all the objects in each of the circles of interest
+        :param center_list: (list) Coordinates of the centers of circles of interest
+        :param radius_list: (list) Radii of the circles of interest, or one radius for all of them
+        :param object_type: (type or tuple of types) only return objects of this type, default all
+        :return: (list) All objects in each of the specified circular region
+        """
+        result = [[] for _ in range(len(center_list))]
+        for tree, filter_type in self._get_trees(object_type):
+            for region, tree_region in zip(result, tree.query_ball_point_list(center_list, radius_list)):
+                if filter_type is None:
+                    region.extend(tree_region)
+                else:
+                    region.extend(obj for obj in tree_region if isinstance(obj, filter_type))
+        return result
 
     def update(self):
-        all_obj_new = []
-
-        for obj in self.all_objects:
-            if isinstance(obj, Ant):
-                if isinstance(obj, Scout):
-                    noticeable_objects = self.get_circular_region(
-                        obj.position, radius=all_params.tree_model_params.circular_region_radius_scout)
-
-                elif isinstance(obj, Worker):
-                    noticeable_objects = self.get_circular_region(
-                        obj.position, radius=all_params.tree_model_params.circular_region_radius_worker)
-
-                new_position, new_pheromone = obj.update(noticeable_objects)
-
-                if new_pheromone is not None:
-                    all_obj_new.append(new_pheromone)
-            else:
-                new_position = obj.update()
-
-            if new_position is not None:
-                all_obj_new.append(obj)
-
-        self.all_objects = all_obj_new
-        self._update_tree()
+        """ Update all objects for one iteration. Ants are moved and lay pheromone into the field of their owner,
+        dead objects are staged, and the trees are committed once at the end, so all objects perceive the world as it
+        was at the start of the iteration. The noticeable objects of all ants of a type are looked up with one batched
+        query, and only partitions that actually changed are re-indexed.
+        """
+        ants = list(self.trees[Ant])
+        noticeable_objects = self._get_noticeable_objects(ants)
+
+        dead = self.update_ants(ants, noticeable_objects)
+        dead_ids = {ant.id for ant in dead}
+        with instrumentation.phase(INDEX_REBUILD):
+            for ant in dead:
+                self.trees[Ant].remove(ant)
+                self.release_object(ant)
+            alive = [ant for ant in ants if ant.id not in dead_ids]
+            self.trees[Ant].move_all(alive, self.get_ant_positions(alive))
+
+        for partition_type in (Nest, Food):
+            tree = self.trees[partition_type]
+            for obj in list(tree):
+                if obj.update() is None:
+                    tree.remove(obj)
+                    self.release_object(obj)
+        self.decay_pheromones()
+
+        with instrumentation.phase(INDEX_REBUILD):
+            for tree in self.trees.values():
+                tree.commit()
 
     def create_nests(self, player_list, position_list, size, health):
         """ Create new nest objects with specific owners/positions/size/health and update the tree
@@ -157,27 +160,9 @@ class KDTree(World):
         """
 
         for position, player in zip(position_list, player_list):
-            self.all_objects.append(Nest(position, player, size, health))
-
-        self._update_tree()
+            self.trees[Nest].insert(Nest(position, player, size, health))
 
-    def create_ants(self, nest, ant_type, amount):
-        """ Create new ant objects in a specific nest with the given amount and update the tree
-        :param nest: nest object where new ants should be created
-        :param amount: (int) number of ants that should be created
-        """
-
-        if ant_type == "worker":
-            CorrectAnt = Worker
-        elif ant_type == "scout":
-            CorrectAnt = Scout
-        else:
-            raise ValueError("Incorrect Ant type passed at ant creation.")
-
-        for _ in range(amount):
-            self.all_objects.append(CorrectAnt(nest.owner, nest))
-
-        self._update_tree()
+        self.trees[Nest].commit()
 
     def create_food(self, position_list, size_list):
         """ Create new food objects with specific positions/size and update the tree
@@ -187,65 +172,78 @@ class KDTree(World):
 
         # TODO: compare to extend with food list
         for position, size in zip(position_list, size_list):
-            self.all_objects.append(Food(position, size))
+            self.trees[Food].insert(Food(position, size))
 
-        self._update_tree()
+        self.trees[Food].commit()
+
+    def insert_objects(self, objects):
+        """ Insert game objects that were created outside of the world and update the trees
+        :param objects: (list) the objects, ants need to be stored in the population of this world
+        """
+        for obj in objects:
+            self.trees[get_partition_type(self.partition_types, obj)].insert(obj)
+        for tree in self.trees.values():
+            tree.commit()
+
+    def remove_objects(self, objects):
+        """ Remove game objects from the world, release their handles and update the trees
+        :param objects: (list) the objects
+        """
+        for obj in objects:
+            self.trees[get_partition_type(self.partition_types, obj)].remove(obj)
+            self.release_object(obj)
+        for tree in self.trees.values():
+            tree.commit()
 
     def __iter__(self):
-        return iter(self.all_objects)
+        return iter(self.dump_content())
 
     def __len__(self):
-        return len(self.all_objects)
+        return sum(len(tree) for tree in self.trees.values())
     
     def dump_content(self):
-        return self.all_objects
-    
-    def _update_tree(self):
-        """Update the tree"""
-        all_pos = empty((len(self.all_objects), 2))
-        for i, o in enumerate(self.all_objects):
-            all_pos[i, :] = o.position
-        self.tree = cKDTree(all_pos)
-
-    def get_square_region(self, center, radius):
+        return [obj for tree in self.trees.values() for obj in tree]
+
+    def get_square_region(self, center, radius, object_type=None):
         """ Return all the objects in the given square region
         :param center: (list) Coordinates of center of the square
         :param radius: (int) Radius of the square
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return result: (list) All objects in the specified circular region
         """
 
-        position_idx = self.tree.query_ball_point(center, radius, p=np.inf, n_jobs=-1)
-        obj_in_square = []
-        for i in position_idx:
-            obj_in_square.append(self.all_objects[i])
-
-        return obj_in_square
-
-    def _is_in_rectangle(self, position, x_min, x_max, y_min, y_max):
-        """ Decide whether specific object is in the rectangular area of interest
-        :param position: (list) coordinates of object
-        :param x_min: (int) minimum x coordinate in the rectangle of interest
-        :param x_max: (int) maximum x coordinate in the rectangle of interest
-        :param y_min: (int) minimum y coordinate in the rectangle of interest
-        :param y_max: (int) maximum y coordinate in the rectangle of interest
-        :return: (boolean) TRUE if an ibject is indeed in the specified rectangular area.
-        """
-
-        return x_min <= position[0] <= x_max and y_min <= position[1] <= y_max
+        return self._query_trees(object_type, lambda tree: tree.query_ball_point(center, radius, p=np.inf))
 
     def get_ants(self):
         """ Get all the ant objects
         :return: (list) all the ant objects
         """
-        return self._get_all_from_type(Ant)
+        return list(self.trees[Ant])
 
     def get_nests(self):
         """ Get all the nest objects
         :return: (list) all the nest objects
         """
-        return self._get_all_from_type(Nest)
-
-    def _get_all_from_type(self, type):
-        all_wanted_obj = [obj for obj in self.all_objects if isinstance(obj, type)]
-        return all_wanted_obj
+        return list(self.trees[Nest])
 
+    def _get_trees(self, object_type):
+        """ Find the trees that can hold objects of a type
+        :param object_type: (type or tuple of types) type of the wanted objects, None for all
+        :return: (list) tuples of a tree and the type its objects still have to be filtered by (None if not needed)
+        """
+        return [(self.trees[partition_type], filter_type)
+                for partition_type, filter_type in get_partitions(self.partition_types, object_type)]
+
+    def _query_trees(self, object_type, query):
+        """ Run a query on all partitions that can hold objects of a type and join the results
+        :param object_type: (type or tuple of types) type of the wanted objects, None for all
+        :param query: (function) takes an IncrementalKDTree and returns a list of objects
+        :return: (list) the joined results
+        """
+        result = []
+        for tree, filter_type in self._get_trees(object_type):
+            if filter_type is None:
+                result.extend(query(tree))
+            else:
+                result.extend(obj for obj in query(tree) if isinstance(obj, filter_type))
+        return result
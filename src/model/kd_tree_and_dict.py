@@ -1,186 +1,259 @@
 from scipy.spatial import cKDTree
 import numpy as np
 
-from .worker import Worker
-from .scout import Scout
 from .ant import Ant
 from .food import Food
 from .nest import Nest
-from .world import World
+from .world import World, get_partitions, get_partition_type, rectangle_bounds
 
-from src.utils import array
-from src.settings import all_params
+from src.utils import array, empty
+from src.instrumentation import instrumentation, INDEX_REBUILD
 
 
-class KdTreeAndDict(World):
+class PositionDict:
     """
-            A class used to implement the tree and dictionary in the game (alternative to gird)
-            It inherits from World class
+            A class used to hold the objects of one partition of a KdTreeAndDict, grouped by position, with a
+            cKDTree over the positions
 
             ...
 
             Attributes
             ----------
-            all_objects: dict
-                a dictionary for all the objects in the game
+            objects: dict
+                maps positions (tuples) to the list of objects at that position
             kd_tree: cKDTree
-                a tcKDTree implementation for nearest neighbours
+                tree over the rows of point_matrix, None while the partition is empty
             point_matrix: array
-                an ### Add this
+                one row per key of objects, the rows the tree indices refer to
+            changed: bool
+                whether positions were added or dropped since the tree was built
+
+            Methods
+            -------
+            add(obj, position), remove(obj, position)
+                Add or remove an object, the tree is only rebuilt with the next rebuild()
+
+            rebuild()
+                Rebuild the tree if positions were added or dropped
+
+            objects_at(indices)
+                Return the objects at rows of point_matrix
 
     """
 
     def __init__(self):
-        self.all_objects = {}
+        self.objects = {}
         self.kd_tree = None
-        self.point_matrix = None
+        self.point_matrix = empty((0, 2))
+        self.changed = False
+
+    def __iter__(self):
+        return (obj for objects in self.objects.values() for obj in objects)
+
+    def add(self, obj, position=None):
+        """ Add an object at its position
+
+        :param obj: (GameObject) the object
+        :param position: (tuple) the position of the object, read from it if None
+
+        """
+        if position is None:
+            position = tuple(obj.position)
+        if position not in self.objects:
+            self.objects[position] = []
+            self.changed = True
+        self.objects[position].append(obj)
+
+    def remove(self, obj, position):
+        """ Remove an object and drop its position if nothing else is there
+
+        :param obj: (GameObject) the object
+        :param position: (tuple) the position the object was added at
+
+        """
+        objects = self.objects[position]
+        objects.remove(obj)
+        if not objects:
+            self.objects.pop(position)
+            self.changed = True
+
+    def rebuild(self):
+        if not self.changed:
+            return
+        self.point_matrix = array(list(self.objects)).reshape(-1, 2)
+        self.kd_tree = cKDTree(self.point_matrix) if self.objects else None
+        self.changed = False
+
+    def objects_at(self, indices):
+        return [obj for position in self.point_matrix[indices] for obj in self.objects[tuple(position)]]
+
+
+class KdTreeAndDict(World):
+    """
+            A class used to implement the tree and dictionary in the game (alternative to gird)
+            It inherits from World class
+
+            ...
+
+            Attributes
+            ----------
+            partitions: dict
+                one PositionDict per partition class (Nest, Food, Ant). Queries for one class never touch the objects
+                of the others, and the tree of a partition is only rebuilt when its positions changed.
 
-    def get_k_nearest(self, position, k=1):
-        """ Get k nearest neighbour ants for specific position using kd_tree that uses Euclidean distance.
+    """
+
+    partition_types = (Nest, Food, Ant)
+
+    def __init__(self, rng=None):
+        """
+
+        :param rng: (Generator) random generator for the ants of the world, a fresh one if None
+
+        """
+        super().__init__(rng)
+        self.partitions = {partition_type: PositionDict() for partition_type in self.partition_types}
+
+    def get_k_nearest(self, position, k=1, object_type=None):
+        """ Get the objects at the k nearest occupied positions to a position, using Euclidean distance.
 
         :param position: (list) Coordinates of the position of interest
-        :param k: (int) Number of nearest neighbours
-        :return point_matrix: (array) ### Add this
-        :return dists: (array of floats) Distances to the nearest neighbours
+        :param k: (int) Number of nearest positions
+        :param object_type: (type or tuple of types) only count positions holding objects of this type and only
+                            return these objects, default all
+        :return game_object_list: (list) All objects at the nearest positions
+        :return dists: (array of floats) Distances to the nearest positions
 
         """
-        dists, idx = self.kd_tree.query(position, k, p=2, n_jobs=-1)
-        dict_idxs = self.point_matrix[idx]
-        if k == 1:
-            game_object_list = self.all_objects.get(tuple(dict_idxs), [])
-        else:
-            game_object_list = [obj for idx in dict_idxs for obj in self.all_objects.get(tuple(idx))]
-        return game_object_list, dists
-
-    def get_at_position(self, position):
+        result, dists = self.get_k_nearest_list([position], k, object_type)
+        return result[0], dists[0]
+
+    def get_at_position(self, position, object_type=None):
         """ Return all the objects (ants/food/nest) in specific position
 
         :param position: (list) Coordinates of specific position
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return: (list) ALL objects in the given position
 
         """
-        return self.all_objects.get(tuple(position))
+        position = tuple(position)
+        result = []
+        for partition, filter_type in self._get_partitions(object_type):
+            result.extend(self._filter(partition.objects.get(position, []), filter_type))
+        return result
 
-    def get_rectangle_region(self, top_left, bottom_right):
+    def get_rectangle_region(self, top_left, bottom_right, object_type=None):
         """ Return all the objects in the given rectangular region
 
         :param top_left: (list) Coordinates of top left point of the rectangle
         :param bottom_right: (list) Coordinates of bottom right point of the rectangle
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return result: (list) All objects in the specified rectangular region
 
         """
-        longest_side = max(bottom_right[0] - top_left[0], top_left[1] - bottom_right[1])
-        center = (top_left + bottom_right) / 2
-        large_square_objects = self.get_square_region(center, longest_side)
+        lower, upper = rectangle_bounds(top_left, bottom_right)
 
-        x_min = top_left[0]
-        y_min = bottom_right[1]
-        x_max = bottom_right[0]
-        y_max = top_left[1]
+        def query(partition):
+            positions = partition.point_matrix
+            return np.flatnonzero(np.all((positions >= lower) & (positions <= upper), axis=1))
 
-        result = []
-        for obj in large_square_objects:
-            if self._is_in_rectangle(obj.position, x_min, x_max, y_min, y_max):
-                result.append(obj)
-        return result
+        return self._query_partitions(object_type, query)
 
-    def get_circular_region(self, center, radius):
+    def get_circular_region(self, center, radius, object_type=None):
         """ Return all the objects in the given circular region
 
         :param center: (list) Coordinates of center of the circle
         :param radius: (int) Radius of the circle
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return result: (list) All objects in the specified circular region
 
         """
-        position_idx = self.kd_tree.query_ball_point(center, radius, p=2, n_jobs=-1)
-        positions = self.point_matrix[position_idx]
-        result = []
-        for position in positions:
-            result.extend(self.all_objects.get(tuple(position)))
-        return result
+        return self._query_partitions(object_type,
+                                      lambda partition: partition.kd_tree.query_ball_point(center, radius, p=2))
+
+    def get_k_nearest_list(self, position_list, k, object_type=None):
+        """ Get the objects at the k nearest occupied positions to every position of a list, using Euclidean
+        distance. Every partition is queried once for all positions.
 
-    def get_k_nearest_list(self, position_list, k):
-        """ Get k nearest neighbour ants for list of positions using kd_tree that uses Euclidean distance.
-    
         :param position_list: (list) Coordinates of the positions of interests
-        :param k: (int) Number of nearest neighbours
-        :return result: (list) all nearest neighbours objects
-        :return dists: (array of floats) Distances to the nearest neighbours
-    
+        :param k: (int) Number of nearest positions
+        :param object_type: (type or tuple of types) only count positions holding objects of this type and only
+                            return these objects, default all
+        :return result: (list) all objects at the nearest positions, per position of interest
+        :return dists: (list of arrays) Distances to the nearest positions, per position of interest
+
         """
-    
-        if len(position_list) == 1:
-            return self.get_k_nearest(position_list, k)
-        dists, idx_list = self.kd_tree.query(position_list, k, p=2, n_jobs=-1)
-        result = []
-        for idx in idx_list:
-            if len(idx.shape) == 0:
-                dict_ind = self.point_matrix[idx]
-                result.append(self.all_objects[tuple(dict_ind)])
-            else:
-                dict_ind = self.point_matrix[idx]
-                sub_result = [obj for row in dict_ind for obj in self.all_objects[tuple(row)]]
-                result.append(sub_result)
-    
+        candidates = [[] for _ in range(len(position_list))]
+        for partition, filter_type in self._get_partitions(object_type):
+            if partition.kd_tree is None:
+                continue
+            # Ask for all positions of the partition if it has to be filtered, so the filter cannot drop below k
+            n_positions = len(partition.objects) if filter_type else min(k, len(partition.objects))
+            dists, idx = partition.kd_tree.query(position_list, n_positions, p=2)
+            dists, idx = np.reshape(dists, (len(position_list), -1)), np.reshape(idx, (len(position_list), -1))
+            for row, row_dists, row_positions in zip(candidates, dists, partition.point_matrix[idx]):
+                for dist, position in zip(row_dists, map(tuple, row_positions)):
+                    if self._filter(partition.objects[position], filter_type):
+                        row.append((dist, position))
+
+        result, dists = [], []
+        for row in candidates:
+            # The same position can be occupied in several partitions, it counts once
+            nearest = {}
+            for dist, position in sorted(row, key=lambda candidate: candidate[0]):
+                nearest.setdefault(position, dist)
+            positions = list(nearest)[:k]
+            result.append([obj for position in positions for obj in self.get_at_position(position, object_type)])
+            dists.append(np.array([nearest[position] for position in positions]))
         return result, dists
-    
-    def get_circular_region_list(self, center_list, radius_list):
-        """ Return all the objects in each of the circles of interest
-    
+
+    def get_circular_region_list(self, center_list, radius_list, object_type=None):
+        """ Return all the objects in each of the circles of interest, with one query per partition of the type
+
         :param center_list: (list) Coordinates of the centers of circles of interest
-        :param radius_list: (list) Radii of the circles of interest
+        :param radius_list: (list) Radii of the circles of interest, or one radius for all of them
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return: (list) All objects in each of the specified circular region
-    
+
         """
-    
-        position_idx_list = self.kd_tree.query_ball_point(center_list, radius_list,
-                                                          p=2, n_jobs=-1)
-        result = []
-        for position_idx in position_idx_list:
-            positions = self.point_matrix[position_idx]
-            sub_result = []
-            for position in positions:
-                sub_result.extend(self.all_objects.get(tuple(position)))
-            result.append(sub_result)
+        result = [[] for _ in range(len(center_list))]
+        for partition, filter_type in self._get_partitions(object_type):
+            if partition.kd_tree is None:
+                continue
+            for region, indices in zip(result, partition.kd_tree.query_ball_point(center_list, radius_list, p=2)):
+                region.extend(self._filter(partition.objects_at(indices), filter_type))
         return result
 
-    # @timing # TODO: check in real game how much time is needed
     def update(self):
-        """ Update the positions of all ants after their movement in one iteration and remove the previous positions"""
-        all_lists = list(self.all_objects.values())
-        for listy in all_lists:
-            for item in listy:
-                old_position = tuple(item.position)
-
-                if isinstance(item, Ant):
-                    # TODO: pick radius (or implement it in ant class)
-                    if isinstance(item, Scout):
-                        radius = all_params.tree_model_params.circular_region_radius_scout
-                    elif isinstance(item, Worker):
-                        radius = all_params.tree_model_params.circular_region_radius_worker
-
-                    noticeable_objects = self.get_circular_region(item.position, radius=radius)
-                    new_position, new_pheromone = item.update(noticeable_objects)
-
-                    # Only handle if new pheromone object needs to be created.
-                    if new_pheromone is not None:
-                        pheromone_pos = tuple(new_pheromone.position)
-                        self.all_objects.setdefault(pheromone_pos, []).append(new_pheromone)
-
-                else:
-                    new_position = item.update()
-
-                # Remove old positions.
-                self.all_objects[old_position].remove(item)
-
-                if self.all_objects[old_position] is []:
-                    self.all_objects.pop(old_position)
-
-                # Save new positions if object did not die.
-                # TODO: deaths of objects
-                if new_position is not None:
-                    self.all_objects.setdefault(tuple(new_position), []).append(item)
-        self._update_tree()
+        """ Update the positions of all ants after their movement in one iteration and remove the previous positions.
+        Ants lay pheromone into the field of their owner, which decays once all objects were updated.
+        The noticeable objects of all ants of a type are looked up with one batched query, and only partitions whose
+        positions changed are re-indexed."""
+        ant_partition = self.partitions[Ant]
+        ants = list(ant_partition)
+        noticeable_objects = self._get_noticeable_objects(ants)
+
+        old_positions = self.get_ant_positions(ants).tolist()
+        dead = self.update_ants(ants, noticeable_objects)
+        dead_ids = {ant.id for ant in dead}
+        new_positions = self.get_ant_positions(ants).tolist()
+        for ant, old_position, new_position in zip(ants, old_positions, new_positions):
+            ant_partition.remove(ant, tuple(old_position))
+            if ant.id in dead_ids:
+                self.release_object(ant)
+            else:
+                ant_partition.add(ant, tuple(new_position))
+
+        for partition_type in (Nest, Food):
+            partition = self.partitions[partition_type]
+            for obj in list(partition):
+                # Nests and food do not move, they are only removed once they are used up
+                if obj.update() is None:
+                    partition.remove(obj, tuple(obj.position))
+                    self.release_object(obj)
+        self.decay_pheromones()
+        with instrumentation.phase(INDEX_REBUILD):
+            self._update_tree()
 
     def create_nests(self, player_list, position_list, size, health):
         """ Create new nest objects with specific owners/positions/size/health and update the tree
@@ -193,28 +266,7 @@ class KdTreeAndDict(World):
         """
 
         for position, player in zip(position_list, player_list):
-            self.all_objects.setdefault(tuple(position), []).append(Nest(position, player, size, health))
-        self._update_tree()
-
-    def create_ants(self, nest, ant_type, amount):
-        """ Create new ant objects in a specific nest with the given amount and update the tree
-
-        :param nest: nest object where new ants should be created
-        :param amount: (int) number of ants that should be created
-
-        """
-
-        if ant_type == "worker":
-            CorrectAnt = Worker
-        elif ant_type == "scout":
-            CorrectAnt = Scout
-        else:
-            raise ValueError("Incorrect Ant type passed at ant creation.")
-
-        player = nest.owner
-        position = nest.position
-        for _ in range(amount):
-            self.all_objects.setdefault(tuple(position), []).append(CorrectAnt(player, nest))
+            self.partitions[Nest].add(Nest(position, player, size, health))
         self._update_tree()
 
     def create_food(self, position_list, size_list):
@@ -227,64 +279,63 @@ class KdTreeAndDict(World):
 
         # TODO: compare to extend with food list
         for position, size in zip(position_list, size_list):
-            self.all_objects.setdefault(tuple(position), []).append(Food(position, size))
+            self.partitions[Food].add(Food(position, size))
+        self._update_tree()
+
+    def insert_objects(self, objects):
+        """ Insert game objects that were created outside of the world and update the tree
+
+        :param objects: (list) the objects, ants need to be stored in the population of this world
+
+        """
+        for obj in objects:
+            self.partitions[get_partition_type(self.partition_types, obj)].add(obj)
+        self._update_tree()
+
+    def remove_objects(self, objects):
+        """ Remove game objects from the world, release their handles and update the tree
+
+        :param objects: (list) the objects
+
+        """
+        for obj in objects:
+            self.partitions[get_partition_type(self.partition_types, obj)].remove(obj, tuple(obj.position))
+            self.release_object(obj)
         self._update_tree()
 
     def dump_content(self):
-        everything = list(self.all_objects.values())
-        flat_everything = [obj for listy in everything for obj in listy]
-        return flat_everything
+        return [obj for partition in self.partitions.values() for obj in partition]
 
     def __iter__(self):
         """
         For iterating over the tree.
         :return: iterator of all objects currently saved in tree
         """
-        flatten = lambda l: [item for sublist in l for item in sublist]
-        return iter(flatten(list(self.all_objects.values())))
+        return iter(self.dump_content())
 
     def __len__(self):
         """
         :return: number of objects that are in the tree
         """
-        flatten = lambda l: [item for sublist in l for item in sublist]
-        return len(flatten(list(self.all_objects.values())))
+        return sum(len(objects) for partition in self.partitions.values() for objects in partition.objects.values())
 
     def _update_tree(self):
-        """Update the tree"""
-        keys = list(self.all_objects.keys())
-        self.point_matrix = array(keys)
-        self.kd_tree = cKDTree(self.point_matrix)
+        """Rebuild the trees of the partitions whose positions changed"""
+        for partition in self.partitions.values():
+            partition.rebuild()
 
-    def get_square_region(self, center, radius):
+    def get_square_region(self, center, radius, object_type=None):
         """ Return all the objects in the given square region
 
         :param center: (list) Coordinates of center of the square
         :param radius: (int) Radius of the square
+        :param object_type: (type or tuple of types) only return objects of this type, default all
         :return result: (list) All objects in the specified circular region
 
         """
 
-        position_idx = self.kd_tree.query_ball_point(center, radius, p=np.inf, n_jobs=-1)
-        positions = self.point_matrix[position_idx]
-        result = []
-        for position in positions:
-            result.extend(self.all_objects.get(tuple(position)))
-        return result
-
-    def _is_in_rectangle(self, position, x_min, x_max, y_min, y_max):
-        """ Decide whether specific object is in the rectangular area of interest
-
-        :param position: (list) coordinates of object
-        :param x_min: (int) minimum x coordinate in the rectangle of interest
-        :param x_max: (int) maximum x coordinate in the rectangle of interest
-        :param y_min: (int) minimum y coordinate in the rectangle of interest
-        :param y_max: (int) maximum y coordinate in the rectangle of interest
-        :return: (boolean) TRUE if an ibject is indeed in the specified rectangular area.
-
-        """
-
-        return x_min <= position[0] <= x_max and y_min <= position[1] <= y_max
+        return self._query_partitions(object_type,
+                                      lambda partition: partition.kd_tree.query_ball_point(center, radius, p=np.inf))
 
     def get_ants(self):
         """ Get all the ant objects
@@ -293,15 +344,48 @@ class KdTreeAndDict(World):
 
         """
 
-        everything = self.dump_content()
-        ants = [obj for obj in everything if isinstance(obj, Ant)]
-        return ants
+        return list(self.partitions[Ant])
 
     def get_nests(self):
         """ Get all the nest objects
 
         :return: (list) all the nest objects
         """
-        everything = self.dump_content()
-        nests = [obj for obj in everything if type(obj) is Nest]
-        return nests
+        return list(self.partitions[Nest])
+
+    def _get_partitions(self, object_type):
+        """ Find the partitions that can hold objects of a type
+
+        :param object_type: (type or tuple of types) type of the wanted objects, None for all
+        :return: (list) tuples of a PositionDict and the type its objects still have to be filtered by (None if not
+                 needed)
+
+        """
+        return [(self.partitions[partition_type], filter_type)
+                for partition_type, filter_type in get_partitions(self.partition_types, object_type)]
+
+    def _query_partitions(self, object_type, query):
+        """ Run a query on all non-empty partitions that can hold objects of a type and join the results
+
+        :param object_type: (type or tuple of types) type of the wanted objects, None for all
+        :param query: (function) takes a PositionDict and returns indices of rows of its point matrix
+        :return: (list) the objects at the found positions
+
+        """
+        result = []
+        for partition, filter_type in self._get_partitions(object_type):
+            if partition.kd_tree is not None:
+                result.extend(self._filter(partition.objects_at(query(partition)), filter_type))
+        return result
+
+    def _filter(self, objects, object_type):
+        """ Keep only the objects of a type
+
+        :param objects: (list) objects to be filtered
+        :param object_type: (type or tuple of types) type of the wanted objects, None for all
+        :return: (list) the objects of the wanted type
+
+        """
+        if object_type is None:
+            return objects
+        return [obj for obj in objects if isinstance(obj, object_type)]
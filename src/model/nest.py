@@ -26,6 +26,8 @@ class Nest(GameObject):
 
     """
 
+    __slots__ = ("position", "owner", "size", "health", "food", "ant_ids")
+
     def __init__(self, position, player, size, health):
         """
 
@@ -0,0 +1,175 @@
+"""
+Checkpoints of a whole GameState in one .npz file. Every kind of object is stored as a set of columns (one array per
+attribute, one row per object) next to a small JSON header with the players, the settings of the game and the state of
+its random generators, so saving and loading are bulk array copies instead of pickling object by object.
+
+A TiledGameState is saved with the same layout, the columns of all tiles are joined into one file, and it is loaded
+as a GameState with a single world.
+"""
+import json
+
+import numpy as np
+
+from .ant_population import WORKER, SCOUT
+from .food import Food
+from .nest import Nest
+from .pheromone_field import PheromoneField
+from .player import Player
+from .scout import Scout
+from .worker import Worker
+
+# Version of the file layout, increase it when the layout changes
+FORMAT_VERSION = 1
+
+ant_types = {WORKER: Worker, SCOUT: Scout}
+
+
+def object_columns(population, players, nests, foods, ants, nest_index):
+    """ Collect the columns of the objects of a world
+
+    :param population: (AntPopulation) the population the ants are stored in
+    :param players: (dict) maps players to their index
+    :param nests: (list) the nests to store
+    :param foods: (list) the food to store
+    :param ants: (list) the ants to store
+    :param nest_index: (dict) maps handles of nests to the row the homes of the ants refer to
+    :return: (dict) one array per column
+
+    """
+    columns = {}
+    columns["nest_position"] = np.array([nest.position for nest in nests]).reshape(-1, 2)
+    columns["nest_owner"] = np.array([players[nest.owner] for nest in nests], dtype=np.intp)
+    for name in ("size", "health", "food"):
+        columns["nest_" + name] = np.array([getattr(nest, name) for nest in nests], dtype=float)
+
+    columns["food_position"] = np.array([food.position for food in foods]).reshape(-1, 2)
+    columns["food_size"] = np.array([food.size for food in foods], dtype=float)
+
+    slots = np.array([ant.slot for ant in ants], dtype=np.intp)
+    columns["ant_kind"] = population.kind[slots]
+    columns["ant_owner"] = np.array([players[ant.owner] for ant in ants], dtype=np.intp)
+    homes = np.array([nest_index[nest.id] for nest in population.nests], dtype=np.intp)
+    columns["ant_home"] = homes[population.home[slots]]
+    for name in population.vector_columns + population.scalar_columns:
+        columns["ant_" + name] = getattr(population, name)[slots]
+    return columns
+
+
+def pheromone_columns(fields):
+    """ Collect the marked cells of pheromone fields, trails cover a small part of a field
+
+    :param fields: (list) (owner index, current strengths of all cells, cell size) per field
+    :return: (dict) the columns of the cells
+    :return: (list) the header of every field
+
+    """
+    columns, headers = {}, []
+    for i, (owner, strengths, cell_size) in enumerate(fields):
+        cells = np.flatnonzero(strengths)
+        columns["pheromone_cells_{}".format(i)] = cells
+        columns["pheromone_strengths_{}".format(i)] = strengths.reshape(-1)[cells]
+        headers.append({"owner": owner, "shape": list(strengths.shape), "cell_size": cell_size})
+    return columns, headers
+
+
+def write_game_state(path, game_state, world_type, columns, fields, ant_rng_state):
+    """ Write the columns of a game and its header to a file
+
+    :param path: (str) the file, .npz is appended if it has another suffix
+    :param game_state: (GameState) the game, for its players, tick and random generators
+    :param world_type: (string) name of the World implementation, see game_state.world_types
+    :param columns: (dict) columns of the objects, see object_columns
+    :param fields: (list) (owner index, current strengths of all cells, cell size) per pheromone field
+    :param ant_rng_state: (dict) state of the random generator of the ants
+
+    """
+    field_columns, field_headers = pheromone_columns(fields)
+    sequence = game_state.seed_sequence
+    header = {
+        "version": FORMAT_VERSION,
+        "world_type": world_type,
+        "tick": game_state.tick,
+        "players": [{"name": player.name, "color": list(player.color)} for player in game_state.players],
+        "pheromone_fields": field_headers,
+        "seed_sequence": {"entropy": sequence.entropy, "spawn_key": list(sequence.spawn_key),
+                          "n_children_spawned": sequence.n_children_spawned},
+        "rng": game_state.rng.bit_generator.state,
+        "ant_rng": ant_rng_state,
+    }
+    np.savez(path, header=np.array(json.dumps(header)), **columns, **field_columns)
+
+
+def save_game_state(game_state, path):
+    """ Write a game to a file
+
+    :param game_state: (GameState) the game
+    :param path: (str) the file, .npz is appended if it has another suffix
+
+    """
+    from .game_state import world_types
+
+    world = game_state.world
+    players = {player: i for i, player in enumerate(game_state.players)}
+    nests = world.get_nests()
+    foods = [obj for obj in world if isinstance(obj, Food)]
+    columns = object_columns(world.population, players, nests, foods, world.get_ants(),
+                             {nest.id: i for i, nest in enumerate(nests)})
+    fields = [(players[player], field.get_strengths(), field.cell_size)
+              for player, field in world.pheromone_fields.items()]
+    world_type = next(name for name, world_type in world_types.items() if type(world) is world_type)
+    write_game_state(path, game_state, world_type, columns, fields, world.population.rng.bit_generator.state)
+
+
+def load_game_state(path):
+    """ Read a game written by save_game_state
+
+    :param path: (str) the file
+    :return: (GameState) the game. With the kd_tree and spatial_hash worlds it goes on exactly like the saved one
+             would have, kd_tree_and_dict visits objects in another order after loading.
+
+    """
+    from .game_state import GameState
+
+    with np.load(path) as data:
+        header = json.loads(str(data["header"]))
+        if header["version"] != FORMAT_VERSION:
+            message = "Cannot read game files of version {}, expected {}."
+            raise ValueError(message.format(header["version"], FORMAT_VERSION))
+        columns = {name: data[name] for name in data.files if name != "header"}
+
+    players = [Player(player["name"], tuple(player["color"])) for player in header["players"]]
+    sequence = header["seed_sequence"]
+    game_state = GameState(players, header["world_type"], create_objects=False)
+    game_state.seed_sequence = np.random.SeedSequence(sequence["entropy"], spawn_key=tuple(sequence["spawn_key"]),
+                                                      n_children_spawned=sequence["n_children_spawned"])
+    game_state.tick = header["tick"]
+    game_state.rng.bit_generator.state = header["rng"]
+    world = game_state.world
+    population = world.population
+    population.rng.bit_generator.state = header["ant_rng"]
+
+    nests = []
+    for position, owner, size, health, food in zip(columns["nest_position"], columns["nest_owner"],
+                                                   columns["nest_size"], columns["nest_health"],
+                                                   columns["nest_food"]):
+        nest = Nest(position, players[owner], size.item(), health.item())
+        nest.food = food.item()
+        nests.append(nest)
+    foods = [Food(position, size.item()) for position, size in zip(columns["food_position"], columns["food_size"])]
+
+    population.reserve(len(columns["ant_kind"]))
+    ants = [ant_types[kind](players[owner], nests[home], population=population)
+            for kind, owner, home in zip(columns["ant_kind"], columns["ant_owner"], columns["ant_home"])]
+    slots = np.array([ant.slot for ant in ants], dtype=np.intp)
+    for name in population.vector_columns + population.scalar_columns:
+        getattr(population, name)[slots] = columns["ant_" + name]
+    world.insert_objects(nests + foods + ants)
+
+    for i, field_header in enumerate(header["pheromone_fields"]):
+        player = players[field_header["owner"]]
+        size = field_header["shape"][0] * field_header["cell_size"]
+        field = world.pheromone_fields[player] = PheromoneField(player, size, field_header["cell_size"])
+        strengths = np.zeros(field.grid.size, dtype=field.grid.dtype)
+        strengths[columns["pheromone_cells_{}".format(i)]] = columns["pheromone_strengths_{}".format(i)]
+        field.write_window(field.window(np.full(2, -np.inf), np.full(2, np.inf)), strengths.reshape(field.grid.shape))
+    return game_state
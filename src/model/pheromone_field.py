@@ -0,0 +1,279 @@
+from itertools import count
+import heapq
+
+import numpy as np
+
+from src.utils import zeros, dtype
+from src.settings import all_params
+
+
+class PheromoneField:
+    """
+            A class used to represent the pheromone trails of one player as a dense grid
+            Every cell holds the summed strength of all pheromone laid inside it. Laying and reading pheromone are
+            array operations on the grid, so the cost does not depend on how long the trails are.
+
+            Decay is applied lazily: all cells decay by the same factor per tick, so the grid stores strengths as of
+            a base tick and reads multiply them by decay_factor ** (tick - base tick). A tick only touches the grid
+            when this factor gets too small (then the grid is rebased) and for the cells that become too weak, which
+            are found with a min-heap of the ticks at which cells expire.
+
+            ...
+
+            Attributes
+            ----------
+            owner: Player
+                Player whose ants lay and follow this pheromone
+            grid: array
+                pheromone strength per cell as of the base tick, indexed by [column, row] counted from the bottom
+                left corner. Use get_strengths() for the current strengths.
+            origin: array
+                coordinates of the bottom left corner of the grid
+            cell_size: float
+                side length of a cell
+            tick: int
+                number of iterations the field decayed for
+
+            Methods
+            -------
+            deposit(positions, strengths)
+                Add pheromone at the given positions
+
+            sample(positions)
+                Return the pheromone strength at the given positions
+
+            get_circular_region(center, radius), get_circular_region_list(center_list, radius)
+                Return the cells with pheromone around one or several positions
+
+            decay_all()
+                Decay the pheromone in all cells for one iteration
+
+            get_strengths()
+                Return the current strength of all cells
+
+            window(bottom_left, top_right), read_window(window), write_window(window, strengths)
+                Copy the cells of a rectangle, e.g. between the fields of neighbouring tiles of a world
+
+    """
+
+    # The grid is rebased once reading it needs a smaller factor than this
+    min_scale = 1e-6
+    # Cells read at once by get_circular_region_list, bounds its memory for many centers
+    max_window_cells = 1 << 20
+
+    def __init__(self, owner, size=None, cell_size=None):
+        """
+
+        :param owner: (Player) Player whose ants use this field
+        :param size: (float) side length of the square area covered by the field, centered at the origin
+        :param cell_size: (float) side length of a cell
+
+        """
+        if size is None:
+            size = all_params.pheromone_model_params.field_size
+        if cell_size is None:
+            cell_size = all_params.pheromone_model_params.field_cell_size
+        self.owner = owner
+        self.cell_size = cell_size
+        self.origin = np.array([-size / 2, -size / 2])
+        n_cells = int(np.ceil(size / cell_size))
+        self.grid = zeros((n_cells, n_cells))
+
+        self.tick = 0
+        self._base_tick = 0
+        # heap of (expiry tick, insertion number, flat indices of the cells that may expire at that tick)
+        self._expiry = []
+        self._counter = count()
+
+    def __str__(self):
+        return "Pheromone field of player {} with {} marked cells".format(self.owner, np.count_nonzero(self.grid))
+
+    def deposit(self, positions, strengths):
+        """ Add pheromone at the given positions. Pheromone laid outside of the field is lost.
+
+        :param positions: (array) coordinates of one position or one position per row
+        :param strengths: (float or array) strength to be added, shared or one per position
+
+        """
+        if np.any(np.asarray(strengths) <= 0):
+            raise ValueError('This function should not be used to decrease pheromone strength (or leave it unchanged)')
+        positions = np.asarray(positions).reshape(-1, 2)
+        strengths = np.broadcast_to(np.asarray(strengths, dtype=dtype), (len(positions),))
+        columns, rows, inside = self._cells(positions)
+        cells = np.ravel_multi_index((columns[inside], rows[inside]), self.grid.shape)
+        np.add.at(self.grid.reshape(-1), cells, strengths[inside] / self._scale())
+        self._schedule_expiry(np.unique(cells))
+
+    def sample(self, positions):
+        """ Return the pheromone strength at the given positions, zero outside of the field
+
+        :param positions: (array) coordinates of one position or one position per row
+        :return: (array) strength of the cell of every position
+
+        """
+        positions = np.asarray(positions).reshape(-1, 2)
+        columns, rows, inside = self._cells(positions)
+        strengths = zeros(len(positions))
+        strengths[inside] = self.grid[columns[inside], rows[inside]] * self._scale()
+        return strengths
+
+    def get_circular_region(self, center, radius):
+        """ Return all cells with pheromone whose center lies in the given circular region
+
+        :param center: (array) Coordinates of center of the circle
+        :param radius: (float) Radius of the circle
+        :return positions: (array) coordinates of the centers of the cells, one per row
+        :return strengths: (array) pheromone strength of the cells
+
+        """
+        n_columns, n_rows = self.grid.shape
+        low = np.floor((np.asarray(center) - radius - self.origin) / self.cell_size).astype(int)
+        high = np.floor((np.asarray(center) + radius - self.origin) / self.cell_size).astype(int) + 1
+        low = np.clip(low, 0, (n_columns, n_rows))
+        high = np.clip(high, 0, (n_columns, n_rows))
+
+        window = self.grid[low[0]:high[0], low[1]:high[1]]
+        columns, rows = np.nonzero(window)
+        positions = self.origin + (np.stack((columns + low[0], rows + low[1]), axis=1) + 0.5) * self.cell_size
+        inside = np.sum((positions - center) ** 2, axis=1) <= radius ** 2
+        return positions[inside].astype(dtype), window[columns[inside], rows[inside]] * self._scale()
+
+    def get_circular_region_list(self, center_list, radius):
+        """ Return the cells with pheromone in each of several circular regions, answering all of them at once.
+        The cells of every region come in the same order as from get_circular_region.
+
+        :param center_list: (array) Coordinates of the centers of the circles, one per row
+        :param radius: (float) Radius of the circles
+        :return offsets: (array of ints) the cells of center i are positions[offsets[i]:offsets[i + 1]]
+        :return positions: (array) coordinates of the centers of the cells, one per row
+        :return strengths: (array) pheromone strength of the cells
+
+        """
+        center_list = np.asarray(center_list).reshape(-1, 2)
+        n_columns, n_rows = self.grid.shape
+        # Every center reads the same square window of cells around it as get_circular_region, so the cost depends
+        # on the number of centers and the radius but not on the size of the field or the length of the trails
+        span = int(np.ceil(2 * radius / self.cell_size)) + 1
+        steps = np.arange(span)
+        low = np.floor((center_list - radius - self.origin) / self.cell_size).astype(np.intp)
+        flat_grid = self.grid.reshape(-1)
+
+        counts, positions, strengths = [], [], []
+        chunk = max(1, self.max_window_cells // (span * span))
+        for start in range(0, len(center_list), chunk):
+            chunk_low = low[start:start + chunk]
+            columns = chunk_low[:, 0, None, None] + steps[None, :, None]
+            rows = chunk_low[:, 1, None, None] + steps[None, None, :]
+            inside = (columns >= 0) & (columns < n_columns) & (rows >= 0) & (rows < n_rows)
+            values = np.take(flat_grid, columns * n_rows + rows, mode="clip")
+            centers, column_steps, row_steps = np.nonzero(inside & (values != 0))
+
+            cells = np.stack((chunk_low[centers, 0] + column_steps, chunk_low[centers, 1] + row_steps), axis=1)
+            cell_positions = self.origin + (cells + 0.5) * self.cell_size
+            in_circle = np.sum((cell_positions - center_list[start + centers]) ** 2, axis=1) <= radius ** 2
+            counts.append(np.bincount(centers[in_circle], minlength=len(chunk_low)))
+            positions.append(cell_positions[in_circle])
+            strengths.append(values[centers[in_circle], column_steps[in_circle], row_steps[in_circle]])
+
+        offsets = np.zeros(len(center_list) + 1, dtype=np.intp)
+        if len(center_list) == 0:
+            return offsets, zeros((0, 2)), zeros(0)
+        np.cumsum(np.concatenate(counts), out=offsets[1:])
+        return offsets, np.concatenate(positions).astype(dtype), np.concatenate(strengths) * self._scale()
+
+    def decay_all(self):
+        """ Decay the pheromone of all cells for one iteration and clear cells that became too weak """
+        self.tick += 1
+        if self._scale() < self.min_scale:
+            self.grid *= self._scale()
+            self._base_tick = self.tick
+
+        due = []
+        while self._expiry and self._expiry[0][0] <= self.tick:
+            due.append(heapq.heappop(self._expiry)[2])
+        if due:
+            # Cells that got more pheromone since they were scheduled are scheduled again
+            cells = np.unique(np.concatenate(due))
+            strengths = self.grid.reshape(-1)[cells] * self._scale()
+            expired = strengths <= all_params.pheromone_model_params.min_strength
+            self.grid.reshape(-1)[cells[expired]] = 0.
+            self._schedule_expiry(cells[~expired])
+
+    def get_strengths(self):
+        """ Return the current pheromone strength of all cells
+
+        :return: (array) strength per cell, indexed like grid
+
+        """
+        return self.grid * self._scale()
+
+    def window(self, bottom_left, top_right):
+        """ Return the index ranges of the cells whose centers lie in a rectangle, clipped to the field
+
+        :param bottom_left: (array) coordinates of the bottom left corner, may be -inf
+        :param top_right: (array) coordinates of the top right corner, may be inf
+        :return: (tuple) slices of the columns and the rows, to index grid or get_strengths() with
+
+        """
+        shape = np.array(self.grid.shape)
+        low = np.ceil((np.asarray(bottom_left) - self.origin) / self.cell_size - 0.5)
+        high = np.ceil((np.asarray(top_right) - self.origin) / self.cell_size - 0.5)
+        low = np.clip(np.nan_to_num(low, posinf=shape, neginf=0), 0, shape).astype(int)
+        high = np.clip(np.nan_to_num(high, posinf=shape, neginf=0), 0, shape).astype(int)
+        return slice(low[0], max(low[0], high[0])), slice(low[1], max(low[1], high[1]))
+
+    def read_window(self, window):
+        """ Return the current strengths of the cells of a window
+
+        :param window: (tuple) slices returned by window
+        :return: (array) strengths indexed like grid[window]
+
+        """
+        return self.grid[window] * self._scale()
+
+    def write_window(self, window, strengths):
+        """ Overwrite the cells of a window with the given strengths
+
+        :param window: (tuple) slices returned by window
+        :param strengths: (array) current strengths, shaped like grid[window]
+
+        """
+        self.grid[window] = strengths / self._scale()
+        columns, rows = np.nonzero(strengths)
+        cells = np.ravel_multi_index((columns + window[0].start, rows + window[1].start), self.grid.shape)
+        self._schedule_expiry(cells)
+
+    def _scale(self):
+        """Factor from the strengths stored in the grid to the current strengths"""
+        return all_params.pheromone_model_params.decay_factor ** (self.tick - self._base_tick)
+
+    def _schedule_expiry(self, cells):
+        """ Push the ticks at which cells will have decayed below the minimum strength onto the expiry heap
+
+        :param cells: (array of ints) flat indices of the cells
+
+        """
+        if len(cells) == 0:
+            return
+        params = all_params.pheromone_model_params
+        strengths = self.grid.reshape(-1)[cells] * self._scale()
+        with np.errstate(divide='ignore'):
+            ticks_left = np.ceil(np.log(params.min_strength / strengths) / np.log(params.decay_factor))
+        expiry = self.tick + np.maximum(ticks_left, 1).astype(np.int64)
+        for tick in np.unique(expiry):
+            heapq.heappush(self._expiry, (int(tick), next(self._counter), cells[expiry == tick]))
+
+    def _cells(self, positions):
+        """ Find the cells of positions
+
+        :param positions: (array) one position per row
+        :return columns: (array of ints) column of every position
+        :return rows: (array of ints) row of every position
+        :return inside: (array of bools) whether a position lies inside the field
+
+        """
+        cells = np.floor((positions - self.origin) / self.cell_size).astype(int)
+        columns, rows = cells[:, 0], cells[:, 1]
+        n_columns, n_rows = self.grid.shape
+        inside = (columns >= 0) & (columns < n_columns) & (rows >= 0) & (rows < n_rows)
+        return columns, rows, inside
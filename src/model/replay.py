@@ -0,0 +1,312 @@
+"""
+Recordings of games, to look at long runs again without simulating them again. A recording is a directory of files
+that are only ever appended to: every tick adds the objects spawned and removed since the previous tick and the
+position and state columns of all objects, and every keyframe_interval ticks the full list of objects. A
+ReplayReader maps the files into memory and rebuilds any tick from the keyframe before it, so seeking does not depend
+on the length of the recording.
+"""
+import json
+import os
+
+import numpy as np
+
+from .food import Food
+from .nest import Nest
+from .player import Player
+from .scout import Scout
+from .snapshot import ObjectSnapshot, Snapshot, snapshot_object
+from .worker import Worker
+from src.settings import all_params
+
+# Version of the file layout, increase it when the layout changes
+FORMAT_VERSION = 1
+
+object_types = [Nest, Food, Worker, Scout]
+type_codes = {object_type: code for code, object_type in enumerate(object_types)}
+
+# Identity of an object, owner is the index of the player or -1
+ENTITY = np.dtype([("id", "<i8"), ("type", "i1"), ("owner", "<i2")])
+# One row of float32 per object and tick, attributes an object does not have are nan
+STATE_COLUMNS = ("x", "y", "direction_x", "direction_y", "has_food", "energy", "size", "health")
+# One row of int64 per tick, offsets and counts are in rows of the other files
+INDEX_COLUMNS = ("tick", "state_offset", "n_objects", "spawn_offset", "n_spawned", "removal_offset", "n_removed",
+                 "keyframe_offset")
+TICK, STATE_OFFSET, N_OBJECTS, SPAWN_OFFSET, N_SPAWNED, REMOVAL_OFFSET, N_REMOVED, KEYFRAME_OFFSET = range(8)
+
+META_FILE = "meta.json"
+# The index is the last file, it is flushed after the others
+files = {"states": np.dtype("<f4"), "spawns": ENTITY, "removals": np.dtype("<i8"), "keyframes": ENTITY,
+         "index": np.dtype("<i8")}
+
+
+def _state_row(snapshot):
+    """Row of the state columns of an ObjectSnapshot"""
+    direction = (np.nan, np.nan) if snapshot.direction is None else snapshot.direction
+    return (snapshot.position[0], snapshot.position[1], direction[0], direction[1],
+            np.nan if snapshot.has_food is None else snapshot.has_food,
+            np.nan if snapshot.energy is None else snapshot.energy,
+            np.nan if snapshot.size is None else snapshot.size,
+            np.nan if snapshot.health is None else snapshot.health)
+
+
+def _optional(values):
+    """List of the values of a column with None for nan"""
+    return [None if value != value else value for value in values.tolist()]
+
+
+class ReplayWriter:
+    """
+            A class used to record a game tick by tick into a directory.
+
+            ...
+
+            Attributes
+            ----------
+            path: str
+                the directory of the recording
+            players: list
+                the players of the game, objects are stored with the index of their owner
+            keyframe_interval: int
+                number of ticks from one keyframe to the next
+            n_frames: int
+                number of ticks recorded so far
+
+            Methods
+            -------
+            append(tick, objects)
+                Record the objects of the game after a tick
+
+            close()
+                Close the files, the recording can not be appended to afterwards
+
+    """
+
+    def __init__(self, path, players, keyframe_interval=None):
+        """
+        :param path: (str) directory to write the recording to, it is created and must not contain another recording
+        :param players: (list) the players of the game
+        :param keyframe_interval: (int) ticks from one keyframe to the next, default from the model parameters
+        """
+        if keyframe_interval is None:
+            keyframe_interval = all_params.model_params.replay_keyframe_interval
+        self.path = path
+        self.players = list(players)
+        self.keyframe_interval = keyframe_interval
+        self.n_frames = 0
+        # By name, the objects of a TiledGameState come from other processes with copies of the players
+        self._player_index = {player.name: i for i, player in enumerate(self.players)}
+        self._entities = np.empty(0, dtype=ENTITY)
+        self._rows = dict.fromkeys(files, 0)
+
+        os.makedirs(path, exist_ok=True)
+        meta = {
+            "version": FORMAT_VERSION,
+            "keyframe_interval": keyframe_interval,
+            "players": [{"name": player.name, "color": list(player.color)} for player in self.players],
+            "object_types": [object_type.__name__ for object_type in object_types],
+            "state_columns": list(STATE_COLUMNS),
+            "index_columns": list(INDEX_COLUMNS),
+        }
+        with open(os.path.join(path, META_FILE), "x") as file:
+            json.dump(meta, file)
+        self._files = {name: open(os.path.join(path, name + ".bin"), "ab") for name in files}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _entity(self, snapshot):
+        """Identity row of an ObjectSnapshot"""
+        if snapshot.type not in type_codes:
+            raise ValueError("Objects of type {} can not be recorded.".format(snapshot.type.__name__))
+        owner = -1 if snapshot.owner is None else self._player_index[snapshot.owner.name]
+        return snapshot.id, type_codes[snapshot.type], owner
+
+    def _write(self, name, rows):
+        """Append rows to one of the files and return the offset of the first one"""
+        offset = self._rows[name]
+        self._files[name].write(np.ascontiguousarray(rows, dtype=files[name]).tobytes())
+        self._rows[name] += len(rows)
+        return offset
+
+    def append(self, tick, objects):
+        """ Record the objects of the game after a tick
+
+        :param tick: (int) number of the tick, larger than the one of the last call
+        :param objects: (iterable) the game objects or ObjectSnapshots
+        :return:
+
+        """
+        snapshots = [snapshot_object(obj) for obj in objects]
+        ids = np.array([snapshot.id for snapshot in snapshots], dtype=np.int64)
+        states = np.array([_state_row(snapshot) for snapshot in snapshots], dtype=np.float32)
+        states = states.reshape(-1, len(STATE_COLUMNS))
+
+        # Objects keep their row from tick to tick, removed ones are dropped and spawned ones appended
+        previous = self._entities
+        kept = np.isin(previous["id"], ids)
+        spawned = np.flatnonzero(~np.isin(ids, previous["id"]))
+        spawns = np.array([self._entity(snapshots[i]) for i in spawned], dtype=ENTITY)
+        entities = np.concatenate([previous[kept], spawns])
+        sorter = np.argsort(ids)
+        rows = sorter[np.searchsorted(ids, entities["id"], sorter=sorter)]
+
+        keyframe_offset = -1
+        if self.n_frames % self.keyframe_interval == 0:
+            keyframe_offset = self._write("keyframes", entities)
+        index = (tick, self._write("states", states[rows]), len(entities), self._write("spawns", spawns), len(spawns),
+                 self._write("removals", previous["id"][~kept]), np.count_nonzero(~kept), keyframe_offset)
+        self._write("index", np.array([index]))
+        # A reader never finds a tick in the index whose data is not written yet
+        for name in files:
+            self._files[name].flush()
+        self._entities = entities
+        self.n_frames += 1
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+
+
+class ReplayReader:
+    """
+            A class used to read a recording written by ReplayWriter. The files are memory mapped, only the parts
+            of the ticks that are read are loaded.
+
+            ...
+
+            Attributes
+            ----------
+            path: str
+                the directory of the recording
+            players: list
+                the players of the recorded game
+            keyframe_interval: int
+                number of ticks from one keyframe to the next
+            ticks: ndarray
+                number of every recorded tick
+
+            Methods
+            -------
+            frame_of_tick(tick)
+                Return the index of the last recorded tick that is not later than tick
+
+            entities(frame)
+                Return the identity of the objects of a recorded tick
+
+            states(frame)
+                Return the state columns of the objects of a recorded tick
+
+            snapshot(frame, top_left=None, bottom_right=None, previous=None)
+                Return a Snapshot of a recorded tick
+
+    """
+
+    def __init__(self, path):
+        """
+        :param path: (str) directory of the recording
+        """
+        with open(os.path.join(path, META_FILE)) as file:
+            meta = json.load(file)
+        if meta["version"] != FORMAT_VERSION:
+            message = "Cannot read recordings of version {}, expected {}."
+            raise ValueError(message.format(meta["version"], FORMAT_VERSION))
+        self.path = path
+        self.players = [Player(player["name"], tuple(player["color"])) for player in meta["players"]]
+        self.keyframe_interval = meta["keyframe_interval"]
+        self._maps = {name: self._map(name) for name in files}
+        # A tick may be half written when the recording is read while it is still being appended to
+        self._index = self._maps["index"][:len(self._maps["index"]) // len(INDEX_COLUMNS) * len(INDEX_COLUMNS)]
+        self._index = self._index.reshape(-1, len(INDEX_COLUMNS))
+        self.ticks = self._index[:, TICK]
+        self._cache = None
+
+    def _map(self, name):
+        """Memory map one of the files, mapping an empty file is not possible"""
+        path = os.path.join(self.path, name + ".bin")
+        if os.path.getsize(path) < files[name].itemsize:
+            return np.empty(0, dtype=files[name])
+        return np.memmap(path, dtype=files[name], mode="r")
+
+    def __len__(self):
+        return len(self._index)
+
+    def frame_of_tick(self, tick):
+        """ Find the recorded tick to show for a tick
+
+        :param tick: (int) number of a tick
+        :return: (int) index of the last recorded tick that is not later than tick
+
+        """
+        frame = np.searchsorted(self.ticks, tick, side="right") - 1
+        if frame < 0:
+            raise IndexError("Tick {} is before the start of the recording.".format(tick))
+        return int(frame)
+
+    def _rows(self, name, offset, count):
+        return self._maps[name][offset:offset + count]
+
+    def entities(self, frame):
+        """ Get the identity of the objects of a recorded tick, in the order of their state rows
+
+        :param frame: (int) index of the recorded tick
+        :return: (ndarray) structured array with the fields id, type and owner
+
+        """
+        if not 0 <= frame < len(self):
+            raise IndexError("Frame {} is not in the recording of {} ticks.".format(frame, len(self)))
+        keyframe = frame - frame % self.keyframe_interval
+        # Going on from the last read tick is cheaper than from the keyframe when playing forward
+        if self._cache is not None and keyframe <= self._cache[0] <= frame:
+            start, entities = self._cache
+        else:
+            row = self._index[keyframe]
+            start, entities = keyframe, np.array(self._rows("keyframes", row[KEYFRAME_OFFSET], row[N_OBJECTS]))
+        for row in self._index[start + 1:frame + 1]:
+            removed = self._rows("removals", row[REMOVAL_OFFSET], row[N_REMOVED])
+            spawned = self._rows("spawns", row[SPAWN_OFFSET], row[N_SPAWNED])
+            entities = np.concatenate([entities[~np.isin(entities["id"], removed)], spawned])
+        self._cache = frame, entities
+        return entities
+
+    def states(self, frame):
+        """ Get the state columns of the objects of a recorded tick
+
+        :param frame: (int) index of the recorded tick
+        :return: (ndarray) read-only array with one row per object and the columns STATE_COLUMNS
+
+        """
+        row = self._index[frame]
+        width = len(STATE_COLUMNS)
+        return self._rows("states", row[STATE_OFFSET] * width, row[N_OBJECTS] * width).reshape(-1, width)
+
+    def snapshot(self, frame, top_left=None, bottom_right=None, previous=None):
+        """ Rebuild the state of the objects of a recorded tick
+
+        :param frame: (int) index of the recorded tick
+        :param top_left: (ndarray) top left corner of the region to include, everything if None
+        :param bottom_right: (ndarray) bottom right corner of the region to include, everything if None
+        :param previous: (Snapshot) the last snapshot, to also record the spawn, move and despawn events since then
+        :return: (Snapshot) the objects, of the same types as in the recorded game
+
+        """
+        entities = self.entities(frame)
+        states = self.states(frame)
+        if top_left is not None:
+            x, y = states[:, 0], states[:, 1]
+            inside = (x >= top_left[0]) & (x <= bottom_right[0]) & (y <= top_left[1]) & (y >= bottom_right[1])
+            entities, states = entities[inside], states[inside]
+        states = np.array(states)
+        states.setflags(write=False)
+
+        players = self.players + [None]
+        directions = [None if direction[0] != direction[0] else direction for direction in states[:, 2:4]]
+        has_food = [None if value is None else bool(value) for value in _optional(states[:, 4])]
+        columns = zip(entities["id"].tolist(), entities["type"].tolist(), entities["owner"].tolist(), states[:, :2],
+                      directions, has_food, _optional(states[:, 5]), _optional(states[:, 6]), _optional(states[:, 7]))
+        objects = [ObjectSnapshot(id, object_types[code], position, direction, food, energy, size, health,
+                                  players[owner])
+                   for id, code, owner, position, direction, food, energy, size, health in columns]
+        return Snapshot(int(self.ticks[frame]), objects, previous)
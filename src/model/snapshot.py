@@ -0,0 +1,112 @@
+"""
+Immutable copies of the state of game objects. A Snapshot can be read by the view on another thread while the
+model keeps updating the objects it was taken from.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# State of one game object, attributes an object does not have are None
+ObjectSnapshot = namedtuple("ObjectSnapshot", ["id", "type", "position", "direction", "has_food", "energy", "size",
+                                               "health", "owner"])
+
+
+# Changes of the objects of a region from the snapshot after tick base_tick to the next one: the ObjectSnapshots of
+# objects that were created or entered the region, of objects whose state changed, and the ids of objects that were
+# removed or left the region
+SnapshotDelta = namedtuple("SnapshotDelta", ["base_tick", "spawned", "moved", "despawned"])
+
+
+def _frozen(vector):
+    """Read-only copy of an array, or None"""
+    if vector is None:
+        return None
+    vector = np.array(vector)
+    vector.setflags(write=False)
+    return vector
+
+
+def snapshot_object(obj):
+    """ Copy the state of a game object
+
+    :param obj: (GameObject) the object, or an ObjectSnapshot which is returned as it is
+    :return: (ObjectSnapshot) the copy
+
+    """
+    if isinstance(obj, ObjectSnapshot):
+        return obj
+    return ObjectSnapshot(obj.id, type(obj), _frozen(obj.position), _frozen(getattr(obj, "direction", None)),
+                          getattr(obj, "has_food", None), getattr(obj, "energy", None), getattr(obj, "size", None),
+                          getattr(obj, "health", None), getattr(obj, "owner", None))
+
+
+def _changed(old, new):
+    """Whether the state of an object differs between two ObjectSnapshots of it"""
+    if old.position[0] != new.position[0] or old.position[1] != new.position[1]:
+        return True
+    if old.has_food != new.has_food or old.size != new.size or old.health != new.health or old.energy != new.energy:
+        return True
+    return old.direction is not None and (old.direction[0] != new.direction[0] or old.direction[1] != new.direction[1])
+
+
+def diff(previous, objects):
+    """ Find the changes from one snapshot to the objects of the next one
+
+    :param previous: (Snapshot) the earlier snapshot
+    :param objects: (iterable) ObjectSnapshots of the later one
+    :return: (SnapshotDelta) the changes
+
+    """
+    before = {obj.id: obj for obj in previous}
+    spawned, moved = [], []
+    for obj in objects:
+        old = before.pop(obj.id, None)
+        if old is None:
+            spawned.append(obj)
+        elif old.type is not obj.type:
+            # The handle of a removed object was given to a new one
+            before[obj.id] = old
+            spawned.append(obj)
+        elif _changed(old, obj):
+            moved.append(obj)
+    return SnapshotDelta(previous.tick, tuple(spawned), tuple(moved), tuple(before))
+
+
+class Snapshot:
+    """
+            A class used to represent the state of the objects of a region of the world after a tick.
+            It is immutable, so it can be handed to another thread without copying or locking.
+
+            ...
+
+            Attributes
+            ----------
+            tick: int
+                number of the tick after which the snapshot was taken
+            objects: tuple
+                one ObjectSnapshot per object
+            delta: SnapshotDelta
+                the changes since the previous snapshot, None if there is none
+
+    """
+
+    __slots__ = ("tick", "objects", "delta")
+
+    def __init__(self, tick, objects, previous=None):
+        """
+        :param tick: (int) number of the tick after which the snapshot is taken
+        :param objects: (iterable) the game objects to copy
+        :param previous: (Snapshot) the snapshot taken before this one, to compute the delta to it
+        """
+        object.__setattr__(self, "tick", tick)
+        object.__setattr__(self, "objects", tuple(snapshot_object(obj) for obj in objects))
+        object.__setattr__(self, "delta", None if previous is None else diff(previous, self.objects))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshots are immutable.")
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __len__(self):
+        return len(self.objects)
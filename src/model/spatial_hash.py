@@ -0,0 +1,364 @@
+import math
+
+import numpy as np
+
+from .ant import Ant
+from .food import Food
+from .nest import Nest
+from .world import World, get_partitions, get_partition_type
+
+from src.instrumentation import instrumentation, INDEX_REBUILD
+from src.settings import all_params
+
+
+class SpatialHash(World):
+    """
+            A class used to implement the world as a uniform grid of hashed cells (alternative to the kd-trees)
+            It inherits from World class
+
+            Every object is bucketed into the square cell its position falls in. Moving an object only touches its old
+            and new cell, and a query only looks at the cells overlapping the queried region. With cells about as
+            large as the perception radius of the ants, a circular query visits a handful of cells regardless of how
+            many objects are in the world. Each partition class (Nest, Food, Ant) has its own cells, so a
+            query for food never looks at the ants stacked on a nest.
+
+            ...
+
+            Attributes
+            ----------
+            cell_size: float
+                side length of the square cells
+            cells: dict
+                maps each partition class to a dict from (column, row) tuples to dicts of the objects of that class in
+                that cell, keyed by object id
+            cell_of: dict
+                maps object ids to the cell the object is currently stored in
+
+    """
+
+    partition_types = (Nest, Food, Ant)
+
+    def __init__(self, cell_size=None, rng=None):
+        """
+
+        :param cell_size: (float) side length of the cells. Defaults to the smallest ant perception radius.
+        :param rng: (Generator) random generator for the ants of the world, a fresh one if None
+
+        """
+        super().__init__(rng)
+        if cell_size is None:
+            cell_size = min(all_params.tree_model_params.circular_region_radius_worker,
+                            all_params.tree_model_params.circular_region_radius_scout)
+        self.cell_size = cell_size
+        self.cells = {partition_type: {} for partition_type in self.partition_types}
+        self.cell_of = {}
+
+    def get_k_nearest(self, position, k=1, object_type=None):
+        """ Get k nearest neighbour objects for specific position, searching rings of cells around it.
+
+        :param position: (list) Coordinates of the position of interest
+        :param k: (int) Number of nearest neighbours
+        :param object_type: (type or tuple of types) only return objects of this type, default all
+        :return dists: (array of floats) Distances to the nearest neighbours
+        :return k_nearest_obj: (list) The k nearest objects
+
+        """
+        partitions = get_partitions(self.partition_types, object_type)
+        occupied = [cell for partition_type, _ in partitions for cell in self.cells[partition_type]]
+        if k == 0 or not occupied:
+            return np.zeros(0), []
+
+        center_cell = self._cell(position)
+        # No object is further away than the most distant occupied cell
+        max_ring = max(max(abs(column - center_cell[0]), abs(row - center_cell[1])) for column, row in occupied)
+        candidates = []
+        for ring in range(max_ring + 1):
+            for cell in self._ring(center_cell, ring):
+                for obj in self._objects_in_cell(cell, partitions):
+                    candidates.append((self._distance(obj.position, position), obj))
+            candidates.sort(key=lambda candidate: candidate[0])
+            # Everything outside the searched rings is at least ring * cell_size away
+            if len(candidates) >= k and candidates[k - 1][0] <= ring * self.cell_size:
+                break
+
+        nearest = candidates[:k]
+        return np.array([dist for dist, _ in nearest]), [obj for _, obj in nearest]
+
+    def get_at_position(self, position, object_type=None):
+        """ Return all the objects (ants/food/nest) in specific position
+
+        :param position: (list) Coordinates of specific position
+        :param object_type: (type or tuple of types) only return objects of this type, default all
+        :return: (list) ALL objects in the given position
+
+        """
+        candidates = self._objects_in_cell(self._cell(position), get_partitions(self.partition_types, object_type))
+        return [obj for obj in candidates if obj.position[0] == position[0] and obj.position[1] == position[1]]
+
+    def get_rectangle_region(self, top_left, bottom_right, object_type=None):
+        """ Return all the objects in the given rectangular region
+
+        :param top_left: (list) Coordinates of top left point of the rectangle
+        :param bottom_right: (list) Coordinates of bottom right point of the rectangle
+        :param object_type: (type or tuple of types) only return objects of this type, default all
+        :return result: (list) All objects in the specified rectangular region
+
+        """
+        x_min, y_max = top_left[0], top_left[1]
+        x_max, y_min = bottom_right[0], bottom_right[1]
+
+        result = []
+        for obj in self._objects_in_cells(x_min, x_max, y_min, y_max, object_type):
+            if x_min <= obj.position[0] <= x_max and y_min <= obj.position[1] <= y_max:
+                result.append(obj)
+        return result
+
+    def get_circular_region(self, center, radius, object_type=None):
+        """ Return all the objects in the given circular region
+
+        :param center: (list) Coordinates of center of the circle
+        :param radius: (int) Radius of the circle
+        :param object_type: (type or tuple of types) only return objects of this type, default all
+        :return result: (list) All objects in the specified circular region
+
+        """
+        x, y = center[0], center[1]
+        squared_radius = radius * radius
+
+        result = []
+        for obj in self._objects_in_cells(x - radius, x + radius, y - radius, y + radius, object_type):
+            dx = obj.position[0] - x
+            dy = obj.position[1] - y
+            if dx * dx + dy * dy <= squared_radius:
+                result.append(obj)
+        return result
+
+    def get_circular_region_list(self, center_list, radius_list, object_type=None):
+        """ Return all the objects in each of the circles of interest. Centers falling into the same cell share one
+        lookup of the surrounding cells and are checked against its objects with one vectorized distance computation.
+
+        :param center_list: (list) Coordinates of the centers of circles of interest
+        :param radius_list: (list) Radii of the circles of interest, or one radius for all of them
+        :param object_type: (type or tuple of types) only return objects of this type, default all
+        :return: (list) All objects in each of the specified circular region
+
+        """
+        center_list = np.asarray(center_list, dtype=float).reshape(-1, 2)
+        radius_list = np.broadcast_to(np.asarray(radius_list, dtype=float), (len(center_list),))
+
+        groups = {}
+        for i, center in enumerate(center_list):
+            groups.setdefault(self._cell(center), []).append(i)
+
+        result = [[] for _ in range(len(center_list))]
+        for (column, row), members in groups.items():
+            radius = radius_list[members].max()
+            x_min, y_min = column * self.cell_size - radius, row * self.cell_size - radius
+            x_max, y_max = (column + 1) * self.cell_size + radius, (row + 1) * self.cell_size + radius
+            candidates = self._objects_in_cells(x_min, x_max, y_min, y_max, object_type)
+            if not candidates:
+                continue
+            candidate_positions = np.array([obj.position for obj in candidates], dtype=float)
+            offsets = center_list[members, None, :] - candidate_positions[None, :, :]
+            inside = np.einsum("ijk,ijk->ij", offsets, offsets) <= radius_list[members, None] ** 2
+            for i, row_inside in zip(members, inside):
+                result[i] = [candidates[j] for j in np.flatnonzero(row_inside)]
+        return result
+
+    def get_square_region(self, center, radius, object_type=None):
+        """ Return all the objects in the given square region
+
+        :param center: (list) Coordinates of center of the square
+        :param radius: (int) Radius of the square
+        :param object_type: (type or tuple of types) only return objects of this type, default all
+        :return result: (list) All objects in the specified square region
+
+        """
+        top_left = np.array([center[0] - radius, center[1] + radius])
+        bottom_right = np.array([center[0] + radius, center[1] - radius])
+        return self.get_rectangle_region(top_left, bottom_right, object_type)
+
+    def update(self):
+        """ Update all objects for one iteration. Ants lay pheromone into the field of their owner. Moves and
+        removals are applied after all objects were updated, so all objects perceive the world as it was at the start
+        of the iteration.
+        The noticeable objects of all ants of a type are looked up with one batched query.
+        """
+        moved = []
+        removed = []
+
+        all_objects = list(self)
+        ants = [obj for obj in all_objects if isinstance(obj, Ant)]
+        noticeable_objects = self._get_noticeable_objects(ants)
+
+        dead = self.update_ants(ants, noticeable_objects)
+        dead_ids = {ant.id for ant in dead}
+        for ant in ants:
+            if ant.id in dead_ids:
+                removed.append(ant)
+            else:
+                moved.append(ant)
+
+        for obj in all_objects:
+            if not isinstance(obj, Ant) and obj.update() is None:
+                removed.append(obj)
+
+        with instrumentation.phase(INDEX_REBUILD):
+            cells = np.floor(self.get_ant_positions(moved) / self.cell_size).astype(int).tolist()
+            for obj, cell in zip(moved, cells):
+                self._move(obj, tuple(cell))
+            for obj in removed:
+                self._remove(obj)
+                self.release_object(obj)
+        self.decay_pheromones()
+
+    def create_nests(self, player_list, position_list, size, health):
+        """ Create new nest objects with specific owners/positions/size/health
+
+        :param player_list: (list) owning players of the nests to be created
+        :param position_list: (list) coordinates of the nests to be created
+        :param size: (list) sizes of the nests to be created
+        :param health: (list) health(s) of the nests to be created
+
+        """
+        for position, player in zip(position_list, player_list):
+            self._insert(Nest(position, player, size, health))
+
+    def create_food(self, position_list, size_list):
+        """ Create new food objects with specific positions/size
+
+        :param position_list: (list) coordinates of the food to be created
+        :param size_list: (list) size of the food to be created
+
+        """
+        for position, size in zip(position_list, size_list):
+            self._insert(Food(position, size))
+
+    def insert_objects(self, objects):
+        """ Insert game objects that were created outside of the world
+
+        :param objects: (list) the objects, ants need to be stored in the population of this world
+
+        """
+        for obj in objects:
+            self._insert(obj)
+
+    def remove_objects(self, objects):
+        """ Remove game objects from the world and release their handles
+
+        :param objects: (list) the objects
+
+        """
+        for obj in objects:
+            self._remove(obj)
+            self.release_object(obj)
+
+    def dump_content(self):
+        return list(self)
+
+    def __iter__(self):
+        """
+        For iterating over the grid.
+        :return: iterator of all objects currently saved in the grid
+        """
+        return iter([obj for cells in self.cells.values() for cell in cells.values() for obj in cell.values()])
+
+    def __len__(self):
+        """
+        :return: number of objects that are in the grid
+        """
+        return len(self.cell_of)
+
+    def get_ants(self):
+        """ Get all the ant objects
+
+        :return: (list) all the ant objects
+
+        """
+        return [obj for cell in self.cells[Ant].values() for obj in cell.values()]
+
+    def get_nests(self):
+        """ Get all the nest objects
+
+        :return: (list) all the nest objects
+
+        """
+        return [obj for cell in self.cells[Nest].values() for obj in cell.values()]
+
+    def _cell(self, position):
+        """Return the (column, row) of the cell containing the position"""
+        return math.floor(position[0] / self.cell_size), math.floor(position[1] / self.cell_size)
+
+    def _ring(self, center_cell, ring):
+        """Return the cells at Chebyshev distance ring from the center cell"""
+        column, row = center_cell
+        if ring == 0:
+            return [center_cell]
+        cells = []
+        for i in range(-ring, ring + 1):
+            cells.extend([(column + i, row - ring), (column + i, row + ring)])
+        for j in range(-ring + 1, ring):
+            cells.extend([(column - ring, row + j), (column + ring, row + j)])
+        return cells
+
+    def _objects_in_cells(self, x_min, x_max, y_min, y_max, object_type=None):
+        """Return all the objects of a type in the cells overlapping the given bounds"""
+        column_min, row_min = self._cell((x_min, y_min))
+        column_max, row_max = self._cell((x_max, y_max))
+
+        result = []
+        for partition_type, filter_type in get_partitions(self.partition_types, object_type):
+            cells = self.cells[partition_type]
+            found = []
+            if (column_max - column_min + 1) * (row_max - row_min + 1) > len(cells):
+                # Region larger than the occupied part of the grid, only look at occupied cells
+                for (column, row), cell in cells.items():
+                    if column_min <= column <= column_max and row_min <= row <= row_max:
+                        found.extend(cell.values())
+            else:
+                for column in range(column_min, column_max + 1):
+                    for row in range(row_min, row_max + 1):
+                        cell = cells.get((column, row))
+                        if cell:
+                            found.extend(cell.values())
+            if filter_type is not None:
+                found = [obj for obj in found if isinstance(obj, filter_type)]
+            result.extend(found)
+        return result
+
+    def _objects_in_cell(self, cell, partitions):
+        """Return all the objects of the given partitions in one cell"""
+        result = []
+        for partition_type, filter_type in partitions:
+            found = self.cells[partition_type].get(cell, {}).values()
+            if filter_type is not None:
+                found = [obj for obj in found if isinstance(obj, filter_type)]
+            result.extend(found)
+        return result
+
+    def _distance(self, position, other):
+        return math.hypot(position[0] - other[0], position[1] - other[1])
+
+    def _partition(self, obj):
+        """Return the cells of the partition the object belongs to"""
+        return self.cells[get_partition_type(self.partition_types, obj)]
+
+    def _insert(self, obj):
+        cell = self._cell(obj.position)
+        self._partition(obj).setdefault(cell, {})[obj.id] = obj
+        self.cell_of[obj.id] = cell
+
+    def _remove(self, obj):
+        cells = self._partition(obj)
+        cell = self.cell_of.pop(obj.id)
+        del cells[cell][obj.id]
+        if not cells[cell]:
+            del cells[cell]
+
+    def _move(self, obj, new_cell=None):
+        if new_cell is None:
+            new_cell = self._cell(obj.position)
+        old_cell = self.cell_of[obj.id]
+        if new_cell != old_cell:
+            self._remove(obj)
+            self._insert(obj)
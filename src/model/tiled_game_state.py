@@ -0,0 +1,574 @@
+"""
+Spatial domain decomposition of a game. The map is split into a grid of tiles, every tile is a World of its own that
+is updated by its own process. Once per tick the tiles exchange what their neighbours need:
+
+- ghosts: copies of the food within the perception radius of a tile border. Food taken from a ghost is sent back
+  to the tile owning the food, food unloaded into a nest of another tile is sent to the tile owning the nest.
+- pheromone: the cells of a tile within the perception radius of a border are copied into the fields of the
+  neighbour, so ants see the trails on the other side of a border.
+- migrants: ants that crossed a border move to the tile they are in now.
+
+Everything a tile sends is applied by its neighbours at the start of the next tick, so the halos are one tick old.
+"""
+from multiprocessing import get_context
+import traceback
+
+import numpy as np
+
+from .entity_registry import registry, INDEX_BITS
+from .food import Food
+from .game_state import GameState, world_types
+from .nest import Nest
+from .persistence import object_columns, write_game_state
+from .snapshot import snapshot_object
+
+from src.settings import all_params
+from src.utils import array
+
+# Handles of the objects of a tile process start at tile index << TILE_OFFSET_BITS, so they never collide as long as
+# a tile holds fewer than 1 << TILE_OFFSET_BITS objects at the same time
+TILE_OFFSET_BITS = 24
+
+
+class Tile:
+    """
+            A class used to represent one tile of a TiledGameState, it owns the objects whose position lies in the
+            tile and updates them with a World of its own. Every tile holds a replica of every nest, so ants can
+            belong to a nest of another tile.
+
+            ...
+
+            Attributes
+            ----------
+            index: int
+                position of the tile in the row-major grid of tiles
+            bottom_left, top_right: array
+                corners of the area the tile owns, infinite for the outer borders of the grid
+            world: World
+                objects of the tile, including ghosts and nest replicas
+            players: list
+                all players of the game
+            nests: list
+                replicas of all nests of the game, by global index
+            ghosts: dict
+                maps handles of food of other tiles to the local copies of the food
+            bands: list
+                (neighbour index, bottom left, top right) of the areas of this tile the neighbours need to see
+
+            Methods
+            -------
+            step(messages)
+                Apply the messages of the neighbours, update the world and return the messages for the neighbours
+
+            add_nests(records), create_food(positions, sizes), create_ants(nest_index, ant_type, amount)
+                Create objects in the tile
+
+            get_objects_in_region(top_left, bottom_right), get_nests(), get_ants()
+                Return snapshots of the objects the tile owns
+
+            get_columns()
+                Return the columns of the objects and the pheromone the tile owns, to save the game
+
+    """
+
+    def __init__(self, index, bottom_left, top_right, edges, players, world_type, seed, bands):
+        """
+        :param index: (int) position of the tile in the row-major grid of tiles
+        :param bottom_left: (array) corner of the area of the tile, may be -inf
+        :param top_right: (array) corner of the area of the tile, may be inf
+        :param edges: (tuple) inner x and y coordinates of the borders between tiles
+        :param players: (list) all players of the game
+        :param world_type: (string) name of the World implementation, see game_state.world_types
+        :param seed: (SeedSequence) seed of the random generator of the world
+        :param bands: (list) (neighbour index, bottom left, top right) of the areas the neighbours need to see
+        """
+        self.index = index
+        self.bottom_left = bottom_left
+        self.top_right = top_right
+        self.edges = edges
+        self.players = players
+        self.player_index = {player: i for i, player in enumerate(players)}
+        self.world = world_types[world_type](rng=np.random.default_rng(seed))
+        self.bands = bands
+        self.nests = []
+        self.nest_index = {}
+        self.owned_nests = set()
+        self.ghosts = {}
+        self.ghost_owner = {}
+
+    def add_nests(self, records):
+        """ Create replicas of nests
+
+        :param records: (list) (position, player index, size, health) of the nests in the order of their global index
+        :return: (dict) maps the global index of the nests this tile owns to their handles
+
+        """
+        nests = []
+        for position, player_index, size, health in records:
+            nest = Nest(position, self.players[player_index], size, health)
+            self.nest_index[nest.id] = len(self.nests)
+            self.nests.append(nest)
+            nests.append(nest)
+            if tile_of(nest.position, self.edges) == self.index:
+                self.owned_nests.add(nest.id)
+        self.world.insert_objects(nests)
+        return {self.nest_index[nest.id]: nest.id for nest in nests if nest.id in self.owned_nests}
+
+    def create_food(self, positions, sizes):
+        self.world.create_food(positions, sizes)
+
+    def create_ants(self, nest_index, ant_type, amount):
+        self.world.create_ants(self.nests[nest_index], ant_type, amount)
+
+    def step(self, messages):
+        """ Update the tile for one iteration
+
+        :param messages: (list) the messages the neighbours sent after the last iteration
+        :return: (dict) maps indices of neighbours to the message for them
+
+        """
+        self._receive(messages)
+        ghost_sizes = {handle: food.size for handle, food in self.ghosts.items()}
+        nest_food = [nest.food for nest in self.nests]
+        self.world.update()
+
+        outbox = {}
+
+        def message(tile):
+            if tile not in outbox:
+                outbox[tile] = {"migrants": [], "ghosts": {}, "pheromone": [], "food_taken": {}, "nest_food": {}}
+            return outbox[tile]
+
+        # Food taken from ghosts and unloaded into replicas belongs to the tiles owning the food and the nests
+        for handle, food in list(self.ghosts.items()):
+            taken = ghost_sizes[handle] - food.size
+            if taken > 0:
+                message(self.ghost_owner[handle])["food_taken"][handle] = taken
+            if food.size <= all_params.food_model_params.min_size:
+                # The world removed the empty ghost
+                del self.ghosts[handle]
+                del self.ghost_owner[handle]
+        for index, (nest, food) in enumerate(zip(self.nests, nest_food)):
+            if nest.id not in self.owned_nests and nest.food != food:
+                owner = tile_of(nest.position, self.edges)
+                message(owner)["nest_food"][index] = nest.food - food
+                nest.food = food
+
+        self._send_migrants(message)
+
+        ghost_ids = self._ghost_ids()
+        for neighbour, bottom_left, top_right in self.bands:
+            # Sent even if empty, no ghosts tell the neighbour to drop its ghosts of this tile
+            ghosts = message(neighbour)["ghosts"]
+            for food in self.world.get_rectangle_region(array([bottom_left[0], top_right[1]]),
+                                                        array([top_right[0], bottom_left[1]]), object_type=Food):
+                if food.id not in ghost_ids:
+                    ghosts[food.id] = (food.position, food.size)
+            for player, field in self.world.pheromone_fields.items():
+                strengths = field.read_window(field.window(bottom_left, top_right))
+                if strengths.any():
+                    pheromone = (self.player_index[player], bottom_left, top_right, strengths)
+                    message(neighbour)["pheromone"].append(pheromone)
+        return outbox
+
+    def get_objects_in_region(self, top_left, bottom_right):
+        """ Return snapshots of the objects this tile owns in a rectangular area
+
+        :param top_left: (array) Coordinates of top left point of the rectangle
+        :param bottom_right: (array) Coordinates of bottom right point of the rectangle
+        :return: (list) ObjectSnapshot per object
+
+        """
+        ghost_ids = self._ghost_ids()
+        return [snapshot_object(obj) for obj in self.world.get_rectangle_region(top_left, bottom_right)
+                if obj.id not in ghost_ids and (not isinstance(obj, Nest) or obj.id in self.owned_nests)]
+
+    def get_nests(self):
+        return [snapshot_object(nest) for nest in self.nests if nest.id in self.owned_nests]
+
+    def get_ants(self):
+        return [snapshot_object(ant) for ant in self.world.get_ants()]
+
+    def get_columns(self):
+        """ Collect the state of the objects and the pheromone cells the tile owns, see persistence.object_columns
+
+        :return: (dict) the columns of the objects, the nests with the extra column nest_index of their global index
+        :return: (list) (player index, shape of the field, cell size, window, strengths of the window) per field
+        :return: (dict) state of the random generator of the ants of the tile
+
+        """
+        ghost_ids = self._ghost_ids()
+        nests = [nest for nest in self.nests if nest.id in self.owned_nests]
+        foods = [obj for obj in self.world if isinstance(obj, Food) and obj.id not in ghost_ids]
+        population = self.world.population
+        columns = object_columns(population, self.player_index, nests, foods, self.world.get_ants(), self.nest_index)
+        columns["nest_index"] = np.array([self.nest_index[nest.id] for nest in nests], dtype=np.intp)
+        fields = []
+        for player, field in self.world.pheromone_fields.items():
+            window = field.window(self.bottom_left, self.top_right)
+            fields.append((self.player_index[player], field.grid.shape, field.cell_size, window,
+                           field.read_window(window)))
+        return columns, fields, population.rng.bit_generator.state
+
+    def _ghost_ids(self):
+        """Handles of the local copies of the ghosts"""
+        return {food.id for food in self.ghosts.values()}
+
+    def _receive(self, messages):
+        """Apply the messages of the neighbours"""
+        reported = {}
+        for sender, message in messages:
+            for handle, (position, size) in message["ghosts"].items():
+                reported[handle] = (sender, position, size)
+            for handle, amount in message["food_taken"].items():
+                food = registry.get(handle)
+                if food is not None:
+                    food.take_some(amount)
+            for index, amount in message["nest_food"].items():
+                self.nests[index].increase_food(amount)
+            for player_index, bottom_left, top_right, strengths in message["pheromone"]:
+                field = self.world.get_pheromone_field(self.players[player_index])
+                field.write_window(field.window(bottom_left, top_right), strengths)
+        self._receive_migrants([migrant for _, message in messages for migrant in message["migrants"]])
+
+        new_ghosts = []
+        for handle in list(self.ghosts):
+            if handle not in reported:
+                # The food was eaten up or left the halo, the world removes empty food with its next update
+                self.ghosts.pop(handle).size = 0.
+                del self.ghost_owner[handle]
+        for handle, (sender, position, size) in reported.items():
+            if handle in self.ghosts:
+                self.ghosts[handle].size = size
+            else:
+                self.ghosts[handle] = Food(position, size)
+                self.ghost_owner[handle] = sender
+                new_ghosts.append(self.ghosts[handle])
+        self.world.insert_objects(new_ghosts)
+
+    def _send_migrants(self, message):
+        """ Remove the ants that left the tile and add their state to the messages for the tiles they are in now
+
+        :param message: (function) returns the message for a tile
+
+        """
+        population = self.world.population
+        ants = self.world.get_ants()
+        if not ants:
+            return
+        tiles = tile_of(population.position[[ant.slot for ant in ants]], self.edges)
+        emigrants = []
+        for ant, tile in zip(ants, tiles):
+            if tile != self.index:
+                emigrants.append(ant)
+                columns = {name: getattr(population, name)[ant.slot].copy()
+                           for name in population.vector_columns + population.scalar_columns}
+                message(tile)["migrants"].append((type(ant), self.player_index[ant.owner],
+                                                  self.nest_index[ant.home.id], columns))
+        self.world.remove_objects(emigrants)
+
+    def _receive_migrants(self, migrants):
+        """Create the ants that moved into the tile"""
+        population = self.world.population
+        ants = []
+        for ant_type, player_index, nest_index, columns in migrants:
+            ant = ant_type(self.players[player_index], self.nests[nest_index], population=population)
+            for name, value in columns.items():
+                getattr(population, name)[ant.slot] = value
+            ants.append(ant)
+        self.world.insert_objects(ants)
+
+
+def tile_of(positions, edges):
+    """ Find the tiles positions lie in
+
+    :param positions: (array) one position or one position per row
+    :param edges: (tuple) inner x and y coordinates of the borders between tiles
+    :return: (int or array of ints) row-major index of the tile of every position
+
+    """
+    x_edges, y_edges = edges
+    positions = np.asarray(positions)
+    columns = np.searchsorted(x_edges, positions[..., 0], side="right")
+    rows = np.searchsorted(y_edges, positions[..., 1], side="right")
+    return rows * (len(x_edges) + 1) + columns
+
+
+def _serve(connection, tile_kwargs, index_offset):
+    """ Run a tile in a worker process, calling the methods the coordinator sends until it sends None
+
+    :param connection: (Connection) pipe to the coordinator
+    :param tile_kwargs: (dict) arguments of Tile
+    :param index_offset: (int) first index of the handles of the objects of the tile
+
+    """
+    registry.index_offset = index_offset
+    registry.capacity = 1 << TILE_OFFSET_BITS
+    tile = Tile(**tile_kwargs)
+    while True:
+        method, args = connection.recv()
+        if method is None:
+            break
+        try:
+            connection.send((True, getattr(tile, method)(*args)))
+        except Exception:
+            connection.send((False, traceback.format_exc()))
+    connection.close()
+
+
+class _LocalTile:
+    """Runs a tile in the process of the coordinator"""
+
+    def __init__(self, tile_kwargs):
+        self.tile = Tile(**tile_kwargs)
+        self._result = None
+
+    def send(self, method, args):
+        self._result = getattr(self.tile, method)(*args)
+
+    def receive(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class _ProcessTile:
+    """Runs a tile in a worker process"""
+
+    def __init__(self, tile_kwargs, context):
+        self.connection, child_connection = context.Pipe()
+        index_offset = (tile_kwargs["index"] + 1) << TILE_OFFSET_BITS
+        self.process = context.Process(target=_serve, args=(child_connection, tile_kwargs, index_offset),
+                                       daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def send(self, method, args):
+        self.connection.send((method, args))
+
+    def receive(self):
+        success, result = self.connection.recv()
+        if not success:
+            raise RuntimeError("Tile process failed:\n{}".format(result))
+        return result
+
+    def close(self):
+        if self.process.is_alive():
+            self.connection.send((None, ()))
+            self.process.join()
+        self.connection.close()
+
+
+class TiledGameState(GameState):
+    """
+            A class used to run a game split into a grid of tiles that are updated in parallel, one process per
+            tile. It has the same interface as GameState, but all objects it returns are ObjectSnapshot copies, since
+            the objects themselves live in the processes of the tiles. Ants are identified by handles that change
+            when they move to another tile.
+
+            ...
+
+            Attributes
+            ----------
+            world_type: string
+                name of the World implementation of the tiles
+            shape: tuple
+                number of tiles along x and y
+            edges: tuple
+                inner x and y coordinates of the borders between tiles, aligned with the cells of the pheromone fields
+            halo: float
+                width of the border area neighbours see of a tile, the largest perception radius of the ants
+            tiles: list
+                handles to the tiles in row-major order
+
+            Methods
+            -------
+            close()
+                Stop the processes of the tiles
+
+    """
+
+    def __init__(self, player_list, world_type=None, seed=None, shape=(2, 2), processes=True):
+        """ Initialize player list and create nests for all the players
+
+        :param player_list: (list) that contains current players IDs
+        :param world_type: (string) name of the World implementation of the tiles, see game_state.world_types
+        :param seed: (int) seed of all random decisions of the game, random if None
+        :param shape: (tuple) number of tiles along x and y
+        :param processes: (bool) run every tile in its own process, or all of them one after another in this one
+
+        """
+        if (shape[0] * shape[1]) << TILE_OFFSET_BITS >= 1 << INDEX_BITS:
+            raise ValueError("Too many tiles: {}.".format(shape))
+        self.shape = shape
+        self.halo = all_params.tree_model_params.circular_region_radius_scout
+        self.edges = _inner_edges(shape)
+        self._processes = processes
+        super().__init__(player_list, world_type, seed)
+
+    def _create_world(self, world_type):
+        """ Start the tiles instead of a single world, every tile gets a stream of the seed sequence of its own
+
+        :param world_type: (string) name of the World implementation of the tiles
+
+        """
+        self.world_type = world_type
+        tile_seeds = self.seed_sequence.spawn(self.shape[0] * self.shape[1])
+        lows = [np.concatenate(([-np.inf], edges)) for edges in self.edges]
+        highs = [np.concatenate((edges, [np.inf])) for edges in self.edges]
+        corners = [(np.array([lows[0][column], lows[1][row]]), np.array([highs[0][column], highs[1][row]]))
+                   for row in range(self.shape[1]) for column in range(self.shape[0])]
+
+        context = get_context("spawn")
+        self.tiles = []
+        for index, (bottom_left, top_right) in enumerate(corners):
+            tile_kwargs = dict(index=index, bottom_left=bottom_left, top_right=top_right, edges=self.edges,
+                               players=self.players, world_type=world_type, seed=tile_seeds[index],
+                               bands=_bands(index, corners, self.halo))
+            self.tiles.append(_ProcessTile(tile_kwargs, context) if self._processes else _LocalTile(tile_kwargs))
+        self._inboxes = [[] for _ in self.tiles]
+        self._nest_records = []
+        self._nest_handles = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for tile in self.tiles:
+            tile.close()
+
+    def save(self, path):
+        """ Write the game to a file, the columns of all tiles are joined. It is loaded as a GameState with one
+        world, the ants of all tiles draw from the random generator of the first one.
+
+        :param path: (str) the file, .npz is appended if it has another suffix
+
+        """
+        results = self._call_all("get_columns", [()] * len(self.tiles))
+        columns = {name: np.concatenate([tile_columns[name] for tile_columns, _, _ in results])
+                   for name in results[0][0]}
+        # Every nest is owned by one tile, in the order of their global index the homes of the ants refer to
+        order = np.argsort(columns.pop("nest_index"))
+        for name in columns:
+            if name.startswith("nest_"):
+                columns[name] = columns[name][order]
+
+        grids = {}
+        for _, fields, _ in results:
+            for player_index, shape, cell_size, window, strengths in fields:
+                if player_index not in grids:
+                    grids[player_index] = (np.zeros(shape), cell_size)
+                grids[player_index][0][window] = strengths
+        fields = [(player_index, grid, cell_size) for player_index, (grid, cell_size) in sorted(grids.items())]
+        write_game_state(path, self, self.world_type, columns, fields, results[0][2])
+
+    def update(self):
+        """Update all tiles in parallel for one iteration and pass their messages on to their neighbours"""
+        outboxes = self._call_all("step", [(inbox,) for inbox in self._inboxes])
+        self._inboxes = [[] for _ in self.tiles]
+        for sender, outbox in enumerate(outboxes):
+            for receiver, message in outbox.items():
+                self._inboxes[receiver].append((sender, message))
+        self.tick += 1
+
+    def get_objects_in_region(self, top_left, bottom_right):
+        """ Get snapshots of all objects in a rectangular area
+
+        :param top_left: (ndarray) Coordinates of top left point of the rectangle
+        :param bottom_right: (ndarray) Coordinates of bottom right point of the rectangle
+        :return: (list) ObjectSnapshot per object
+
+        """
+        return self._gather("get_objects_in_region", (top_left, bottom_right))
+
+    def create_ants(self, nest, ant_type="worker", amount=1):
+        """ Create new ants in a nest, in the tile that owns the nest
+
+        :param nest: (ObjectSnapshot) the nest, as returned by get_nests
+        :param ant_type: (string) Has to be one of "worker" or "scout", defines the type of Ant to be created
+        :param amount: (int) number of ants that should be created
+
+        """
+        index, tile = self._nest_handles[nest.id]
+        self._call(tile, "create_ants", (index, ant_type, amount))
+
+    def create_nest(self, nest_position, player, size, health):
+        """ Create nests, every tile gets a replica of them
+
+        :param nest_position: (list) coordinates of the nests
+        :param player: (list) owners of the nests
+        :param size: (int) radius of the nests
+        :param health: (int) health of the nests
+
+        """
+        records = [(array(position), self.players.index(owner), size, health)
+                   for position, owner in zip(nest_position, player)]
+        self._nest_records.extend(records)
+        for tile, handles in enumerate(self._call_all("add_nests", [(records,)] * len(self.tiles))):
+            for index, handle in handles.items():
+                self._nest_handles[handle] = (index, tile)
+
+    def create_food(self, position_list, size_list):
+        """Create food in the tiles the positions lie in"""
+        tiles = tile_of(np.array(position_list).reshape(-1, 2), self.edges)
+        for tile in np.unique(tiles):
+            in_tile = np.flatnonzero(tiles == tile)
+            self._call(int(tile), "create_food", ([position_list[i] for i in in_tile],
+                                                  [size_list[i] for i in in_tile]))
+
+    def get_nests(self):
+        return self._gather("get_nests", ())
+
+    def get_ants(self):
+        return self._gather("get_ants", ())
+
+    def _call(self, tile, method, args):
+        self.tiles[tile].send(method, args)
+        return self.tiles[tile].receive()
+
+    def _call_all(self, method, args_list):
+        """Call a method on all tiles, all of them start before the results are collected"""
+        for tile, args in zip(self.tiles, args_list):
+            tile.send(method, args)
+        return [tile.receive() for tile in self.tiles]
+
+    def _gather(self, method, args):
+        return [obj for result in self._call_all(method, [args] * len(self.tiles)) for obj in result]
+
+
+def _inner_edges(shape):
+    """ Split the area of the pheromone fields evenly into tiles, along the borders of the cells of the fields
+
+    :param shape: (tuple) number of tiles along x and y
+    :return: (tuple) inner x and y coordinates of the borders between tiles
+
+    """
+    params = all_params.pheromone_model_params
+    n_cells = int(np.ceil(params.field_size / params.field_cell_size))
+    return tuple(-params.field_size / 2 + np.round(np.linspace(0, n_cells, n + 1)[1:-1]) * params.field_cell_size
+                 for n in shape)
+
+
+def _bands(index, corners, halo):
+    """ Find the areas of a tile its neighbours need to see, within the area of the pheromone fields
+
+    :param index: (int) index of the tile
+    :param corners: (list) bottom left and top right corner of every tile
+    :param halo: (float) how far the neighbours look across their borders
+    :return: (list) (neighbour index, bottom left, top right) per neighbour
+
+    """
+    extent = all_params.pheromone_model_params.field_size / 2
+    bottom_left, top_right = corners[index]
+    bands = []
+    for neighbour, (other_bottom_left, other_top_right) in enumerate(corners):
+        low = np.maximum(np.maximum(bottom_left, other_bottom_left - halo), -extent)
+        high = np.minimum(np.minimum(top_right, other_top_right + halo), extent)
+        if neighbour != index and np.all(low < high):
+            bands.append((neighbour, low, high))
+    return bands
+
@@ -2,6 +2,20 @@
 # Implementation is done currently by KdTreeAndDict
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+from .pheromone_field import PheromoneField
+from .ant_population import AntPopulation, WORKER, SCOUT
+from .ant import Ant
+from .worker import Worker
+from .scout import Scout
+from .food import Food
+from .entity_registry import registry
+
+from src.utils import array
+from src.instrumentation import instrumentation, QUERY, ANT_UPDATE, PHEROMONE_UPDATE
+from src.settings import all_params
+
 
 class World(ABC):
     """
@@ -10,8 +24,137 @@ class World(ABC):
             It inherits from ABC.
             All the abstract methods here will be overridden by their implementation in kd_tree_and_dict.py
 
+            Pheromone is not stored as objects in the world but in one PheromoneField per player, which all
+            implementations share through this class. The same goes for the state of the ants, which lives in one
+            AntPopulation so that all workers and all scouts are updated together.
+
     """
 
+    def __init__(self, rng=None):
+        """
+
+        :param rng: (Generator) random generator for the ants of the world, a fresh one if None
+
+        """
+        self.pheromone_fields = {}
+        self.population = AntPopulation(rng=rng)
+
+    def get_pheromone_field(self, player):
+        """ Return the pheromone field of a player, creating it when it is first needed
+
+        :param player: (Player) owner of the field
+        :return: (PheromoneField) the field of the player
+
+        """
+        field = self.pheromone_fields.get(player)
+        if field is None:
+            field = self.pheromone_fields[player] = PheromoneField(player)
+        return field
+
+    @instrumentation.timed(PHEROMONE_UPDATE)
+    def decay_pheromones(self):
+        """Decay the pheromone fields of all players for one iteration"""
+        for field in self.pheromone_fields.values():
+            field.decay_all()
+
+    @instrumentation.timed(ANT_UPDATE)
+    def update_ants(self, ants, noticeable_objects):
+        """ Update ants for one iteration. The workers and the scouts of the population of the world are updated with
+        one batched call, all other ants one by one.
+
+        :param ants: (list) the ants to be updated
+        :param noticeable_objects: (dict) maps ant ids to the list of objects the ant perceives
+        :return: (list) the ants that died
+
+        """
+        batches = {WORKER: [], SCOUT: []}
+        others = []
+        population = self.population
+        for ant in ants:
+            if ant.population is population and ant.kind in batches:
+                batches[ant.kind].append(ant)
+            else:
+                others.append(ant)
+
+        # Batched ants without energy left die before their update, as Ant.update does for all others
+        dead = []
+        slots = {}
+        for kind, batch in batches.items():
+            slots[kind] = np.array([ant.slot for ant in batch], dtype=np.intp)
+            alive = population.energy[slots[kind]] > all_params.ant_model_params.min_energy
+            if not np.all(alive):
+                dead.extend(ant for ant, is_alive in zip(batch, alive) if not is_alive)
+                batches[kind] = [ant for ant, is_alive in zip(batch, alive) if is_alive]
+                slots[kind] = slots[kind][alive]
+
+        if batches[WORKER] or batches[SCOUT]:
+            fields = [self.get_pheromone_field(nest.owner) for nest in population.nests]
+            population.update(slots[WORKER], [noticeable_objects[ant.id] for ant in batches[WORKER]],
+                              slots[SCOUT], [noticeable_objects[ant.id] for ant in batches[SCOUT]], fields)
+
+        for ant in others:
+            if ant.update(noticeable_objects[ant.id], self.get_pheromone_field(ant.owner)) is None:
+                dead.append(ant)
+        return dead
+
+    @instrumentation.timed(QUERY)
+    def _get_noticeable_objects(self, ants):
+        """ Look up the food every ant can perceive, with one query per ant type
+
+        :param ants: (list) all ants in the world
+        :return: (dict) maps ant ids to the list of objects within their perception radius
+
+        """
+        noticeable_objects = {}
+        for ant_type, radius in ((Worker, all_params.tree_model_params.circular_region_radius_worker),
+                                 (Scout, all_params.tree_model_params.circular_region_radius_scout)):
+            ants_of_type = [ant for ant in ants if isinstance(ant, ant_type)]
+            if ants_of_type:
+                regions = self.get_circular_region_list(self.get_ant_positions(ants_of_type), radius,
+                                                        object_type=Food)
+                noticeable_objects.update(zip((ant.id for ant in ants_of_type), regions))
+        return noticeable_objects
+
+    def get_ant_positions(self, ants):
+        """ Return the positions of ants. For the ants of the population of the world they are read from its position
+        column at once, instead of one ant attribute at a time.
+
+        :param ants: (list) the ants
+        :return: (array) their positions, one per row
+
+        """
+        population = self.population
+        if all(ant.population is population for ant in ants):
+            return population.position[[ant.slot for ant in ants]]
+        return array([ant.position for ant in ants]).reshape(-1, 2)
+
+    def create_ants(self, nest, ant_type, amount):
+        """ Create new ant objects in a specific nest with the given amount, they are added with insert_objects
+
+        :param nest: nest object where new ants should be created
+        :param ant_type: (string) Has to be one of "worker" or "scout"
+        :param amount: (int) number of ants that should be created
+
+        """
+        if ant_type == "worker":
+            CorrectAnt = Worker
+        elif ant_type == "scout":
+            CorrectAnt = Scout
+        else:
+            raise ValueError("Incorrect Ant type passed at ant creation.")
+
+        self.insert_objects([CorrectAnt(nest.owner, nest, population=self.population) for _ in range(amount)])
+
+    def release_object(self, obj):
+        """ Free the handle of an object that was removed from the world, and the population row of an ant
+
+        :param obj: (GameObject) the removed object
+
+        """
+        if isinstance(obj, Ant):
+            obj.population.remove(obj)
+        registry.release(obj.id)
+
     @abstractmethod
     def get_k_nearest(self, position, k):
         """ Return k nearest ants to specific position
@@ -22,18 +165,19 @@ class World(ABC):
         raise NotImplementedError("Please use subclassing.")
 
     @abstractmethod
-    def get_at_position(self, position):
+    def get_at_position(self, position, object_type=None):
         """ Return all the objects (ants/food/nest) in specific given position"""
         raise NotImplementedError("Please use subclassing.")
 
     @abstractmethod
-    def get_rectangle_region(self, top_left, bottom_right):
+    def get_rectangle_region(self, top_left, bottom_right, object_type=None):
         """Return all the objects in the given rectangular region"""
         raise NotImplementedError("Please use subclassing.")
 
     @abstractmethod
-    def get_circular_region(self, center, radius):
-        """Return all the objects in the given circular region"""
+    def get_circular_region(self, center, radius, object_type=None):
+        """Return all the objects in the given circular region.
+        Like all region queries, it only returns objects of object_type (a type or tuple of types) if one is given."""
         raise NotImplementedError("Please use subclassing.")
 
     # @abstractmethod
@@ -42,10 +186,10 @@ class World(ABC):
     #     # Inheriting class should return k nearest neighbours of the passed position
     #     raise NotImplementedError("Please use subclassing.")
 
-    # @abstractmethod
-    # def get_circular_region_list(self, center_list, radius_list):
-    #     """ Return all the objects in each of the circles of interest"""
-    #     raise NotImplementedError("Please use subclassing.")
+    @abstractmethod
+    def get_circular_region_list(self, center_list, radius_list, object_type=None):
+        """ Return all the objects in each of the circles of interest, answering all of them at once"""
+        raise NotImplementedError("Please use subclassing.")
 
     @abstractmethod
     def update(self):
@@ -58,13 +202,18 @@ class World(ABC):
         raise NotImplementedError("Please use subclassing.")
 
     @abstractmethod
-    def create_ants(self, nest, ant_type, amount):
-        """ Create new ant objects in a specific nest with the given amount and update the tree"""
+    def create_food(self, position_list, size_list):
+        """Create new food objects with specific positions/size and update the tree"""
         raise NotImplementedError("Please use subclassing.")
 
     @abstractmethod
-    def create_food(self, position_list, size_list):
-        """Create new food objects with specific positions/size and update the tree"""
+    def insert_objects(self, objects):
+        """Insert game objects that were created outside of the world, e.g. ants moving in from another world"""
+        raise NotImplementedError("Please use subclassing.")
+
+    @abstractmethod
+    def remove_objects(self, objects):
+        """Remove game objects from the world and release them"""
         raise NotImplementedError("Please use subclassing.")
 
     # @abstractmethod
@@ -81,3 +230,51 @@ class World(ABC):
         """Get all the nest objects"""
         raise NotImplementedError("Please use subclassing.")
 
+
+def get_partition_type(partition_types, obj):
+    """ Find the partition of a type-partitioned world an object belongs to
+
+    :param partition_types: (tuple) the types the world keeps separate indices for
+    :param obj: (GameObject) the object
+    :return: (type) the first partition type the object is an instance of
+
+    """
+    for partition_type in partition_types:
+        if isinstance(obj, partition_type):
+            return partition_type
+    raise ValueError("No partition for objects of type {}.".format(type(obj).__name__))
+
+
+def rectangle_bounds(top_left, bottom_right):
+    """ Convert the corners of a rectangle to the bounds of its coordinates
+
+    :param top_left: (list) Coordinates of top left point of the rectangle
+    :param bottom_right: (list) Coordinates of bottom right point of the rectangle
+    :return lower: (array) smallest x and y in the rectangle
+    :return upper: (array) largest x and y in the rectangle
+
+    """
+    return np.array([top_left[0], bottom_right[1]]), np.array([bottom_right[0], top_left[1]])
+
+
+def get_partitions(partition_types, object_type):
+    """ Find the partitions of a type-partitioned world that can hold objects of a type
+
+    :param partition_types: (tuple) the types the world keeps separate indices for
+    :param object_type: (type or tuple of types) type of the wanted objects, None for all
+    :return: (list) tuples of a partition type and the type its objects still have to be filtered by, or None if all
+             objects of the partition are wanted
+
+    """
+    if object_type is None:
+        return [(partition_type, None) for partition_type in partition_types]
+    if not isinstance(object_type, tuple):
+        object_type = (object_type,)
+
+    partitions = []
+    for partition_type in partition_types:
+        if issubclass(partition_type, object_type):
+            partitions.append((partition_type, None))
+        elif any(issubclass(wanted, partition_type) for wanted in object_type):
+            partitions.append((partition_type, object_type))
+    return partitions
@@ -7,12 +7,18 @@ class ControllerParams:
         super(ControllerParams, self).__init__()
         self.framerate = framerate
         self.create_ant_time = 1
+        # Updates of the game per second, independent of the frame rate
+        self.tick_rate = 30
+        # A simulation that falls further behind than this many ticks skips them instead of catching up
+        self.max_catch_up_ticks = 5
 
 
 class ModelParams:
 
     def __init__(self):
         super(ModelParams, self).__init__()
+        # Ticks from one keyframe of a replay to the next, seeking replays at most this many ticks of changes
+        self.replay_keyframe_interval = 100
 
 
 class AntModelParams:
@@ -41,7 +47,6 @@ class AntModelParams:
         self.min_dist_to_food = 1.5
         self.min_dist_to_nest_scout = 4.
         self.min_dist_to_food_scout = 4.
-        self.max_dist_to_pheromone = 1.
 
         # Ant features
         # self.foodiness = 1.
@@ -70,10 +75,11 @@ class PheromoneModelParams:
 
     def __init__(self):
         super(PheromoneModelParams, self).__init__()
-        self.initial_strength = 1.  # TODO comment out initial_strength after pheromone.py an ABC
         self.min_strength = 1e-8
-        self.added_strength = 1
         self.decay_factor = 0.75
+        # Side length of the square area covered by a pheromone field, centered at the origin, and of its cells
+        self.field_size = 2000.
+        self.field_cell_size = 2.
 
 
 class TreeModelParams:
@@ -82,12 +88,24 @@ class TreeModelParams:
         super(TreeModelParams, self).__init__()
         self.circular_region_radius_scout = 60
         self.circular_region_radius_worker = 30
+        # Which World implementation GameState uses, see game_state.world_types
+        self.world_type = "kd_tree"
 
 
 class ViewParams:
 
     def __init__(self):
         super(ViewParams, self).__init__()
+        # Ant sprites are rotated to one of this many angles
+        self.rotation_steps = 64
+        # Ants are faded by health to one of this many opacity levels
+        self.alpha_steps = 16
+        # At most this many rotated sprites are kept, None for all sprites of sprite_cache_colors player colors
+        self.sprite_cache_size = None
+        self.sprite_cache_colors = 2
+        # At most this many rendered texts and scaled images are kept
+        self.text_cache_size = 512
+        self.scaled_cache_size = 256
 
 
 class AllParams:
@@ -0,0 +1,140 @@
+"""
+Headless simulation runner, to run and time the model without pygame or a display.
+It never imports src.view or src.controller.
+
+Usage: python -m src.sim --players 2 --workers 1000 --scouts 100 --ticks 200
+       python -m src.sim --ticks 10000 --record runs/long  # then python main.py runs/long to watch it
+"""
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+from src.instrumentation import instrumentation
+from src.model.game_state import GameState, world_types
+from src.model.replay import ReplayWriter
+from src.model.tiled_game_state import TiledGameState
+from src.model.player import Player
+from src.settings import all_params
+from src.utils import array
+
+
+def build_game_state(n_players, n_workers, n_scouts, n_food, world_type=None, seed=None, tiles=None):
+    """ Create a game with ants in every nest and additional food
+
+    :param n_players: (int) number of players, each of them gets one nest
+    :param n_workers: (int) number of workers per nest
+    :param n_scouts: (int) number of scouts per nest
+    :param n_food: (int) number of food sources added to the ones every game starts with
+    :param world_type: (string) name of the World implementation, see game_state.world_types
+    :param seed: (int) seed of the game, random if None
+    :param tiles: (tuple) number of tiles along x and y to split the map into, one process each, or None for one
+                  world in this process
+    :return: (GameState) the game
+
+    """
+    players = [Player("Player {}".format(i), (0, 0, 0)) for i in range(n_players)]
+    if tiles is None:
+        game_state = GameState(players, world_type=world_type, seed=seed)
+    else:
+        game_state = TiledGameState(players, world_type=world_type, seed=seed, shape=tuple(tiles))
+    for nest in game_state.get_nests():
+        game_state.create_ants(nest, "worker", n_workers)
+        game_state.create_ants(nest, "scout", n_scouts)
+    if n_food:
+        game_state.generate_random_food(array([-250, 250]), array([250, -250]), n_food, [5] * n_food)
+    return game_state
+
+
+def map_region():
+    """ Corners of the area covered by the pheromone fields, the area recordings are taken of
+
+    :return: (tuple) top left and bottom right corner
+    """
+    half_size = all_params.pheromone_model_params.field_size / 2
+    return array([-half_size, half_size]), array([half_size, -half_size])
+
+
+def run(game_state, ticks, recorder=None):
+    """ Update a game for a number of ticks as fast as possible
+
+    :param game_state: (GameState) the game
+    :param ticks: (int) number of updates
+    :param recorder: (ReplayWriter) records the objects of the map after every update, not timed
+    :return: (array) duration of every tick in seconds
+
+    """
+    tick_times = np.empty(ticks)
+    for tick in range(ticks):
+        start = perf_counter()
+        game_state.update()
+        tick_times[tick] = perf_counter() - start
+        instrumentation.end_tick()
+        if recorder is not None:
+            recorder.append(game_state.tick, game_state.get_objects_in_region(*map_region()))
+    return tick_times
+
+
+def summarize(tick_times):
+    """ Compute statistics of tick durations
+
+    :param tick_times: (array) duration of every tick in seconds
+    :return: (dict) mean, percentiles and maximum in milliseconds, and ticks per second
+
+    """
+    p50, p95, p99 = np.percentile(tick_times, [50, 95, 99]) * 1e3
+    return {"ticks": len(tick_times), "mean_ms": tick_times.mean() * 1e3, "p50_ms": p50, "p95_ms": p95,
+            "p99_ms": p99, "max_ms": tick_times.max() * 1e3, "ticks_per_s": len(tick_times) / tick_times.sum()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ant model without a view and print tick times.")
+    parser.add_argument("--players", type=int, default=2, help="number of players (one nest each)")
+    parser.add_argument("--workers", type=int, default=1000, help="workers per nest")
+    parser.add_argument("--scouts", type=int, default=0, help="scouts per nest")
+    parser.add_argument("--food", type=int, default=0, help="food sources added to the default ones")
+    parser.add_argument("--ticks", type=int, default=100, help="number of updates to time")
+    parser.add_argument("--warmup", type=int, default=5, help="number of updates to run before timing")
+    parser.add_argument("--world", choices=sorted(world_types), default=all_params.tree_model_params.world_type,
+                        help="World implementation")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the game, random if not given")
+    parser.add_argument("--phases", action="store_true", help="also print the time spent per phase of a tick")
+    parser.add_argument("--tiles", type=int, nargs=2, default=None, metavar=("X", "Y"),
+                        help="split the map into X by Y tiles updated by one process each")
+    parser.add_argument("--record", default=None, metavar="PATH",
+                        help="record the timed ticks into a new directory, to play them with main.py")
+    parser.add_argument("--keyframe-interval", type=int, default=None,
+                        help="ticks from one keyframe of the recording to the next")
+    args = parser.parse_args(argv)
+
+    start = perf_counter()
+    game_state = build_game_state(args.players, args.workers, args.scouts, args.food, args.world, args.seed,
+                                  args.tiles)
+    setup_time = perf_counter() - start
+    run(game_state, args.warmup)
+    if args.phases:
+        instrumentation.reset()
+        instrumentation.enable()
+    recorder = None
+    if args.record is not None:
+        recorder = ReplayWriter(args.record, game_state.players, args.keyframe_interval)
+    stats = summarize(run(game_state, args.ticks, recorder))
+    instrumentation.disable()
+    if recorder is not None:
+        recorder.close()
+
+    n_ants = len(game_state.get_ants())
+    if args.tiles is not None:
+        game_state.close()
+    print("world {}, {} players, {} ants, setup {:.2f} s".format(args.world, args.players, n_ants, setup_time))
+    print("{ticks} ticks: mean {mean_ms:.2f} ms, p50 {p50_ms:.2f} ms, p95 {p95_ms:.2f} ms, p99 {p99_ms:.2f} ms, "
+          "max {max_ms:.2f} ms, {ticks_per_s:.1f} ticks/s".format(**stats))
+    if args.phases:
+        for name, percentiles in instrumentation.summary().items():
+            times = ", ".join("{} {:.2f} ms".format(p, value * 1e3) for p, value in percentiles.items())
+            print("  {}: {}".format(name, times))
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Parameter sweep, to tune the ants without playing. Every combination of a grid of parameters is played headless a
+number of times with independent seeds, on a pool of processes, and the food the nests collected is summarized
+per combination.
+
+A parameter is either an ant trait (foodiness, inscentiveness, directionism, explorativeness, speed,
+loading_capacity), set for all ants or with a worker. or scout. prefix for one kind of ant, or a setting given as
+<params>.<name>, for example ant_model_params.energy_increase or pheromone_model_params.decay_factor.
+
+Usage: python -m src.sweep --grid speed=1,2,4 scout.foodiness=0.5,1 pheromone_model_params.decay_factor=0.5,0.75
+"""
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+
+import numpy as np
+
+from src.model.ant_population import WORKER, SCOUT
+from src.model.game_state import world_types
+from src.settings import all_params
+from src.sim import build_game_state
+
+ant_traits = ("foodiness", "inscentiveness", "directionism", "explorativeness", "speed", "loading_capacity")
+ant_kinds = {"worker": WORKER, "scout": SCOUT}
+
+
+def expand_grid(grid):
+    """ List every combination of the values of a grid
+
+    :param grid: (dict) values to try per parameter name
+    :return: (list) one dict of parameter values per combination
+
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _ant_trait(name):
+    """(kind of ant or None for all ants, trait) of a parameter, None if it is a setting"""
+    prefix, _, attribute = name.rpartition(".")
+    if attribute in ant_traits and (prefix == "" or prefix in ant_kinds):
+        return ant_kinds.get(prefix), attribute
+    return None
+
+
+def _setting(name):
+    """(parameter object of all_params, attribute) of a setting"""
+    prefix, _, attribute = name.rpartition(".")
+    params = getattr(all_params, prefix, None) if prefix else None
+    if params is None or not hasattr(params, attribute):
+        raise ValueError("Unknown parameter {}.".format(name))
+    return params, attribute
+
+
+def check_parameters(names):
+    """ Make sure parameter names are ant traits or settings
+
+    :param names: (iterable) the names
+    :return:
+
+    """
+    for name in names:
+        if _ant_trait(name) is None:
+            _setting(name)
+
+
+@contextmanager
+def settings(parameters):
+    """ Change settings of all_params for the duration of a with block
+
+    :param parameters: (dict) parameter values, ant traits are ignored
+    :return:
+
+    """
+    changed = []
+    try:
+        for name, value in parameters.items():
+            if _ant_trait(name) is None:
+                params, attribute = _setting(name)
+                changed.append((params, attribute, getattr(params, attribute)))
+                setattr(params, attribute, value)
+        yield
+    finally:
+        for params, attribute, value in reversed(changed):
+            setattr(params, attribute, value)
+
+
+def set_ant_traits(game_state, parameters):
+    """ Set the traits of all ants of a game
+
+    :param game_state: (GameState) the game
+    :param parameters: (dict) parameter values, settings are ignored
+    :return:
+
+    """
+    population = game_state.world.population
+    slots = np.array([ant.slot for ant in game_state.get_ants()], dtype=np.intp)
+    for name, value in parameters.items():
+        trait = _ant_trait(name)
+        if trait is None:
+            continue
+        kind, attribute = trait
+        selected = slots if kind is None else slots[population.kind[slots] == kind]
+        getattr(population, attribute)[selected] = value
+
+
+def run_once(parameters, seed, n_players=2, n_workers=100, n_scouts=10, n_food=20, ticks=300, world_type=None):
+    """ Play one game with a combination of parameters
+
+    :param parameters: (dict) parameter values
+    :param seed: (int) seed of the game
+    :param n_players: (int) number of players, each of them gets one nest
+    :param n_workers: (int) number of workers per nest
+    :param n_scouts: (int) number of scouts per nest
+    :param n_food: (int) number of food sources added to the ones every game starts with
+    :param ticks: (int) number of updates
+    :param world_type: (string) name of the World implementation, see game_state.world_types
+    :return: (dict) the parameters, the seed and the food the nests collected in total and per nest and tick
+
+    """
+    with settings(parameters):
+        game_state = build_game_state(n_players, n_workers, n_scouts, n_food, world_type, seed)
+        set_ant_traits(game_state, parameters)
+        nests = game_state.get_nests()
+        start = sum(nest.food for nest in nests)
+        for _ in range(ticks):
+            game_state.update()
+        food = sum(nest.food for nest in nests) - start
+    return dict(parameters, seed=seed, food=food, food_per_nest_tick=food / (len(nests) * ticks))
+
+
+def _run_once(args):
+    parameters, seed, game = args
+    return run_once(parameters, seed, **game)
+
+
+def sweep(grid, runs=1, seed=None, processes=None, **game):
+    """ Play every combination of a grid of parameters on a pool of processes
+
+    :param grid: (dict) values to try per parameter name
+    :param runs: (int) number of games per combination, each with its own seed
+    :param seed: (int) seed the seeds of the games are drawn from, random if None
+    :param processes: (int) number of processes, one per core if None
+    :param game: keyword arguments of run_once describing the games
+    :return: (list) result of run_once per game, in the order of the combinations
+
+    """
+    check_parameters(grid)
+    points = expand_grid(grid)
+    seeds = np.random.SeedSequence(seed).generate_state(len(points) * runs).tolist()
+    tasks = [(point, seeds[i * runs + run], game) for i, point in enumerate(points) for run in range(runs)]
+    if processes is None:
+        processes = os.cpu_count()
+    # Spawned, since the games must not inherit settings changed in this process
+    with ProcessPoolExecutor(processes, mp_context=get_context("spawn")) as executor:
+        return list(executor.map(_run_once, tasks))
+
+
+def aggregate(results, names):
+    """ Summarize the games of every combination of parameters
+
+    :param results: (list) results of run_once
+    :param names: (list) names of the parameters
+    :return: (list) one dict per combination with the parameter values, the number of games and the mean, standard
+             deviation, minimum and maximum of the collected food and its mean per nest and tick
+
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault(tuple(result[name] for name in names), []).append(result)
+    rows = []
+    for values, group in groups.items():
+        food = np.array([result["food"] for result in group])
+        per_nest_tick = np.mean([result["food_per_nest_tick"] for result in group])
+        rows.append(dict(zip(names, values), runs=len(group), food_mean=food.mean(), food_std=food.std(),
+                         food_min=food.min(), food_max=food.max(), food_per_nest_tick=per_nest_tick))
+    return rows
+
+
+def format_table(rows):
+    """ Format rows of aggregate as a text table
+
+    :param rows: (list) dicts with the same keys
+    :return: (str) the table
+
+    """
+    if not rows:
+        return ""
+    names = list(rows[0])
+    cells = [names] + [["{:.4g}".format(row[name]) if isinstance(row[name], float) else str(row[name])
+                        for name in names] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(names))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells)
+
+
+def parse_grid(items):
+    """ Parse grid arguments of the form name=value,value
+
+    :param items: (list) the arguments
+    :return: (dict) values per parameter name
+
+    """
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if not values:
+            raise ValueError("Expected name=value,value but got {}.".format(item))
+        grid[name] = [float(value) for value in values.split(",")]
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play headless games for every combination of a parameter grid and "
+                                                 "print the food the nests collected.")
+    parser.add_argument("--grid", nargs="+", required=True, metavar="NAME=V1,V2",
+                        help="values per parameter, an ant trait or <params>.<name> of the settings")
+    parser.add_argument("--runs", type=int, default=3, help="games per combination")
+    parser.add_argument("--ticks", type=int, default=300, help="updates per game")
+    parser.add_argument("--players", type=int, default=2, help="number of players (one nest each)")
+    parser.add_argument("--workers", type=int, default=100, help="workers per nest")
+    parser.add_argument("--scouts", type=int, default=10, help="scouts per nest")
+    parser.add_argument("--food", type=int, default=20, help="food sources added to the default ones")
+    parser.add_argument("--world", choices=sorted(world_types), default=all_params.tree_model_params.world_type,
+                        help="World implementation")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the sweep, random if not given")
+    parser.add_argument("--processes", type=int, default=None, help="number of processes, one per core by default")
+    parser.add_argument("--output", default=None, help="CSV file to write the result of every game to")
+    args = parser.parse_args(argv)
+
+    grid = parse_grid(args.grid)
+    results = sweep(grid, args.runs, args.seed, args.processes, n_players=args.players, n_workers=args.workers,
+                    n_scouts=args.scouts, n_food=args.food, ticks=args.ticks, world_type=args.world)
+    if args.output is not None:
+        with open(args.output, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    rows = aggregate(results, list(grid))
+    print(format_table(sorted(rows, key=lambda row: -row["food_mean"])))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,6 @@ to keep memory constant.
 """
 
 import numpy as np
-from time import time
-from functools import wraps
 
 dtype = np.float32
 
@@ -52,21 +50,3 @@ def get_objects_of_type(list_objects, target_type):
             sublist.append(obj)
     return sublist
 
-
-def timing(f):
-    """
-    Attributed to яүυк from Stackexchange.
-    Prints the time a function needed to execute.
-    :param f: function
-    :return:
-    """
-
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        start = time()
-        result = f(*args, **kwargs)
-        end = time()
-        print('Time: {} : {}'.format(f.__name__, end - start))
-        return result
-
-    return wrapper
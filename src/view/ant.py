@@ -1,6 +1,5 @@
-import pygame
-import math
 from .view_element import ViewElement
+from .sprite_cache import sprite_cache
 
 
 class Ant(ViewElement):
@@ -9,29 +8,22 @@ class Ant(ViewElement):
     def __init__(self, view, identifier, x, y, color, direction, health):
         super(Ant, self).__init__(view, identifier, x, y, width=64, height=64)
         self.z_index = 9
+        self.reset(identifier, x, y, color, direction, health)
+
+    def reset(self, identifier, x, y, color, direction, health):
+        """Show another ant, elements of ants that left the screen are reused for new ones"""
+        self.identifier = identifier
+        self.x, self.y = int(x), int(y)
         self.direction = direction
         self.health = health
         self.has_food = False
         self.color = color
-        name = "_".join((str(c) for c in self.color))
-        self.img = pygame.image.load(f"src/view/images/{name}_worker.png")
-        self.img_food = pygame.image.load(f"src/view/images/{name}_worker_food.png")
 
     def draw(self):
-        ant_img = self.img_food if self.has_food else self.img
-        
-        rotation = math.atan2(self.direction[0], self.direction[1]) * (180 / math.pi) * -1
-        ant_img = pygame.transform.rotate(ant_img, rotation)
-        loc = ant_img.get_rect().center
-        loc = (self.x - (loc[0]), self.y - (loc[1]))
-        
-        self.blit_alpha(self.view.screen, ant_img, loc, (self.health * 255) / Ant.MAX_HEALTH)
+        self.view.screen.blit(*self.sprite())
 
-    def blit_alpha(self, screen, image, location, opacity):
-        x = location[0]
-        y = location[1]
-        temp = pygame.Surface((image.get_width(), image.get_height())).convert()
-        temp.blit(screen, (-x, -y))
-        temp.blit(image, (0, 0))
-        temp.set_alpha(opacity)
-        screen.blit(temp, location)
+    def sprite(self):
+        # Rotated sprites are shared by all ants, pre-faded by health, and only computed the first time they are needed
+        opacity = (self.health * 255) / Ant.MAX_HEALTH
+        ant_img = sprite_cache.get(self.color, "worker", self.has_food, self.direction, opacity)
+        return ant_img, (self.x - ant_img.get_width() // 2, self.y - ant_img.get_height() // 2)
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+
+import pygame
+
+from src.settings import all_params
+
+IMAGE_DIRECTORY = "src/view/images"
+GARAMOND = "Garamond_Regular.ttf"
+# Images that exist once per player color, named <r>_<g>_<b>_<name>.png
+COLORED_IMAGES = ("worker", "worker_food", "scout", "soldier", "nest", "build_worker")
+
+
+def color_name(color):
+    return "_".join(str(c) for c in color)
+
+
+class Assets:
+    """
+            A class used to load every image and font from disk only once and share it between all view elements.
+            Images are converted to the pixel format of the display, so blitting them does not convert them again on
+            every frame. Images loaded before the display was opened are converted the first time they are asked for
+            afterwards. Scaled images and rendered texts are kept as well, the least recently used ones are dropped
+            once more than scaled_capacity or text_capacity are stored.
+
+            ...
+
+            Attributes
+            ----------
+            directory: str
+                the directory the colored images are loaded from
+            scaled_capacity: int
+                maximum number of scaled images kept
+            text_capacity: int
+                maximum number of rendered texts kept
+
+            Methods
+            -------
+            load(path)
+                Return the image of a file
+
+            scaled(path, size)
+                Return the image of a file scaled to a size
+
+            colored(color, name)
+                Return one of the images that exist per player color
+
+            preload(color)
+                Load all images of a player color
+
+            font(face, size, system=False)
+                Return the font of a file, or of an installed font if system is True, in a size
+
+            text(text, color, size, face=None, system=False)
+                Return a text rendered with a font, it is only rendered again when the text, color or size changes
+
+            clear()
+                Drop all images, fonts and texts, for example after the display was opened again
+
+    """
+
+    def __init__(self, directory=IMAGE_DIRECTORY, text_capacity=None, scaled_capacity=None):
+        if text_capacity is None:
+            text_capacity = all_params.view_params.text_cache_size
+        if scaled_capacity is None:
+            scaled_capacity = all_params.view_params.scaled_cache_size
+        self.directory = directory
+        self.text_capacity = text_capacity
+        self.scaled_capacity = scaled_capacity
+        self._images = {}
+        self._scaled = OrderedDict()
+        self._fonts = {}
+        self._texts = OrderedDict()
+        # Keys of the images and scaled images that were loaded before the display was opened
+        self._unconverted = set()
+
+    def load(self, path):
+        image = self._images.get(path)
+        if image is None:
+            image = self._images[path] = self._convert(path, pygame.image.load(path))
+        elif path in self._unconverted:
+            image = self._images[path] = self._convert(path, image)
+        return image
+
+    def scaled(self, path, size):
+        key = (path, size)
+        image = self._scaled.get(key)
+        if image is None:
+            image = self._convert(key, pygame.transform.scale(self.load(path), size))
+            return self._remember(self._scaled, key, image, self.scaled_capacity)
+        self._scaled.move_to_end(key)
+        if key in self._unconverted:
+            image = self._scaled[key] = self._convert(key, image)
+        return image
+
+    def colored_path(self, color, name):
+        return f"{self.directory}/{color_name(color)}_{name}.png"
+
+    def colored(self, color, name):
+        return self.load(self.colored_path(color, name))
+
+    def preload(self, color):
+        for name in COLORED_IMAGES:
+            self.colored(color, name)
+
+    def font(self, face, size, system=False):
+        key = (face, size, system)
+        font = self._fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(face, size) if system else pygame.font.Font(face, size)
+            self._fonts[key] = font
+        return font
+
+    def text(self, text, color, size, face=None, system=False):
+        key = (text, tuple(color), size, face, system)
+        surface = self._texts.get(key)
+        if surface is not None:
+            self._texts.move_to_end(key)
+            return surface
+        surface = self.font(face, size, system).render(text, True, color)
+        return self._remember(self._texts, key, surface, self.text_capacity)
+
+    def clear(self):
+        self._images = {}
+        self._scaled = OrderedDict()
+        self._fonts = {}
+        self._texts = OrderedDict()
+        self._unconverted = set()
+
+    def _convert(self, key, image):
+        # Converting needs an open display, images loaded before stay in their file format until it is open
+        if pygame.display.get_surface() is None:
+            self._unconverted.add(key)
+            return image
+        self._unconverted.discard(key)
+        return image.convert_alpha()
+
+    def _remember(self, cache, key, value, capacity):
+        # Least recently used caches drop their oldest entry once more than capacity are stored
+        cache[key] = value
+        if len(cache) > capacity:
+            dropped, _ = cache.popitem(last=False)
+            self._unconverted.discard(dropped)
+        return value
+
+
+assets = Assets()
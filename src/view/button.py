@@ -1,5 +1,6 @@
 import pygame
 from .ui_element import UIElement
+from .assets import assets
 
 
 class Button(UIElement):
@@ -24,7 +25,7 @@ class Button(UIElement):
             pass
         if self.shape == 'circle':
             if self.has_image is True:
-                image = pygame.transform.scale(pygame.image.load(self.image_path), (self.width, self.height))
+                image = assets.scaled(self.image_path, (self.width, self.height))
                 self.view.screen.blit(image,
                                       pygame.Rect(self.x - (self.width // 2), self.y - (self.height // 2), self.width,
 
@@ -34,7 +35,7 @@ class Button(UIElement):
 
         elif self.shape == 'square':
             if self.has_image is True:
-                image = pygame.transform.scale(pygame.image.load(self.image_path), (self.width, self.height))
+                image = assets.scaled(self.image_path, (self.width, self.height))
                 self.view.screen.blit(image, pygame.Rect(self.x, self.y, self.width, self.height))
             else:
                 pygame.draw.rect(self.view.screen, self.color, (self.x, self.y, self.width, self.height))
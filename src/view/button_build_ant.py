@@ -1,6 +1,7 @@
 import math
 import pygame
 from .button import Button
+from .assets import assets
 
 from src.settings import all_params
 
@@ -19,9 +20,8 @@ class BuildAntButton(Button):
         self.counter = 0
         self._loading_angle = 0
         self.color_background = (0, 0, 0)
-        name = "_".join((str(c) for c in self.color))
-        self.image_path = f"src/view/images/{name}_build_worker.png"
-        self.image = pygame.image.load(self.image_path)
+        self.image_path = assets.colored_path(self.color, "build_worker")
+        self.image = assets.load(self.image_path)
 
     def draw(self):
         if self.state == STATE_BUTTON:
@@ -66,8 +66,7 @@ class BuildAntButton(Button):
 
     def counter_text(self):
         self.fontsize = int(self.xradius) + 10
-        largeText = pygame.font.SysFont('Garamond_Bold.ttf', self.fontsize)
-        TextSurf = largeText.render(str(self.counter), True, (255, 255, 255))
+        TextSurf = assets.text(str(self.counter), (255, 255, 255), self.fontsize, 'Garamond_Bold.ttf', system=True)
         TextRect = TextSurf.get_rect()
         TextRect.center = (self.x, self.y)
         self.view.screen.blit(TextSurf, TextRect)
@@ -1,5 +1,6 @@
 from .dialog_box import DialogBox
 from .slider import Slider
+from .assets import assets
 import pygame
 
 
@@ -34,7 +35,7 @@ class DialogBoxNest(DialogBox):
         super(DialogBoxNest, self).draw()
         if self.active:
             pygame.draw.rect(self.view.screen, pygame.Color("black"), self.rect, 2)
-            txt_surface = self.view.FONT.render(self.name, True, pygame.Color("black"))
+            txt_surface = assets.text(self.name, pygame.Color("black"), self.view.FONT_SIZE)
             self.view.screen.blit(txt_surface, (self.rect.x + 10, self.rect.y + 10))
         else:
             if self.show_sliders is False:
@@ -1,5 +1,6 @@
 import pygame
 from .view_element import ViewElement
+from .assets import assets
 
 
 class FoodBar(ViewElement):
@@ -19,7 +20,7 @@ class FoodBar(ViewElement):
         pygame.draw.rect(self.view.screen, self.color,
                          (self.x + 5, self.y + 5, relative_width, self.height - 10))
 
-        txt_name = self.view.FONT.render(f"{self.value}/{self.max_value}", True, pygame.Color("black"))
-        txt_width, txt_height = self.view.FONT.size(f"{self.value}/{self.max_value}")
+        txt_name = assets.text(f"{self.value}/{self.max_value}", pygame.Color("black"), self.view.FONT_SIZE)
+        txt_width, txt_height = txt_name.get_size()
         self.view.screen.blit(txt_name, (self.x + self.width / 2 - txt_width / 2,
                                          self.y + self.height / 2 - txt_height / 2))
@@ -1,20 +1,24 @@
-import pygame
 from .view_element import ViewElement
+from .assets import assets, IMAGE_DIRECTORY
 
 class FoodSource(ViewElement):
     def __init__(self, view, identifier, x, y, max_radius, value, max_value=100):
         super(FoodSource, self).__init__(view, identifier, x, y, width=0, height=0)
         self.z_index = 1
+        self.max_value = max_value
+        self.reset(identifier, x, y, max_radius, value)
+
+    def reset(self, identifier, x, y, max_radius, value):
+        """Show another food source, elements of food that left the screen are reused for new ones"""
+        self.identifier = identifier
+        self.x, self.y = int(x), int(y)
         self.max_radius = max_radius
         self.value = value
-        self.max_value = max_value
         self.width = self.height = self._update_width_height()
-        self.image = pygame.image.load("src/view/images/food.png")
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))
 
     def draw(self):
         self.width = self.height = self._update_width_height()
-        image = pygame.transform.scale(self.image, (self.width, self.height))
+        image = assets.scaled(f"{IMAGE_DIRECTORY}/food.png", (self.width, self.height))
         self.view.screen.blit(image, (self.x - self.width / 2, self.y - self.height / 2, self.width, self.height))
     
     def _update_width_height(self):
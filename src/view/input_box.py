@@ -1,5 +1,6 @@
 import pygame
 from .ui_element import UIElement
+from .assets import assets, GARAMOND
 
 
 class InputBox(UIElement):
@@ -10,7 +11,7 @@ class InputBox(UIElement):
         self.shape = shape
         self.color = self.view.background_color
         self.textcolor = (0, 0, 0)
-        self.largeText = pygame.font.Font('Garamond_Regular.ttf', int(0.70 * self.height))
+        self.largeText = assets.font(GARAMOND, int(0.70 * self.height))
         self.txt_surface = self.largeText.render(self.text, True, (190, 190, 190))
         self.on("click", self.click)
         self.on("keyret", self.key_ret)
@@ -35,8 +36,8 @@ class InputBox(UIElement):
         super(InputBox, self).draw()
         self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
         self.linerect = pygame.Rect(self.x, self.y + 0.90 * self.height, self.width, 2)
-        self.largeText = pygame.font.Font('Garamond_Regular.ttf', int(0.70 * self.height))
-        self.txt_surface = self.largeText.render(self.text, True, self.textcolor)
+        self.largeText = assets.font(GARAMOND, int(0.70 * self.height))
+        self.txt_surface = assets.text(self.text, self.textcolor, int(0.70 * self.height), GARAMOND)
 
         width = max(self.width, self.txt_surface.get_width() + 0.10 * self.width)
         self.rect.width = width
@@ -1,4 +1,5 @@
 from .ui_element import UIElement
+from .assets import assets
 import pygame
 
 
@@ -34,6 +35,6 @@ class Slider(UIElement):
         # txt_value = self.view.FONT.render(f"{self.value:.0f}", True, pygame.Color("black"))
         # self.view.screen.blit(txt_value, (self.rect.x + 5, self.rect.y + self.height))
 
-        txt_name = self.view.FONT.render(f"{self.name}", True, pygame.Color("black"))
+        txt_name = assets.text(f"{self.name}", pygame.Color("black"), self.view.FONT_SIZE)
         self.view.screen.blit(txt_name, (self.rect.x + 5, self.rect.y - 20))
 
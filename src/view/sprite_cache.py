@@ -0,0 +1,116 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+from .assets import assets
+from src.settings import all_params
+
+
+class SpriteCache:
+    """
+            A class used to share rotated ant sprites between all ants on screen. Directions are rounded to one of
+            rotation_steps angles and opacities to one of alpha_steps levels, and every sprite is rotated and faded
+            once, the first time it is needed. The least recently used sprites are dropped once more than capacity
+            are stored.
+
+            ...
+
+            Attributes
+            ----------
+            rotation_steps: int
+                number of angles directions are rounded to
+            alpha_steps: int
+                number of opacity levels, from transparent to opaque
+            capacity: int
+                maximum number of rotated sprites kept
+            hits, misses: int
+                number of lookups that found a rotated sprite, or had to rotate one
+
+            Methods
+            -------
+            sprites_per_color()
+                Return the number of different sprites of one player color
+
+            get(color, kind, has_food, direction, opacity=255)
+                Return the sprite of an ant rotated towards its direction and faded to an opacity
+
+            bucket(direction)
+                Return the index of the angle a direction is rounded to
+
+            alpha_level(opacity)
+                Return the index of the level an opacity is rounded to
+
+            clear()
+                Drop all sprites
+
+    """
+
+    def __init__(self, rotation_steps=None, capacity=None, alpha_steps=None):
+        """
+        :param rotation_steps: (int) number of angles directions are rounded to, default from the view parameters
+        :param capacity: (int) maximum number of rotated sprites, default from the view parameters or, if they give
+                         none, all sprites of sprite_cache_colors colors
+        :param alpha_steps: (int) number of opacity levels, default from the view parameters
+        """
+        if rotation_steps is None:
+            rotation_steps = all_params.view_params.rotation_steps
+        if alpha_steps is None:
+            alpha_steps = all_params.view_params.alpha_steps
+        if capacity is None:
+            capacity = all_params.view_params.sprite_cache_size
+        self.rotation_steps = rotation_steps
+        self.alpha_steps = alpha_steps
+        if capacity is None:
+            capacity = self.sprites_per_color() * all_params.view_params.sprite_cache_colors
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._rotated = OrderedDict()
+
+    def __len__(self):
+        return len(self._rotated)
+
+    def sprites_per_color(self):
+        # Workers are faded by health with or without food, scouts are always drawn opaque
+        return self.rotation_steps * (2 * self.alpha_steps + 1)
+
+    def bucket(self, direction):
+        # Angle of the sprite, which points up, counterclockwise in degrees
+        rotation = -math.degrees(math.atan2(direction[0], direction[1]))
+        return round(rotation * self.rotation_steps / 360.) % self.rotation_steps
+
+    def alpha_level(self, opacity):
+        opacity = min(max(opacity, 0.), 255.)
+        return round(opacity * (self.alpha_steps - 1) / 255.)
+
+    def get(self, color, kind, has_food, direction, opacity=255):
+        return self._get((tuple(color), kind, bool(has_food), self.bucket(direction), self.alpha_level(opacity)))
+
+    def _get(self, key):
+        sprite = self._rotated.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self._rotated.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        color, kind, has_food, angle, alpha = key
+        if alpha == self.alpha_steps - 1:
+            image = assets.colored(color, kind + ("_food" if has_food else ""))
+            sprite = pygame.transform.rotate(image, angle * 360. / self.rotation_steps)
+        else:
+            # Scaling the per-pixel alpha of the opaque sprite fades it without a temporary surface per draw
+            sprite = self._get(key[:4] + (self.alpha_steps - 1,)).copy()
+            opacity = round(255 * alpha / (self.alpha_steps - 1))
+            sprite.fill((255, 255, 255, opacity), special_flags=pygame.BLEND_RGBA_MULT)
+        self._rotated[key] = sprite
+        if len(self._rotated) > self.capacity:
+            self._rotated.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        self._rotated = OrderedDict()
+
+
+sprite_cache = SpriteCache()
@@ -1,5 +1,6 @@
 import pygame
 from .ui_element import UIElement
+from .assets import assets, GARAMOND
 
 
 class Text(UIElement):
@@ -11,17 +12,16 @@ class Text(UIElement):
     def set_text(self, text):
         self.text = text
         self.fontsize = self.height
-        largeText = pygame.font.Font('Garamond_Regular.ttf', self.fontsize)
-        self.TextSurf = largeText.render(self.text, True, self.color)
+        self.TextSurf = assets.text(self.text, self.color, self.fontsize, GARAMOND)
         self.TextRect = self.TextSurf.get_rect()
         self.TextRect.topleft = (self.x, self.y)
         self.view.screen.blit(self.TextSurf, self.TextRect)
 
     def draw(self):
         super(Text, self).draw()
+        # Only rendered again when the text, its color or the window size changed
         self.fontsize = self.height
-        largeText = pygame.font.Font('Garamond_Regular.ttf', self.fontsize)
-        self.TextSurf = largeText.render(self.text, True, self.color)
+        self.TextSurf = assets.text(self.text, self.color, self.fontsize, GARAMOND)
         self.TextRect = self.TextSurf.get_rect()
         self.TextRect.topleft = (self.x, self.y)
         self.view.screen.blit(self.TextSurf, self.TextRect)
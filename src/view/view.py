@@ -8,6 +8,7 @@ from .input_box import InputBox
 # from .nest import Nest
 # from .ant import Ant
 from .world import World
+from .assets import assets
 from src.utils import array
 from .dialog_box_nest import DialogBoxNest
 from .dialog_box_add_ants import DialogBoxAddAnts
@@ -41,7 +42,8 @@ class View:
         self.mouse_event = pygame.mouse.get_pressed()
         self.elements = {}
         self.event_dict = {}
-        self.FONT = pygame.font.Font(None, 32)
+        self.FONT_SIZE = 32
+        self.FONT = assets.font(None, self.FONT_SIZE)
         self.pos = [array([-500, 500]), array([500, -500])]
         self.usercolor = None
 
@@ -58,6 +60,8 @@ class View:
         if state == View.GAMEVIEW:
             self.state = View.GAMEVIEW
             self.usercolor = usercolor
+            if usercolor is not None:
+                assets.preload(usercolor)
             self._game_view()
 
     def start_view(self):
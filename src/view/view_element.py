@@ -12,6 +12,10 @@ class ViewElement:
     def draw(self):
         pass
 
+    def sprite(self):
+        """Surface and position to blit in a batch with other elements, None for elements that draw themselves"""
+        return None
+
     def event_handler(self, event):
         pass
 
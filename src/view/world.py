@@ -1,4 +1,4 @@
-from collections import OrderedDict
+from bisect import insort
 
 import pygame
 from pygame import K_UP, K_RIGHT, K_DOWN, K_LEFT, K_PLUS, K_MINUS
@@ -18,7 +18,16 @@ from src.model.food import Food as Model_Food
 class World(ViewElement):
     def __init__(self, view, identifier, x, y, width, height):
         super(World, self).__init__(view, identifier, x, y, width, height)
-        self.game_elements = OrderedDict()
+        # View elements by handle of their model object, and grouped into layers by z-index, drawn lowest first
+        self.game_elements = {}
+        self.layers = {}
+        self.layer_order = []
+        # Last shown state of the model objects
+        self.model_objects = {}
+        # Elements of objects that left the screen, by class, to be reused for objects that enter it
+        self.pool = {}
+        self.synced_tick = None
+        self.origin = None
         self.i = 0
 
     def event_handler(self, event):
@@ -55,51 +64,115 @@ class World(ViewElement):
             pass
 
     def draw(self):
-        for element in self.game_elements.values():
-            element.draw()
-
-    def update(self, game_state):
-        element_ids = []
-        
-        for element in game_state:
-            element_ids.append(element.id)
-            # Update elements
-            if element.id in self.game_elements.keys():
-                view_element = self.game_elements[element.id]
-                view_element.x, view_element.y = self._to_view_coordinates(element.position)
-                if type(element) == Model_Worker:
-                    view_element.direction = element.direction
-                    view_element.has_food = element.has_food
-                if type(element) == Model_Scout:
-                    view_element.direction = element.direction
-                if type(element) == Model_Food:
-                    view_element.value = element.size
-            # Create elements
+        screen = self.view.screen
+        for z_index in self.layer_order:
+            # Sprites are blitted in one batch, elements that draw themselves in between keep their order
+            batch = []
+            for element in self.layers[z_index].values():
+                sprite = element.sprite()
+                if sprite is not None:
+                    batch.append(sprite)
+                    continue
+                if batch:
+                    screen.blits(batch, doreturn=False)
+                    batch = []
+                element.draw()
+            if batch:
+                screen.blits(batch, doreturn=False)
+
+    def update(self, snapshot):
+        """
+        Show a snapshot of the model. When it follows the last shown one and the view did not move, only its spawn,
+        move and despawn events are applied, otherwise all elements are brought up to date
+        :param snapshot: Snapshot of the region in view
+        :return: nothing
+        """
+        origin = (self.view.pos[0][0], self.view.pos[0][1])
+        delta = snapshot.delta
+        if delta is None or delta.base_tick != self.synced_tick or origin != self.origin:
+            self._sync(snapshot)
+        else:
+            for element_id in delta.despawned:
+                self._despawn(element_id)
+            for element in delta.spawned:
+                self._spawn(element)
+            for element in delta.moved:
+                self._move(element)
+        self.synced_tick = snapshot.tick
+        self.origin = origin
+
+    def _sync(self, snapshot):
+        """Update, create and remove elements so they show exactly the objects of a snapshot"""
+        element_ids = set()
+        for element in snapshot:
+            element_ids.add(element.id)
+            shown = self.model_objects.get(element.id)
+            if shown is not None and shown.type is element.type:
+                self._move(element)
             else:
-                view_x, view_y = self._to_view_coordinates(element.position)
-                if hasattr(element, 'owner'):
-                    color = element.owner.color
-
-                if type(element) == Model_Nest:
-                    self.game_elements[element.id] = Nest(self.view, element.id, view_x,
-                                                          view_y, 128, color, element.health)
-
-                elif type(element) == Model_Worker:
-                    self.game_elements[element.id] = Ant(self.view, element.id, view_x, view_y,
-                                                         color, element.direction, element.energy)
-                elif type(element) == Model_Scout:
-                    self.game_elements[element.id] = Scout(self.view, element.id, view_x, view_y,
-                                                           color, element.direction, element.energy)
-                elif type(element) == Model_Food:
-                    self.game_elements[element.id] = FoodSource(self.view, element.id, view_x, view_y, 128, 100)
-                
-                # Establish z-index order
-                self.game_elements = OrderedDict(sorted(self.game_elements.items(), key=lambda x: x[1].z_index))
-
-        # Remove out of view elements
-        for element_id in list(self.game_elements.keys()):
-            if element_id not in element_ids:
-                del self.game_elements[element_id]
+                self._despawn(element.id)
+                self._spawn(element)
+
+        for element_id in [element_id for element_id in self.game_elements if element_id not in element_ids]:
+            self._despawn(element_id)
+
+    def _spawn(self, element):
+        """Create the view element of a model object and put it into the layer of its z-index"""
+        view_x, view_y = self._to_view_coordinates(element.position)
+        color = element.owner.color if element.owner is not None else None
+
+        if element.type is Model_Nest:
+            view_element = self._reuse(Nest, element.id, view_x, view_y, 128, color, element.health)
+        elif element.type is Model_Worker:
+            view_element = self._reuse(Ant, element.id, view_x, view_y, color, element.direction, element.energy)
+        elif element.type is Model_Scout:
+            view_element = self._reuse(Scout, element.id, view_x, view_y, color, element.direction, element.energy)
+        elif element.type is Model_Food:
+            view_element = self._reuse(FoodSource, element.id, view_x, view_y, 128, element.size)
+        else:
+            return
+
+        self.game_elements[element.id] = view_element
+        self.model_objects[element.id] = element
+        if view_element.z_index not in self.layers:
+            self.layers[view_element.z_index] = {}
+            insort(self.layer_order, view_element.z_index)
+        self.layers[view_element.z_index][element.id] = view_element
+        # Elements taken from the pool still show the state of their last object
+        self._move(element)
+
+    def _reuse(self, element_type, identifier, *args):
+        """View element from the pool of removed ones if there is one, a new one otherwise"""
+        pool = self.pool.get(element_type)
+        if pool:
+            view_element = pool.pop()
+            view_element.reset(identifier, *args)
+            return view_element
+        return element_type(self.view, identifier, *args)
+
+    def _move(self, element):
+        """Update the view element of a model object"""
+        view_element = self.game_elements.get(element.id)
+        if view_element is None:
+            return
+        self.model_objects[element.id] = element
+        view_element.x, view_element.y = self._to_view_coordinates(element.position)
+        if element.type is Model_Worker:
+            view_element.direction = element.direction
+            view_element.has_food = element.has_food
+            view_element.health = element.energy
+        elif element.type is Model_Scout:
+            view_element.direction = element.direction
+        elif element.type is Model_Food:
+            view_element.value = element.size
+
+    def _despawn(self, element_id):
+        """Remove the view element of a model object, if there is one, and keep it for reuse"""
+        view_element = self.game_elements.pop(element_id, None)
+        if view_element is not None:
+            del self.layers[view_element.z_index][element_id]
+            del self.model_objects[element_id]
+            self.pool.setdefault(type(view_element), []).append(view_element)
 
     def _to_view_coordinates(self, position):
         view_x = int(position[0] - self.view.pos[0][0])
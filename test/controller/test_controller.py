@@ -1,4 +1,5 @@
 from src.controller.controller import Controller
+from src.view.view import View
 
 
 def create_game_state():
@@ -18,3 +19,9 @@ def test_press_start_button_and_no_player_name():
     assert game_state is None
 
 
+def test_replay_has_no_game_state_and_no_ant_creation():
+    c = Controller(replay_path='recording')
+    assert c.start_button_pressed(color=(87, 112, 219), player_name='Ash') is None
+    assert c.view.state == View.GAMEVIEW
+    assert 'view_box_id_add_ants_box' not in c.view.elements
+    assert not {'build_scout', 'build_worker', 'show_build_ants'} & set(c.event_list['game_view'])
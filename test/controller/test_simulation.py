@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.controller import simulation
+from src.controller.simulation import ReplayThread, SimulationThread, SnapshotBuffer
+from src.instrumentation import Instrumentation, TICK
+from src.model.game_state import GameState
+from src.model.player import Player
+from src.model.replay import ReplayReader, ReplayWriter
+from src.model.worker import Worker
+from src.utils import array
+
+
+@pytest.fixture
+def game_state():
+    game_state = GameState([Player("Ash", (87, 112, 219))], seed=0)
+    game_state.create_ants(game_state.get_nests()[0], "worker", 10)
+    return game_state
+
+
+def whole_world():
+    return array([-1000., 1000.]), array([1000., -1000.])
+
+
+def test_snapshot_buffer():
+    buffer = SnapshotBuffer()
+    assert buffer.read() is None
+    buffer.publish("first")
+    buffer.publish("second")
+    assert buffer.read() == "second"
+
+
+def test_step_publishes_immutable_snapshot(game_state):
+    simulation = SimulationThread(game_state, whole_world)
+    simulation.step()
+    snapshot = simulation.snapshots.read()
+    assert snapshot.tick == game_state.tick == 1
+    assert len(snapshot) == len(game_state.get_objects_in_region(*whole_world()))
+
+    worker = next(obj for obj in snapshot if obj.type is Worker)
+    position = worker.position.copy()
+    simulation.step()
+    assert np.array_equal(worker.position, position), 'a snapshot must not change when the game goes on'
+    delta = simulation.snapshots.read().delta
+    assert delta.base_tick == 1 and worker.id in {obj.id for obj in delta.moved}
+    with pytest.raises(ValueError):
+        worker.position[0] = 0.
+    with pytest.raises(AttributeError):
+        snapshot.tick = 5
+
+
+def test_fixed_timestep(game_state):
+    simulation = SimulationThread(game_state, whole_world, tick_rate=100)
+    simulation.start()
+    time.sleep(0.3)
+    simulation.stop()
+    simulation.join(1.)
+    assert not simulation.is_alive()
+    assert 5 <= game_state.tick <= 31
+    assert simulation.snapshots.read().tick == game_state.tick
+
+
+def test_replay(game_state, tmp_path, monkeypatch):
+    path = str(tmp_path / "replay")
+    with ReplayWriter(path, game_state.players) as writer:
+        for _ in range(3):
+            game_state.update()
+            writer.append(game_state.tick, game_state.get_objects_in_region(*whole_world()))
+
+    replay = ReplayThread(ReplayReader(path), whole_world)
+    ticks = []
+    timings = Instrumentation(enabled=True)
+    monkeypatch.setattr(simulation, "instrumentation", timings)
+    for _ in range(4):
+        replay.step()
+        ticks.append(replay.snapshots.read().tick)
+    assert ticks == [1, 2, 3, 3], 'a replay stays on its last tick'
+    assert len(timings.buffers[TICK].values()) == 4, 'a tick ends at the end of the recording as well'
+    replay.seek(2)
+    replay.step()
+    assert replay.snapshots.read().tick == 2
+    assert len(replay.snapshots.read()) == len(game_state.get_objects_in_region(*whole_world()))
@@ -0,0 +1,76 @@
+"""
+Memory used per ant and cost of reading ant attributes.
+Run from the repository root with: python -m test.model.benchmarks.benchmark_memory
+"""
+import gc
+import sys
+import timeit
+import tracemalloc
+
+from src.model.ant_population import AntPopulation
+from src.model.nest import Nest
+from src.model.player import Player
+from src.model.scout import Scout
+from src.model.worker import Worker
+from src.utils import array
+
+
+def bytes_per_ant(ant_type, amount):
+    """ Measure the memory allocated per ant, not counting the columns of the population
+
+    :param ant_type: (type) Worker or Scout
+    :param amount: (int) number of ants to create
+    :return: (float) bytes per ant
+
+    """
+    player = Player("Nobody", (0, 0, 0))
+    nest = Nest(array([0., 0.]), player, 1, 100)
+    population = AntPopulation(capacity=amount)
+    gc.collect()
+    tracemalloc.start()
+    ants = [ant_type(player, nest, population=population) for _ in range(amount)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(ants) == amount
+    return allocated / amount
+
+
+def bytes_per_population_row():
+    """Size of the row of one ant in all columns of an AntPopulation"""
+    population = AntPopulation()
+    names = ("kind", "home") + population.vector_columns + population.scalar_columns
+    return sum(getattr(population, name).itemsize * getattr(population, name)[0].size for name in names)
+
+
+def attribute_read_time(number=100000):
+    """ Time reading the traits used by Worker.update
+
+    :return: (float) seconds per read of one attribute
+
+    """
+    player = Player("Nobody", (0, 0, 0))
+    ant = Worker(player, Nest(array([0., 0.]), player, 1, 100))
+    read = lambda: (ant.energy, ant.speed, ant.foodiness, ant.explorativeness, ant.has_food)
+    return timeit.timeit(read, number=number) / (5 * number)
+
+
+def update_time(number=10000):
+    """ Time one Worker.update of a worker that walks home laying pheromone
+
+    :return: (float) seconds per update
+
+    """
+    player = Player("Nobody", (0, 0, 0))
+    ant = Worker(player, Nest(array([0., 0.]), player, 1, 100))
+    ant.has_food = 1.
+    ant.position = array([1e6, 0.])
+    return timeit.timeit(lambda: ant.update([]), number=number) / number
+
+
+if __name__ == "__main__":
+    amount = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for ant_type in (Worker, Scout):
+        print("{}: {:.0f} bytes per object, {} bytes per population row".format(
+            ant_type.__name__, bytes_per_ant(ant_type, amount), bytes_per_population_row()))
+    print("attribute read: {:.3f} us".format(attribute_read_time() * 1e6))
+    print("Worker.update: {:.1f} us".format(update_time() * 1e6))
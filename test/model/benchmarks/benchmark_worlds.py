@@ -0,0 +1,139 @@
+"""
+Cost of the main operations of every World implementation at increasing numbers of ants.
+Every backend registered in game_state.world_types is measured, the results are written as JSON.
+Run from the repository root with: python -m test.model.benchmarks.benchmark_worlds --output worlds.json
+"""
+import argparse
+import json
+import platform
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from src.model.game_state import world_types
+from src.model.player import Player
+from src.utils import array
+
+# Side length of the square the nests, food and queries are spread over, centered at the origin
+area_size = 1000.
+ants_per_nest = 100
+n_players = 4
+
+
+def build_world(world_type, rng):
+    """ Create an empty world and the players owning its nests
+
+    :param world_type: (type) World implementation
+    :param rng: (Generator) random generator the seed of the world is drawn from
+    :return world: (World) the world
+    :return players: (list) the players
+
+    """
+    world = world_type(rng=np.random.default_rng(rng.integers(2 ** 32)))
+    players = [Player("Player {}".format(i), (0, 0, 0)) for i in range(n_players)]
+    return world, players
+
+
+def populate(world, players, n_ants, rng):
+    """ Add nests, food and ants to a world, one nest for every ants_per_nest ants
+
+    :param world: (World) the world
+    :param players: (list) players the nests are shared among
+    :param n_ants: (int) number of ants
+    :param rng: (Generator) random generator for the positions
+    :return: (float) seconds spent in create_ants
+
+    """
+    n_nests = max(1, n_ants // ants_per_nest)
+    nest_positions = [array(position) for position in random_positions(rng, n_nests)]
+    world.create_nests([players[i % n_players] for i in range(n_nests)], nest_positions, size=10, health=100)
+    food_positions = [array(position) for position in random_positions(rng, max(1, n_nests // 2))]
+    world.create_food(food_positions, [5] * len(food_positions))
+
+    amounts = np.diff(np.linspace(0, n_ants, n_nests + 1).astype(int))
+    start = perf_counter()
+    for nest, amount in zip(world.get_nests(), amounts):
+        world.create_ants(nest, "worker", int(amount))
+    return perf_counter() - start
+
+
+def random_positions(rng, amount):
+    """Uniform positions in the area, one per row"""
+    return (rng.random((amount, 2)) - 0.5) * area_size
+
+
+def time_per_call(function, arguments):
+    """ Call a function once for every element of arguments
+
+    :param function: (function) the function to time
+    :param arguments: (list) tuples of positional arguments, one per call
+    :return: (float) mean seconds per call
+
+    """
+    start = perf_counter()
+    for argument in arguments:
+        function(*argument)
+    return (perf_counter() - start) / len(arguments)
+
+
+def benchmark(name, n_ants, ticks, queries, seed):
+    """ Time create_ants, update, get_circular_region and get_rectangle_region of one world type
+
+    :param name: (string) key of the world type in world_types
+    :param n_ants: (int) number of ants in the world
+    :param ticks: (int) number of updates to time
+    :param queries: (int) number of region queries to time
+    :param seed: (int) seed of the positions, the same for all world types
+    :return: (list) one result dict per operation
+
+    """
+    rng = np.random.default_rng(seed)
+    world, players = build_world(world_types[name], rng)
+    create_time = populate(world, players, n_ants, rng)
+    # Let the ants spread out from their nests before queries are timed
+    world.update()
+    update_time = time_per_call(world.update, [()] * ticks)
+
+    centers = random_positions(rng, queries)
+    circle_time = time_per_call(world.get_circular_region, [(center, 30.) for center in centers])
+    rectangles = [(center + array([-50., 50.]), center + array([50., -50.])) for center in centers]
+    rectangle_time = time_per_call(world.get_rectangle_region, rectangles)
+
+    common = {"world": name, "entities": n_ants}
+    return [dict(common, operation="create_ants", seconds=create_time, calls=1),
+            dict(common, operation="update", seconds=update_time, calls=ticks),
+            dict(common, operation="get_circular_region", seconds=circle_time, calls=queries, radius=30.),
+            dict(common, operation="get_rectangle_region", seconds=rectangle_time, calls=queries, side=100.)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the World implementations and write the results as JSON.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                        help="numbers of ants to measure")
+    parser.add_argument("--worlds", nargs="+", choices=sorted(world_types), default=sorted(world_types),
+                        help="World implementations to measure")
+    parser.add_argument("--ticks", type=int, default=5, help="updates timed per measurement")
+    parser.add_argument("--queries", type=int, default=200, help="region queries timed per measurement")
+    parser.add_argument("--seed", type=int, default=0, help="seed of all positions")
+    parser.add_argument("--output", default=None, help="JSON file to write, standard output if not given")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_ants in args.sizes:
+        for name in args.worlds:
+            results.extend(benchmark(name, n_ants, args.ticks, args.queries, args.seed))
+            print("{} with {} ants done".format(name, n_ants), file=sys.stderr)
+
+    report = {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+              "area_size": area_size, "ants_per_nest": ants_per_nest, "results": results}
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ from src.model.worker import Worker
 from src.model.nest import Nest
 from src.model.food import Food
 from src.model.player import Player
-from src.model.pheromone import Pheromone
+from src.model.pheromone_field import PheromoneField
 from src.utils import array
 import numpy as np
 import pytest
@@ -20,15 +20,10 @@ def set_up_environment():
 
 
 @pytest.fixture
-def set_up_pheromones():
-    player = Player("Nobody", (178, 58, 238))
-    position = array([5., 5.])
-    intensity = 20.
-    pheromone1 = Pheromone(position, player, intensity)
-    position = array([4., 5.])
-    intensity = 10.
-    pheromone2 = Pheromone(position, player, intensity)
-    pheromones = [pheromone1, pheromone2]
+def set_up_pheromones(set_up_environment):
+    player, nest, ant = set_up_environment
+    pheromones = PheromoneField(player, size=100., cell_size=1.)
+    pheromones.deposit(array([[5., 5.], [4., 5.]]), array([20., 10.]))
     return pheromones
 
 
@@ -40,15 +35,9 @@ def set_up_ants(set_up_environment):
 
 @pytest.fixture
 def set_up_foods():
-    player = Player("Nobody", (178, 58, 238))
-    position = array([5., 5.])
-    intensity = 20.
-    pheromone1 = Pheromone(position, player, intensity)
-    position = array([4., 5.])
-    intensity = 10.
-    pheromone2 = Pheromone(position, player, intensity)
-    pheromones = [pheromone1, pheromone2]
-    return pheromones
+    food1 = Food(position=array([5., 5.]), size=20.)
+    food2 = Food(position=array([4., 5.]), size=10.)
+    return [food1, food2]
 
 
 # should this be removed?
@@ -71,17 +60,17 @@ def test_move_has_food(set_up_environment):
 
     # asserting that y-move is towards the nest
     ant.position = array([10., 0.])
-    position, _ = ant.update([])
+    position = ant.update([])
     assert np.isclose(position, array([9., 0.])).all(), 'incorrect y-move direction'
 
     # asserting that x-move is towards the nest
     ant.position = array([0., 10.])
-    position, _ = ant.update([])
+    position = ant.update([])
     assert np.isclose(position, array([0., 9.])).all(), 'incorrect x-move direction'
 
     # asserting the arrival
     ant.position = array([0., 0.])
-    position, _ = ant.update([])
+    position = ant.update([])
     assert np.isclose(position, array([0., 0.])).all(), 'moves after reaching the object'
 
 
@@ -91,7 +80,7 @@ def test_move_randomly(set_up_environment):
     ant.position = array([0., 0.])
     ant.direction = array([0., 0.])
     init_position = array(ant.position)
-    position, _ = ant.update([])
+    ant.update([])
     assert np.isclose(1., np.linalg.norm(ant.direction)), 'direction not one: %r' % ant.direction
     assert np.isclose(1., np.linalg.norm(ant.position - init_position)), 'movement not one: %r' % ant.position
 
@@ -130,7 +119,33 @@ def test_get_position(set_up_environment):
     player, nest, ant = set_up_environment
     init_position = ant.get_position()
     ant.has_food = 0.
-    ant_position, _ = ant.update([])
+    ant_position = ant.update([])
     new_position = ant.get_position()
     assert np.isclose(0., np.linalg.norm(ant_position - new_position)), 'ant position is not updated'
     assert np.isclose(1., np.linalg.norm(new_position - init_position)), 'ant did not move in steps on one'
+
+
+def test_follow_pheromone(set_up_environment, set_up_pheromones):
+    player, nest, ant = set_up_environment
+    ant.position = array([10., 5.])
+    position = ant.update([], set_up_pheromones)
+    # both marked cells lie to the left of the ant, their centers at [4.5, 5.5] and [5.5, 5.5]
+    assert position[0] < 9.1 and position[1] > 5., 'ant does not move towards the pheromone'
+    assert np.isclose(np.linalg.norm(position - array([10., 5.])), 1.)
+
+
+def test_lay_pheromone(set_up_environment):
+    player, nest, ant = set_up_environment
+    pheromones = PheromoneField(player, size=100., cell_size=1.)
+    ant.has_food = 1.
+    ant.pheromone_strength = 10.
+    ant.position = array([10., 0.5])
+    position = ant.update([], pheromones)
+    assert pheromones.sample(position)[0] > 0, 'no pheromone laid at the new position'
+    assert pheromones.sample(array([10., 0.5]))[0] == 0
+
+
+def test_compact_objects(set_up_environment, set_up_food):
+    player, nest, ant = set_up_environment
+    for obj in (ant, nest, set_up_food):
+        assert not hasattr(obj, '__dict__'), '{} should only have slots'.format(type(obj).__name__)
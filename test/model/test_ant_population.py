@@ -0,0 +1,168 @@
+import numpy as np
+import pytest
+
+from src.model.ant_population import AntPopulation, WORKER, SCOUT, FREE
+from src.model.food import Food
+from src.model.nest import Nest
+from src.model.pheromone_field import PheromoneField
+from src.model.player import Player
+from src.model.scout import Scout
+from src.model.worker import Worker
+from src.utils import array
+
+
+@pytest.fixture
+def set_up_colony():
+    """A population with one nest at the origin and a pheromone field for its player"""
+    player = Player("Nobody", (178, 58, 238))
+    nest = Nest(position=array([0., 0.]), player=player, size=10., health=100.)
+    population = AntPopulation()
+    field = PheromoneField(player, size=100., cell_size=1.)
+    return population, nest, field
+
+
+def add_workers(population, nest, positions):
+    workers = [Worker(nest.owner, nest, population=population) for _ in positions]
+    for worker, position in zip(workers, positions):
+        worker.position = position
+    return workers
+
+
+def test_columns(set_up_colony):
+    population, nest, field = set_up_colony
+    worker = Worker(nest.owner, nest, speed=2., population=population)
+    scout = Scout(nest.owner, nest, population=population)
+    assert len(population) == 2
+    assert population.kind[worker.slot] == WORKER and population.kind[scout.slot] == SCOUT
+    assert worker.speed == population.speed[worker.slot] == 2.
+    assert worker.home is nest and np.allclose(population.home_position[worker.slot], nest.position)
+
+    position = worker.position
+    worker.position = array([3., 4.])
+    assert np.allclose(position, nest.position), 'reading an attribute should return a copy'
+    assert np.allclose(population.position[worker.slot], [3., 4.])
+
+
+def test_remove_reuses_slot(set_up_colony):
+    population, nest, field = set_up_colony
+    workers = add_workers(population, nest, [array([0., 0.])] * 3)
+    population.remove(workers[1])
+    assert len(population) == 2 and population.kind[workers[1].slot] == FREE
+    new_worker = Worker(nest.owner, nest, population=population)
+    assert new_worker.slot == workers[1].slot
+
+
+def test_batch_matches_scalar_update(set_up_colony):
+    """Ants with a single possible move have to end up where Worker.update puts them"""
+    population, nest, field = set_up_colony
+    food = Food(array([20., 0.]), 5.)
+    positions = [array([10., 0.]), array([1., 0.]), array([20.5, 0.]), array([15., 5.])]
+    batched = add_workers(population, nest, positions)
+    batched[0].has_food = 1.
+    batched[0].pheromone_strength = 10.
+    batched[1].has_food = 1.
+    foods = [[], [], [food], [food]]
+
+    scalar_nest = Nest(position=array([0., 0.]), player=nest.owner, size=10., health=100.)
+    scalar_food = Food(array([20., 0.]), 5.)
+    scalar_field = PheromoneField(nest.owner, size=100., cell_size=1.)
+    scalar = [Worker(nest.owner, scalar_nest) for _ in positions]
+    for worker, position in zip(scalar, positions):
+        worker.position = position
+    scalar[0].has_food = 1.
+    scalar[0].pheromone_strength = 10.
+    scalar[1].has_food = 1.
+
+    population.update_workers([ant.slot for ant in batched], foods, [field])
+    for worker, food_list in zip(scalar, [[], [], [scalar_food], [scalar_food]]):
+        worker.update(food_list, scalar_field)
+
+    for batched_worker, scalar_worker in zip(batched, scalar):
+        assert np.allclose(batched_worker.position, scalar_worker.position)
+        assert np.allclose(batched_worker.direction, scalar_worker.direction)
+        assert batched_worker.has_food == scalar_worker.has_food
+        assert np.isclose(batched_worker.pheromone_strength, scalar_worker.pheromone_strength)
+        assert batched_worker.energy == scalar_worker.energy
+    assert nest.food == scalar_nest.food
+    assert food.size == scalar_food.size
+    assert np.allclose(field.grid, scalar_field.grid)
+
+
+def test_follow_pheromone(set_up_colony):
+    population, nest, field = set_up_colony
+    workers = add_workers(population, nest, [array([10.5, 5.5]), array([-40.5, 0.5])])
+    field.deposit(array([[5.5, 5.5], [-45.5, 0.5]]), 1.)
+    population.update_workers([ant.slot for ant in workers], [[], []], [field])
+    assert np.allclose(workers[0].position, [9.5, 5.5], atol=1e-5)
+    assert np.allclose(workers[1].position, [-41.5, 0.5], atol=1e-5)
+
+
+def test_follow_pheromone_ahead(set_up_colony):
+    """Workers that keep their direction never turn back to pheromone right behind them"""
+    population, nest, field = set_up_colony
+    workers = add_workers(population, nest, [array([20.5, 5.5])] * 20)
+    for worker in workers:
+        worker.direction = array([1., 0.])
+    field.deposit(array([[15.5, 5.5], [25.5, 5.5]]), 1.)
+    population.update_workers([ant.slot for ant in workers], [[]] * len(workers), [field])
+    assert all(np.allclose(worker.position, [21.5, 5.5], atol=1e-5) for worker in workers)
+
+
+def test_choose_food(set_up_colony):
+    """Workers choose among several food sources, but never an empty one"""
+    population, nest, field = set_up_colony
+    foods = [Food(array([10., 10.]), 5.), Food(array([-10., 10.]), 0.), Food(array([10., -10.]), 5.)]
+    workers = add_workers(population, nest, [array([0., 5.])] * 100)
+    population.update_workers([ant.slot for ant in workers], [foods] * len(workers), [field])
+    positions = np.array([worker.position for worker in workers])
+    assert np.allclose(np.linalg.norm(positions - array([0., 5.]), axis=1), 1.)
+    assert np.all(positions[:, 0] > 0), 'no worker should go for the empty food source'
+    assert np.any(positions[:, 1] > 5) and np.any(positions[:, 1] < 5)
+
+
+def test_move_randomly(set_up_colony):
+    population, nest, field = set_up_colony
+    workers = add_workers(population, nest, [array([30., 30.])] * 50)
+    population.update_workers([ant.slot for ant in workers], [[]] * len(workers), [field])
+    positions = np.array([worker.position for worker in workers])
+    assert np.allclose(np.linalg.norm(positions - array([30., 30.]), axis=1), 1.)
+    assert len(np.unique(positions, axis=0)) > 1
+
+
+def test_batch_matches_scalar_scout_update(set_up_colony):
+    """Scouts with a single possible move have to end up where Scout.update puts them"""
+    population, nest, field = set_up_colony
+    food = Food(array([20., 0.]), 5.)
+    positions = [array([30., 0.]), array([3., 0.]), array([23., 0.]), array([40., 10.])]
+    batched = [Scout(nest.owner, nest, population=population) for _ in positions]
+    scalar_field = PheromoneField(nest.owner, size=100., cell_size=1.)
+    scalar = [Scout(nest.owner, nest) for _ in positions]
+    for scouts in (batched, scalar):
+        for scout, position in zip(scouts, positions):
+            scout.position = position
+        scouts[0].found_food = 1.
+        scouts[0].pheromone_strength = 10.
+        scouts[1].found_food = 1.
+
+    population.update_scouts([ant.slot for ant in batched], [[], [], [food], [food]], [field])
+    for scout, food_list in zip(scalar, [[], [], [food], [food]]):
+        scout.update(food_list, scalar_field)
+
+    for batched_scout, scalar_scout in zip(batched, scalar):
+        assert np.allclose(batched_scout.position, scalar_scout.position)
+        assert np.allclose(batched_scout.direction, scalar_scout.direction)
+        assert batched_scout.found_food == scalar_scout.found_food
+        assert np.isclose(batched_scout.pheromone_strength, scalar_scout.pheromone_strength)
+        assert batched_scout.energy == scalar_scout.energy
+    assert food.size == 5., 'scouts should not take food'
+    assert np.allclose(field.grid, scalar_field.grid)
+
+
+def test_scouts_ignore_pheromone(set_up_colony):
+    population, nest, field = set_up_colony
+    scouts = [Scout(nest.owner, nest, population=population) for _ in range(50)]
+    field.deposit(array([5.5, 5.5]), 1.)
+    population.update_scouts([ant.slot for ant in scouts], [[]] * len(scouts), [field])
+    positions = np.array([scout.position for scout in scouts])
+    assert np.allclose(np.linalg.norm(positions, axis=1), scouts[0].speed)
+    assert len(np.unique(positions, axis=0)) > 1
@@ -0,0 +1,120 @@
+import gc
+from threading import Thread
+
+import pytest
+
+from src.model.entity_registry import EntityRegistry, registry, get_index, get_generation
+from src.model.food import Food
+from src.model.game_state import GameState
+from src.model.player import Player
+from src.utils import array
+
+
+class Entity:
+    """Stands in for a game object, plain Entity() instances cannot be weakly referenced"""
+
+
+@pytest.fixture
+def set_up_registry():
+    return EntityRegistry()
+
+
+def test_register(set_up_registry):
+    entities = set_up_registry
+    objects = [Entity() for _ in range(10)]
+    handles = [entities.register(obj) for obj in objects]
+    assert len(set(handles)) == len(handles) == len(entities)
+    assert all(isinstance(handle, int) for handle in handles)
+    for handle, obj in zip(handles, objects):
+        assert entities.get(handle) is obj
+
+
+def test_release_and_reuse(set_up_registry):
+    entities = set_up_registry
+    removed = Entity()
+    first = entities.register(removed)
+    entities.release(first)
+    assert entities.get(first) is None and first not in entities
+    assert len(entities) == 0
+
+    obj = Entity()
+    second = entities.register(obj)
+    assert get_index(second) == get_index(first), 'the index should be reused'
+    assert get_generation(second) == get_generation(first) + 1
+    assert second != first
+    assert entities.get(second) is obj and entities.get(first) is None
+
+
+def test_release_twice(set_up_registry):
+    entities = set_up_registry
+    obj = Entity()
+    handle = entities.register(obj)
+    entities.release(handle)
+    with pytest.raises(KeyError):
+        entities.release(handle)
+
+
+def test_game_objects_are_registered():
+    food = Food(array([1., 2.]), 3)
+    assert isinstance(food.id, int)
+    assert registry.get(food.id) is food
+
+
+def test_collected_objects_are_released(set_up_registry):
+    entities = set_up_registry
+    handle = entities.register(Entity())
+    gc.collect()
+    assert entities.get(handle) is None and len(entities) == 0
+    obj = Entity()
+    assert get_index(entities.register(obj)) == get_index(handle), 'the index should be reused'
+
+    # Collecting an object that was released already does not release its index again
+    released = Entity()
+    entities.release(entities.register(released))
+    del released
+    gc.collect()
+    assert len(entities) == 1 and len(entities._free_indices) == 1
+
+
+def test_capacity():
+    entities = EntityRegistry(capacity=2)
+    kept = [Entity(), Entity()]
+    for obj in kept:
+        entities.register(obj)
+    with pytest.raises(OverflowError):
+        entities.register(Entity())
+
+
+def test_dropped_games_are_released():
+    gc.collect()
+    before = len(registry)
+    for _ in range(3):
+        game_state = GameState([Player("test", (255, 0, 0))], seed=1)
+        game_state.create_ants(game_state.get_nests()[0], amount=20)
+        game_state.update()
+        del game_state
+        gc.collect()
+        assert len(registry) == before
+
+
+def test_threads(set_up_registry):
+    entities = set_up_registry
+    kept = [[] for _ in range(4)]
+
+    def register(objects):
+        for i in range(2000):
+            obj = Entity()
+            handle = entities.register(obj)
+            if i % 2:
+                objects.append((handle, obj))
+            else:
+                entities.release(handle)
+
+    threads = [Thread(target=register, args=(objects,)) for objects in kept]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    handles = [handle for objects in kept for handle, _ in objects]
+    assert len(set(handles)) == len(handles) == len(entities) == 4000
+    assert all(entities.get(handle) is obj for objects in kept for handle, obj in objects)
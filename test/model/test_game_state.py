@@ -1,5 +1,6 @@
+import numpy as np
 import pytest
-from src.model.game_state import GameState
+from src.model.game_state import GameState, world_types
 from src.model.player import Player
 from src.model.food import Food
 from src.utils import array
@@ -46,3 +47,57 @@ def test_generate_random_food(set_up_game_state_fixed):
             sizes.remove(food.size)
 
     assert len(sizes) == 0
+
+
+@pytest.mark.parametrize("world_type", list(world_types))
+def test_world_type(world_type):
+    players = [Player("Nobody", (0, 0, 0))]
+    game_state = GameState(players, world_type=world_type)
+    assert isinstance(game_state.world, world_types[world_type])
+    assert len(game_state.get_nests()) == len(players)
+
+
+@pytest.mark.parametrize("world_type", list(world_types))
+def test_insert_and_remove_objects(world_type):
+    game_state = GameState([Player("Nobody", (0, 0, 0))], world_type=world_type)
+    world = game_state.world
+    food = Food(array([300., 300.]), 5.)
+    world.insert_objects([food])
+    assert world.get_at_position(array([300., 300.]), object_type=Food) == [food]
+    world.remove_objects([food])
+    assert world.get_at_position(array([300., 300.]), object_type=Food) == []
+
+
+def test_unknown_world_type():
+    with pytest.raises(ValueError):
+        GameState([Player("Nobody", (0, 0, 0))], world_type="quadtree")
+
+
+def play(world_type, seed, ticks=20):
+    """Play a game with workers and scouts and return the positions of its nests and ants"""
+    players = [Player("Nobody", (0, 0, 0)), Player("Somebody", (1, 1, 1))]
+    game_state = GameState(players, world_type=world_type, seed=seed)
+    for nest in game_state.get_nests():
+        game_state.create_ants(nest, "worker", 30)
+        game_state.create_ants(nest, "scout", 10)
+    for _ in range(ticks):
+        game_state.update()
+    nests = np.array([nest.position for nest in game_state.get_nests()])
+    ants = np.array([ant.position for ant in game_state.get_ants()])
+    return nests, ants
+
+
+@pytest.mark.parametrize('world_type', sorted(world_types))
+def test_seed_makes_games_reproducible(world_type):
+    nests, ants = play(world_type, seed=42)
+    same_nests, same_ants = play(world_type, seed=42)
+    other_nests, other_ants = play(world_type, seed=43)
+    assert np.array_equal(nests, same_nests) and np.array_equal(ants, same_ants)
+    assert not np.array_equal(nests, other_nests)
+    assert not np.array_equal(ants, other_ants)
+
+
+def test_spawn_seeds(set_up_game_state_fixed):
+    players, game_state = set_up_game_state_fixed
+    first, second = game_state.spawn_seeds(2)
+    assert np.random.default_rng(first).random() != np.random.default_rng(second).random()
@@ -0,0 +1,199 @@
+import numpy as np
+import pytest
+
+from src.model.food import Food
+from src.model.incremental_kd_tree import IncrementalKDTree, STATIC, DYNAMIC
+from src.utils import array
+
+
+@pytest.fixture
+def set_up_index():
+    """Index with a committed 10x10 grid of food objects"""
+    index = IncrementalKDTree(merge_fraction=0.25, min_merge_size=0)
+    foods = [Food(array([x, y]), 1) for x in range(10) for y in range(10)]
+    for food in foods:
+        index.insert(food)
+    index.commit()
+    return index, foods
+
+
+def test_insert(set_up_index):
+    index, foods = set_up_index
+    assert len(index) == len(foods)
+    for food in foods:
+        assert food in index
+        assert food in index.query_ball_point(food.position, 0)
+
+
+def test_staged_changes_are_invisible_until_commit(set_up_index):
+    index, foods = set_up_index
+    new_food = Food(array([100, 100]), 1)
+    index.insert(new_food)
+    assert index.query_ball_point(new_food.position, 1) == []
+    index.commit()
+    assert index.query_ball_point(new_food.position, 1) == [new_food]
+
+
+def test_move(set_up_index):
+    index, foods = set_up_index
+    food = foods[0]
+    old_position = food.position
+    food.position = array([-50, -50])
+    index.move(food)
+    index.commit()
+    assert food not in index.query_ball_point(old_position, 0.5)
+    assert index.query_ball_point(food.position, 0.5) == [food]
+    assert len(index) == len(foods)
+
+
+def test_move_all(set_up_index):
+    index, foods = set_up_index
+    moved = foods[:3]
+    positions = array([[-50, -50], [-60, -60], [-70, -70]])
+    for food, position in zip(moved, positions):
+        food.position = position
+    index.move_all(moved, positions)
+    index.commit()
+    for food in moved:
+        assert index.query_ball_point(food.position, 0.5) == [food]
+    assert index.query_ball_point(array([0, 0]), 0.5) == []
+    assert len(index) == len(foods)
+
+
+def test_remove(set_up_index):
+    index, foods = set_up_index
+    for food in foods[:50]:
+        index.remove(food)
+    index.commit()
+    assert len(index) == 50
+    remaining = index.query_ball_point(array([5, 5]), 100)
+    assert sorted(id(obj) for obj in remaining) == sorted(id(obj) for obj in foods[50:])
+
+
+def test_moving_objects_stay_dynamic(set_up_index):
+    """Objects that keep moving should not be merged into the static tree"""
+    index, foods = set_up_index
+    walker = foods[0]
+    for step in range(10):
+        walker.position = walker.position + array([0.5, 0])
+        index.move(walker)
+        index.commit()
+        slot = index.objects.index(walker)
+        assert index._location[slot] == DYNAMIC
+    assert index._location[index.objects.index(foods[1])] == STATIC
+    assert walker in index.query_ball_point(walker.position, 0)
+
+
+def test_slots_are_reused(set_up_index):
+    index, foods = set_up_index
+    index.remove(foods[0])
+    index.commit()
+    new_food = Food(array([42, 42]), 1)
+    index.insert(new_food)
+    index.commit()
+    assert len(index.objects) == len(foods)
+    assert index.query_ball_point(foods[0].position, 0) == []
+    assert index.query_ball_point(new_food.position, 0) == [new_food]
+
+
+def test_query(set_up_index):
+    index, foods = set_up_index
+    index.remove(foods[0])
+    index.commit()
+    dists, nearest = index.query(array([0, 0]), k=3)
+    assert len(nearest) == 3
+    assert foods[0] not in nearest
+    assert np.all(np.diff(dists) >= 0)
+    assert np.isclose(dists[0], 1.)
+
+
+def test_square_region(set_up_index):
+    index, foods = set_up_index
+    objects = index.query_ball_point(array([5, 5]), 1, p=np.inf)
+    assert len(objects) == 9
+
+
+def test_rectangle(set_up_index):
+    index, foods = set_up_index
+    foods[0].position = array([2.5, 1.5])
+    index.move(foods[0])
+    index.remove(foods[23])
+    index.commit()
+    lower, upper = array([1, 1]), array([6, 3])
+    slots = index.query_rectangle_slots(lower, upper)
+    assert slots.dtype == np.intp and np.all(np.diff(slots) > 0)
+    inside = [food for food in foods[1:] if 1 <= food.position[0] <= 6 and 1 <= food.position[1] <= 3]
+    expected = [food for food in inside if food is not foods[23]]
+    assert len(expected) == 6 * 3 - 1
+    assert sorted(map(id, index.query_rectangle(lower, upper))) == sorted(map(id, expected + [foods[0]]))
+    assert index.query_rectangle(array([20, 20]), array([30, 30])) == []
+
+
+def test_query_ball_point_list(set_up_index):
+    index, foods = set_up_index
+    foods[0].position = array([3.5, 3.5])
+    index.move(foods[0])
+    index.commit()
+    centers = array([[0, 0], [3, 3], [9, 9], [50, 50]])
+    result = index.query_ball_point_list(centers, 1.5)
+    assert len(result) == len(centers)
+    for center, region in zip(centers, result):
+        compare_to = index.query_ball_point(center, 1.5)
+        assert sorted(map(id, region)) == sorted(map(id, compare_to))
+    assert result[3] == []
+    assert foods[0] in result[1]
+
+
+def test_small_moves_do_not_rebuild(set_up_index):
+    """Objects of the dynamic tree that move less than max_slack are found without rebuilding the tree"""
+    index, foods = set_up_index
+    walkers = foods[:10]
+    for walker in walkers:
+        walker.position = walker.position + array([0.5, 0])
+        index.move(walker)
+    index.commit()
+    dynamic_tree = index._dynamic_tree
+    for step in range(5):
+        for walker in walkers:
+            walker.position = walker.position + array([0.5, 0])
+            index.move(walker)
+        index.commit()
+        assert index._dynamic_tree is dynamic_tree
+        for walker in walkers:
+            assert walker in index.query_ball_point(walker.position, 0)
+    assert np.isclose(index.slack, 2.5)
+
+    walkers[0].position = walkers[0].position + array([20, 0])
+    index.move(walkers[0])
+    index.commit()
+    assert index._dynamic_tree is not dynamic_tree and index.slack == 0
+    assert index.query_ball_point(walkers[0].position, 0) == [walkers[0]]
+
+
+def test_random_changes_match_brute_force():
+    rng = np.random.default_rng(0)
+    index = IncrementalKDTree(min_merge_size=8, max_slack=5.)
+    objects = []
+    for step in range(40):
+        for _ in range(rng.integers(0, 10)):
+            food = Food(array(rng.random(2) * 100), 1)
+            objects.append(food)
+            index.insert(food)
+        # Every other object keeps moving
+        for obj in objects[::2]:
+            obj.position = obj.position + array(rng.normal(size=2))
+            index.move(obj)
+        for obj in [obj for obj in objects if rng.random() < 0.02]:
+            objects.remove(obj)
+            index.remove(obj)
+        index.commit()
+
+        positions = np.array([obj.position for obj in objects]).reshape(-1, 2)
+        centers = rng.random((5, 2)) * 100
+        for center, region in zip(centers, index.query_ball_point_list(centers, 15.)):
+            inside = np.linalg.norm(positions - center, axis=1) <= 15.
+            expected = sorted(id(obj) for obj, is_inside in zip(objects, inside) if is_inside)
+            assert sorted(map(id, region)) == expected
+            assert sorted(map(id, index.query_ball_point(center, 15.))) == expected
+            dists, nearest = index.query(center, k=3)
+            assert np.allclose(dists, np.sort(np.linalg.norm(positions - center, axis=1))[:3], atol=1e-4)
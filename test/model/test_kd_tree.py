@@ -0,0 +1,107 @@
+import pytest
+
+from src.model.ant import Ant
+from src.model.entity_registry import registry
+from src.model.food import Food
+from src.model.kd_tree import KDTree
+from src.model.nest import Nest
+from src.model.player import Player
+from src.model.scout import Scout
+from src.model.worker import Worker
+from src.model.world import World
+from src.utils import array
+
+
+@pytest.fixture
+def set_up_tree():
+    """Sets up a nest with ants stacked on it and food around it"""
+    tree = KDTree()
+    player = Player("franz", (0, 0, 0))
+    tree.create_nests([player], [array([0, 0])], size=1, health=100)
+    nest = tree.get_nests()[0]
+    tree.create_ants(nest, "worker", 20)
+    tree.create_ants(nest, "scout", 5)
+    food_positions = [array([x, 3]) for x in range(-5, 6)]
+    tree.create_food(food_positions, [1] * len(food_positions))
+    return tree, nest, food_positions
+
+
+def test__init__():
+    tree = KDTree()
+    assert isinstance(tree, World)
+    assert set(tree.trees) == set(KDTree.partition_types)
+    assert len(tree) == 0
+
+
+def test_partitions(set_up_tree):
+    tree, nest, food_positions = set_up_tree
+    assert list(tree.trees[Nest]) == [nest]
+    assert len(tree.trees[Ant]) == 25
+    assert len(tree.trees[Food]) == len(food_positions)
+    assert len(tree) == 1 + 25 + len(food_positions)
+
+
+def test_type_filtered_circular_region(set_up_tree):
+    tree, nest, food_positions = set_up_tree
+    everything = tree.get_circular_region(nest.position, 4)
+    assert len(everything) == 1 + 25 + 5
+    foods = tree.get_circular_region(nest.position, 4, object_type=Food)
+    assert len(foods) == 5 and all(isinstance(obj, Food) for obj in foods)
+    scouts = tree.get_circular_region(nest.position, 4, object_type=Scout)
+    assert len(scouts) == 5 and all(isinstance(obj, Scout) for obj in scouts)
+    nests_and_food = tree.get_circular_region(nest.position, 4, object_type=(Nest, Food))
+    assert len(nests_and_food) == 6
+
+
+def test_rectangle_region(set_up_tree):
+    tree, nest, food_positions = set_up_tree
+    # Wider than high, a square query around it would also find the nest and the ants
+    foods = tree.get_rectangle_region(array([-3.5, 3.5]), array([3.5, 2.5]))
+    assert sorted(food.position[0] for food in foods) == list(range(-3, 4))
+    assert tree.get_rectangle_region(array([-3.5, 3.5]), array([3.5, 2.5]), object_type=Ant) == []
+    assert len(tree.get_rectangle_region(array([-1, 1]), array([1, -1]), object_type=Worker)) == 20
+
+
+def test_type_filtered_region_list(set_up_tree):
+    tree, nest, food_positions = set_up_tree
+    centers = array([[0, 0], [5, 3], [100, 100]])
+    result = tree.get_circular_region_list(centers, 2, object_type=Worker)
+    assert [len(region) for region in result] == [20, 0, 0]
+
+
+def test_type_filtered_k_nearest(set_up_tree):
+    tree, nest, food_positions = set_up_tree
+    dists, nearest = tree.get_k_nearest(array([0, 0]), 3, object_type=Food)
+    assert len(nearest) == 3
+    assert all(isinstance(obj, Food) for obj in nearest)
+    assert dists[0] == 3
+
+
+def test_static_partitions_not_rebuilt(set_up_tree):
+    tree, nest, food_positions = set_up_tree
+    food_tree = tree.trees[Food]._static_tree
+    nest_tree = tree.trees[Nest]._static_tree
+    tree.update()
+    assert tree.trees[Food]._static_tree is food_tree
+    assert tree.trees[Nest]._static_tree is nest_tree
+
+
+def test_removed_objects_release_their_handle(set_up_tree):
+    tree, nest, food_positions = set_up_tree
+    food = tree.get_at_position(food_positions[0], object_type=Food)[0]
+    food.size = 0
+    tree.update()
+    assert food not in tree.trees[Food]
+    assert registry.get(food.id) is None
+    assert registry.get(nest.id) is nest
+
+
+def test_ants_without_energy_die(set_up_tree):
+    tree, nest, food_positions = set_up_tree
+    worker, scout = tree.get_ants()[0], tree.get_ants()[-1]
+    worker.energy = 0.
+    scout.energy = 0.
+    tree.update()
+    assert len(tree.trees[Ant]) == 23
+    assert worker not in tree.trees[Ant] and scout not in tree.trees[Ant]
+    assert registry.get(worker.id) is None
@@ -1,6 +1,7 @@
 import pytest
 from numpy import linalg
 
+from src.model.ant import Ant
 from src.model.worker import Worker
 from src.model.food import Food
 from src.model.game_object import GameObject
@@ -26,8 +27,10 @@ def test__init__():
     """Tests id creation of Kd_tre_and_dict works as expected."""
     tree = KdTreeAndDict()
     assert (issubclass(type(tree), World))
-    assert (type(tree.all_objects) == dict)
-    assert (len(tree.all_objects.values()) == 0)
+    assert (set(tree.partitions) == {Nest, Food, Ant})
+    for partition in tree.partitions.values():
+        assert (type(partition.objects) == dict)
+        assert (len(partition.objects.values()) == 0)
 
 
 # TODO: also random set ups
@@ -353,6 +356,36 @@ def test_update_inanimate_objects(set_up_tree_nests_fixed):
             # Nothing should change.
             assert tuple(obj.position) in positions
 
+
+def test_update_drops_empty_positions(set_up_ants_fixed):
+    tree, _ = set_up_ants_fixed
+    for _ in range(5):
+        tree.update()
+        for partition_type, partition in tree.partitions.items():
+            positions = {tuple(obj.position) for obj in tree if isinstance(obj, partition_type)}
+            assert set(partition.objects) == positions, 'positions nothing is at any more should be dropped'
+            assert len(partition.point_matrix) == len(positions)
+
+
+def test_type_filtered_queries_skip_other_partitions(set_up_ants_fixed):
+    tree, positions = set_up_ants_fixed
+    nest = tree.get_nests()[-1]
+    region = tree.get_circular_region_list(array([nest.position]), 1, object_type=Food)
+    assert region == [[]], 'the ants and the nest at the center are not food'
+    assert all(isinstance(obj, Worker) for obj in tree.get_circular_region(nest.position, 1, object_type=Worker))
+    assert len(tree.get_circular_region(nest.position, 1, object_type=Worker)) == 2
+
+
+def test_type_filtered_k_nearest(set_up_ants_fixed):
+    tree, positions = set_up_ants_fixed
+    nest = tree.get_nests()[-1]
+    nearest, dists = tree.get_k_nearest(nest.position, 1, object_type=Worker)
+    assert len(nearest) == 2 and all(isinstance(obj, Worker) for obj in nearest)
+    assert dists[0] == 0
+    nearest, dists = tree.get_k_nearest(array([0, 0]), 2, object_type=Nest)
+    assert all(isinstance(obj, Nest) for obj in nearest)
+    assert {tuple(obj.position) for obj in nearest} == {(5, 5), (-5, -5)}
+
 # TODO: check for ants to move in update (equal to method in ants)
 
 def test_uuid_to_exist(set_up_tree_nests_fixed, set_up_food_fixed, set_up_ants_fixed):
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.model.food import Food
+from src.model.game_state import GameState
+from src.model.player import Player
+
+
+def play(world_type="kd_tree", ticks=10):
+    game_state = GameState([Player("Ash", (87, 112, 219)), Player("Misty", (0, 0, 255))], world_type=world_type,
+                           seed=7)
+    for nest in game_state.get_nests():
+        game_state.create_ants(nest, "worker", 30)
+        game_state.create_ants(nest, "scout", 5)
+    for _ in range(ticks):
+        game_state.update()
+    return game_state
+
+
+def ant_states(game_state):
+    return np.array(sorted(tuple(ant.position) + (ant.energy, ant.pheromone_strength, ant.speed, ant.kind)
+                           for ant in game_state.get_ants()))
+
+
+def test_save_and_load(tmp_path):
+    game_state = play()
+    game_state.get_nests()[0].food = 3.
+    path = tmp_path / "game.npz"
+    game_state.save(path)
+    loaded = GameState.load(path)
+
+    assert loaded.tick == game_state.tick
+    assert [player.name for player in loaded.players] == ["Ash", "Misty"]
+    assert np.array_equal(ant_states(loaded), ant_states(game_state))
+    assert sorted(nest.food for nest in loaded.get_nests()) == sorted(nest.food for nest in game_state.get_nests())
+    food_sizes = [sorted(obj.size for obj in game.world if isinstance(obj, Food)) for game in (game_state, loaded)]
+    assert food_sizes[0] == food_sizes[1]
+    for player, loaded_player in zip(game_state.players, loaded.players):
+        assert np.allclose(loaded.world.get_pheromone_field(loaded_player).get_strengths(),
+                           game_state.world.get_pheromone_field(player).get_strengths())
+    for ant in loaded.get_ants():
+        assert ant.home in loaded.get_nests() and ant.owner is ant.home.owner
+
+
+@pytest.mark.parametrize("world_type", ["kd_tree", "spatial_hash"])
+def test_loaded_game_goes_on_the_same(tmp_path, world_type):
+    game_state = play(world_type)
+    game_state.save(tmp_path / "game.npz")
+    loaded = GameState.load(tmp_path / "game.npz")
+    for _ in range(10):
+        game_state.update()
+        loaded.update()
+    assert np.array_equal(ant_states(loaded), ant_states(game_state))
+
+
+def test_unknown_version(tmp_path, monkeypatch):
+    from src.model import persistence
+    monkeypatch.setattr(persistence, "FORMAT_VERSION", 0)
+    play(ticks=0).save(tmp_path / "game.npz")
+    monkeypatch.undo()
+    with pytest.raises(ValueError):
+        GameState.load(tmp_path / "game.npz")
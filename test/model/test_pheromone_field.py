@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from src.model.pheromone_field import PheromoneField
+from src.model.player import Player
+from src.settings import all_params
+from src.utils import array
+
+
+@pytest.fixture
+def set_up_field():
+    player = Player("Nobody", (178, 58, 238))
+    return PheromoneField(player, size=20., cell_size=1.)
+
+
+def test_init(set_up_field):
+    field = set_up_field
+    assert field.grid.shape == (20, 20)
+    assert not field.grid.any()
+    assert np.allclose(field.origin, array([-10., -10.]))
+
+
+def test_deposit(set_up_field):
+    field = set_up_field
+    field.deposit(array([2.5, 3.5]), 2.)
+    field.deposit(array([[2.2, 3.7], [-4., 1.]]), array([1., 5.]))
+    assert np.allclose(field.sample(array([[2.9, 3.1], [-3.5, 1.5], [0., 0.]])), array([3., 5., 0.]))
+
+
+def test_deposit_outside(set_up_field):
+    field = set_up_field
+    field.deposit(array([[100., 0.], [0., -10.5]]), 1.)
+    assert not field.grid.any()
+    assert field.sample(array([100., 0.]))[0] == 0
+
+
+@pytest.mark.parametrize('strength', [0., -1.])
+def test_invalid_deposit(set_up_field, strength):
+    with pytest.raises(ValueError):
+        set_up_field.deposit(array([0., 0.]), strength)
+
+
+def test_decay(set_up_field):
+    field = set_up_field
+    field.deposit(array([0., 0.]), 1.)
+    field.decay_all()
+    assert np.isclose(field.sample(array([0., 0.]))[0], all_params.pheromone_model_params.decay_factor)
+    for _ in range(100):
+        field.decay_all()
+    assert not field.grid.any(), 'weak pheromone should be cleared'
+
+
+def test_circular_region(set_up_field):
+    field = set_up_field
+    field.deposit(array([[0.5, 0.5], [2.5, 0.5], [5.5, 5.5]]), array([1., 2., 3.]))
+    positions, strengths = field.get_circular_region(array([0.5, 0.5]), 2.)
+    order = np.argsort(strengths)
+    assert np.allclose(positions[order], array([[0.5, 0.5], [2.5, 0.5]]))
+    assert np.allclose(strengths[order], array([1., 2.]))
+    positions, strengths = field.get_circular_region(array([-100., -100.]), 5.)
+    assert len(positions) == len(strengths) == 0
+
+
+def test_circular_region_list(set_up_field):
+    field = set_up_field
+    field.deposit(array([[0.5, 0.5], [2.5, 0.5], [5.5, 5.5], [-9.5, -9.5]]), array([1., 2., 3., 4.]))
+    centers = array([[0.5, 0.5], [5., 5.], [-9., -9.], [100., 100.]])
+    offsets, positions, strengths = field.get_circular_region_list(centers, 2.)
+    assert len(offsets) == len(centers) + 1
+    for i, center in enumerate(centers):
+        compare_positions, compare_strengths = field.get_circular_region(center, 2.)
+        assert np.allclose(positions[offsets[i]:offsets[i + 1]], compare_positions)
+        assert np.allclose(strengths[offsets[i]:offsets[i + 1]], compare_strengths)
+    assert offsets[-1] - offsets[-2] == 0
+
+
+def test_circular_region_list_in_chunks(set_up_field):
+    field = set_up_field
+    rng = np.random.default_rng(1)
+    field.deposit(rng.uniform(-10, 10, size=(50, 2)), 1.)
+    centers = rng.uniform(-12, 12, size=(20, 2))
+    expected = field.get_circular_region_list(centers, 3.)
+    field.max_window_cells = 1
+    for result, compare_to in zip(field.get_circular_region_list(centers, 3.), expected):
+        assert np.allclose(result, compare_to)
+
+
+def test_lazy_decay_matches_eager_decay(set_up_field):
+    """Reading the field gives the same strengths as decaying every cell on every tick"""
+    field = set_up_field
+    params = all_params.pheromone_model_params
+    reference = np.zeros(field.grid.shape)
+    rng = np.random.default_rng(0)
+    for tick in range(200):
+        if tick % 7 == 0:
+            positions = rng.uniform(-10, 10, size=(5, 2))
+            strengths = rng.uniform(0.5, 50, size=5)
+            field.deposit(positions, strengths)
+            columns, rows, inside = field._cells(positions)
+            np.add.at(reference, (columns, rows), strengths)
+        field.decay_all()
+        reference *= params.decay_factor
+        reference[reference <= params.min_strength] = 0.
+        assert np.allclose(field.get_strengths(), reference, rtol=1e-4, atol=0)
+        assert np.array_equal(field.grid != 0, reference != 0), 'weak cells have to be cleared on time'
+    assert np.max(field.grid) < 1e8, 'the grid should be rebased before its values blow up'
+
+
+def test_decay_is_lazy(set_up_field):
+    field = set_up_field
+    field.deposit(array([0., 0.]), 1.)
+    stored = field.grid.copy()
+    field.decay_all()
+    assert np.array_equal(field.grid, stored), 'a tick should not touch cells that do not expire'
+    assert field.tick == 1
+
+
+def test_window(set_up_field):
+    field = set_up_field
+    window = field.window(array([-2., 3.]), array([1., np.inf]))
+    assert window == (slice(8, 11), slice(13, 20))
+    assert field.window(array([-np.inf, -np.inf]), array([-20., 0.]))[0] == slice(0, 0)
+
+    field.deposit(array([[-1.5, 5.5], [5.5, 5.5]]), 2.)
+    field.decay_all()
+    strengths = field.read_window(window)
+    assert strengths.shape == (3, 7) and np.isclose(strengths.sum(), 2. * 0.75 ** 1)
+
+    other = PheromoneField(field.owner, size=20., cell_size=1.)
+    other.write_window(window, strengths)
+    assert np.allclose(other.get_strengths()[window], strengths)
+    assert np.isclose(other.get_strengths().sum(), strengths.sum())
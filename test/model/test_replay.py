@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from src.model.game_state import GameState
+from src.model.player import Player
+from src.model.replay import ReplayReader, ReplayWriter
+from src.model.snapshot import Snapshot
+from src.model.worker import Worker
+from src.utils import array
+
+
+def whole_world():
+    return array([-1000., 1000.]), array([1000., -1000.])
+
+
+def record(path, ticks=12, keyframe_interval=4):
+    """Record a game in which ants are spawned and objects disappear, return the recorded snapshots"""
+    game_state = GameState([Player("Ash", (87, 112, 219)), Player("Misty", (0, 0, 255))], seed=3)
+    nest = game_state.get_nests()[0]
+    game_state.create_ants(nest, "worker", 10)
+    snapshots = []
+    with ReplayWriter(path, game_state.players, keyframe_interval) as writer:
+        for tick in range(ticks):
+            game_state.update()
+            if tick == 5:
+                game_state.create_ants(nest, "scout", 3)
+            objects = Snapshot(game_state.tick, game_state.get_objects_in_region(*whole_world())).objects
+            if tick >= 7:
+                objects = [obj for obj in objects if obj.type is not Worker or obj.id % 3]
+            writer.append(game_state.tick, objects)
+            snapshots.append(Snapshot(game_state.tick, objects))
+    return snapshots
+
+
+def assert_same(snapshot, expected):
+    assert snapshot.tick == expected.tick
+    objects = {obj.id: obj for obj in snapshot}
+    assert sorted(objects) == sorted(obj.id for obj in expected)
+    for obj in expected:
+        read = objects[obj.id]
+        assert read.type is obj.type
+        assert np.array_equal(read.position, obj.position)
+        assert read.energy == obj.energy and read.has_food == obj.has_food and read.health == obj.health
+        assert (read.direction is None) == (obj.direction is None)
+        assert (read.owner is None) == (obj.owner is None)
+        if obj.owner is not None:
+            assert read.owner.name == obj.owner.name and read.owner.color == obj.owner.color
+
+
+def test_play_back(tmp_path):
+    path = str(tmp_path / "replay")
+    snapshots = record(path)
+    reader = ReplayReader(path)
+    assert len(reader) == len(snapshots)
+    for frame, expected in enumerate(snapshots):
+        assert_same(reader.snapshot(frame), expected)
+
+
+def test_seek(tmp_path):
+    path = str(tmp_path / "replay")
+    snapshots = record(path)
+    reader = ReplayReader(path)
+    for frame in (10, 3, 11, 0, 9, 9, 2):
+        assert_same(reader.snapshot(frame), snapshots[frame])
+    assert reader.frame_of_tick(snapshots[6].tick) == 6
+    assert reader.frame_of_tick(10 ** 6) == len(snapshots) - 1
+    with pytest.raises(IndexError):
+        reader.frame_of_tick(0)
+    with pytest.raises(IndexError):
+        reader.entities(len(snapshots))
+
+
+def test_region(tmp_path):
+    path = str(tmp_path / "replay")
+    snapshots = record(path)
+    top_left, bottom_right = array([0., 300.]), array([300., 0.])
+    region = ReplayReader(path).snapshot(8, top_left, bottom_right)
+    (left, top), (right, bottom) = top_left, bottom_right
+    expected = [obj.id for obj in snapshots[8] if left <= obj.position[0] <= right and bottom <= obj.position[1] <= top]
+    assert 0 < len(region) < len(snapshots[8])
+    assert sorted(obj.id for obj in region) == sorted(expected)
+
+
+def test_read_while_recording(tmp_path):
+    path = str(tmp_path / "replay")
+    writer = ReplayWriter(path, [Player("Ash", (87, 112, 219))])
+    assert len(ReplayReader(path)) == 0
+    game_state = GameState(writer.players, seed=0)
+    game_state.update()
+    writer.append(game_state.tick, game_state.get_objects_in_region(*whole_world()))
+    reader = ReplayReader(path)
+    assert len(reader) == 1
+    assert len(reader.snapshot(0)) == len(game_state.get_objects_in_region(*whole_world()))
+    writer.close()
+    with pytest.raises(FileExistsError):
+        ReplayWriter(path, writer.players)
@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.model.food import Food
+from src.model.nest import Nest
+from src.model.player import Player
+from src.model.snapshot import ObjectSnapshot, Snapshot
+from src.model.worker import Worker
+from src.utils import array
+
+
+def state(id, type, x, y, size=None):
+    return ObjectSnapshot(id, type, array([x, y]), None, None, None, size, None, None)
+
+
+def test_delta():
+    first = Snapshot(1, [state(1, Food, 0, 0, 5), state(2, Food, 1, 1, 5), state(3, Nest, 2, 2)])
+    assert first.delta is None
+    second = Snapshot(2, [state(1, Food, 0, 0, 4), state(3, Nest, 2, 2), state(4, Food, 3, 3, 5)], previous=first)
+    assert second.delta.base_tick == 1
+    assert [obj.id for obj in second.delta.spawned] == [4]
+    assert [obj.id for obj in second.delta.moved] == [1]
+    assert second.delta.despawned == (2,)
+
+
+def test_delta_of_reused_handle():
+    first = Snapshot(1, [state(1, Food, 0, 0, 5)])
+    second = Snapshot(2, [state(1, Nest, 0, 0)], previous=first)
+    assert second.delta.despawned == (1,)
+    assert [obj.type for obj in second.delta.spawned] == [Nest]
+    assert second.delta.moved == ()
+
+
+def test_delta_of_moving_ant():
+    player = Player("Ash", (87, 112, 219))
+    nest = Nest(array([0, 0]), player, 1, 100)
+    ant = Worker(player, nest)
+    first = Snapshot(1, [ant, nest])
+    ant.direction = array([0., 1.])
+    second = Snapshot(2, [ant, nest], previous=first)
+    assert [obj.id for obj in second.delta.moved] == [ant.id]
+    assert np.array_equal(second.delta.moved[0].direction, [0., 1.])
+    third = Snapshot(3, [ant, nest], previous=second)
+    assert third.delta == (2, (), (), ())
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from src.model.food import Food
+from src.model.nest import Nest
+from src.model.player import Player
+from src.model.spatial_hash import SpatialHash
+from src.model.scout import Scout
+from src.model.worker import Worker
+from src.model.world import World
+from src.utils import array
+
+
+def positions_of(objects):
+    return sorted(tuple(obj.position) for obj in objects)
+
+
+@pytest.fixture
+def set_up_grid():
+    """Sets up a grid with one nest and food on a regular lattice crossing several cells"""
+    grid = SpatialHash(cell_size=10)
+    player = Player("franz", (0, 0, 0))
+    grid.create_nests([player], [array([5, 5])], size=1, health=100)
+    food_positions = [array([x, y]) for x in range(-40, 41, 4) for y in range(-40, 41, 4)]
+    grid.create_food(food_positions, [1] * len(food_positions))
+    return grid, food_positions
+
+
+def test__init__():
+    grid = SpatialHash(cell_size=5)
+    assert isinstance(grid, World)
+    assert grid.cell_size == 5
+    assert len(grid) == 0
+
+
+def test_create(set_up_grid):
+    grid, food_positions = set_up_grid
+    assert len(grid) == len(food_positions) + 1
+    assert len(grid.get_nests()) == 1
+    nest = grid.get_nests()[0]
+    grid.create_ants(nest, "worker", 3)
+    ants = grid.get_ants()
+    assert len(ants) == 3
+    assert all(isinstance(ant, Worker) for ant in ants)
+    assert len(grid.get_at_position(nest.position)) == 4
+
+
+def test_get_circular_region(set_up_grid):
+    grid, food_positions = set_up_grid
+    center, radius = array([1, -3]), 13
+    expected = [tuple(p) for p in food_positions if np.linalg.norm(p - center) <= radius]
+    found = [obj for obj in grid.get_circular_region(center, radius) if isinstance(obj, Food)]
+    assert positions_of(found) == sorted(expected)
+
+
+def test_get_rectangle_region(set_up_grid):
+    grid, food_positions = set_up_grid
+    top_left, bottom_right = array([-17, 21]), array([9, -2])
+    expected = [tuple(p) for p in food_positions
+                if top_left[0] <= p[0] <= bottom_right[0] and bottom_right[1] <= p[1] <= top_left[1]]
+    found = [obj for obj in grid.get_rectangle_region(top_left, bottom_right) if isinstance(obj, Food)]
+    assert positions_of(found) == sorted(expected)
+
+
+def test_get_k_nearest(set_up_grid):
+    grid, food_positions = set_up_grid
+    position = array([-21, 13])
+    dists, nearest = grid.get_k_nearest(position, 5)
+    all_dists = sorted(np.linalg.norm(obj.position - position) for obj in grid)
+    assert np.allclose(dists, all_dists[:5])
+    assert len(nearest) == 5
+
+
+def test_update_moves_ants_between_cells(set_up_grid):
+    grid, _ = set_up_grid
+    nest = grid.get_nests()[0]
+    grid.create_ants(nest, "worker", 5)
+    for _ in range(30):
+        grid.update()
+        for obj in grid:
+            assert grid.cell_of[obj.id] == grid._cell(obj.position)
+    assert len(grid.get_ants()) == 5
+
+
+def test_update_inanimate_objects(set_up_grid):
+    grid, food_positions = set_up_grid
+    before = positions_of(grid)
+    grid.update()
+    assert positions_of(grid) == before
+    assert isinstance(grid.get_nests()[0], Nest)
+
+
+def test_get_circular_region_list(set_up_grid):
+    grid, _ = set_up_grid
+    centers = array([[1, -3], [2, -2], [30, 30], [-35, 12]])
+    radii = [13, 5, 8, 20]
+    result = grid.get_circular_region_list(centers, radii)
+    assert len(result) == len(centers)
+    for center, radius, region in zip(centers, radii, result):
+        assert positions_of(region) == positions_of(grid.get_circular_region(center, radius))
+
+
+def test_type_filtered_queries(set_up_grid):
+    grid, food_positions = set_up_grid
+    nest = grid.get_nests()[0]
+    grid.create_ants(nest, "worker", 10)
+    foods = grid.get_circular_region(nest.position, 5, object_type=Food)
+    assert foods and all(isinstance(obj, Food) for obj in foods)
+    ants = grid.get_circular_region(nest.position, 5, object_type=Worker)
+    assert len(ants) == 10
+    assert grid.get_at_position(nest.position, object_type=Nest) == [nest]
+    dists, nearest = grid.get_k_nearest(nest.position, 2, object_type=Worker)
+    assert len(nearest) == 2 and all(isinstance(obj, Worker) for obj in nearest)
+    dists, nearest = grid.get_k_nearest(nest.position, 1, object_type=Scout)
+    assert nearest == []
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from src.model.food import Food
+from src.model.game_state import GameState
+from src.model.player import Player
+from src.model.tiled_game_state import TiledGameState, tile_of
+from src.model.worker import Worker
+from src.utils import array
+
+
+@pytest.fixture
+def tiled_game_state():
+    """A game split into two tiles along x = 0, both run in this process"""
+    game_state = TiledGameState([Player("Ash", (87, 112, 219))], seed=0, shape=(2, 1), processes=False)
+    yield game_state
+    game_state.close()
+
+
+def get_tile(game_state, index):
+    return game_state.tiles[index].tile
+
+
+def test_tile_of():
+    edges = (np.array([0.]), np.array([-10., 10.]))
+    positions = np.array([[-5., -20.], [5., -20.], [-5., 0.], [5., 15.], [0., 10.]])
+    assert list(tile_of(positions, edges)) == [0, 1, 2, 5, 5]
+    assert tile_of(np.array([-1e9, 1e9]), edges) == 4
+
+
+def test_same_api_as_game_state(tiled_game_state):
+    assert isinstance(tiled_game_state, GameState)
+    nests = tiled_game_state.get_nests()
+    assert len(nests) == 1
+    tiled_game_state.create_ants(nests[0], "worker", 20)
+    tiled_game_state.create_ants(nests[0], "scout", 5)
+    for _ in range(3):
+        tiled_game_state.update()
+    assert tiled_game_state.tick == 3
+    assert len(tiled_game_state.get_ants()) == 25
+    objects = tiled_game_state.get_objects_in_region(array([-1000., 1000.]), array([1000., -1000.]))
+    assert len({obj.id for obj in objects}) == len(objects) == 25 + 1 + 50
+    assert tiled_game_state.snapshot(array([-1000., 1000.]), array([1000., -1000.])).tick == 3
+
+
+def test_ants_migrate(tiled_game_state):
+    nest = tiled_game_state.get_nests()[0]
+    tiled_game_state.create_ants(nest, "worker", 1)
+    home_tile = int(tile_of(nest.position, tiled_game_state.edges))
+    other_tile = 1 - home_tile
+    ant = get_tile(tiled_game_state, home_tile).world.get_ants()[0]
+    ant.position = array([-5., 50.]) if other_tile == 0 else array([5., 50.])
+    ant.energy = 42.
+
+    tiled_game_state.update()
+    assert get_tile(tiled_game_state, home_tile).world.get_ants() == []
+    tiled_game_state.update()
+    migrant = get_tile(tiled_game_state, other_tile).world.get_ants()[0]
+    assert isinstance(migrant, Worker) and migrant.energy == 42.
+    assert migrant.home is get_tile(tiled_game_state, other_tile).nests[0]
+
+
+def test_ghost_food(tiled_game_state):
+    tiled_game_state.create_food([array([-0.5, 500.])], [5.])
+    left, right = get_tile(tiled_game_state, 0), get_tile(tiled_game_state, 1)
+    food = left.world.get_at_position(array([-0.5, 500.]), object_type=Food)[0]
+    # The left tile sends the ghost with its first update, the right tile adds it with its second
+    tiled_game_state.update()
+    tiled_game_state.update()
+    ghost = right.world.get_at_position(array([-0.5, 500.]), object_type=Food)[0]
+    assert ghost is right.ghosts[food.id] and ghost.size == 5.
+    assert len(tiled_game_state.get_objects_in_region(array([-20., 510.]), array([20., 490.]))) == 1
+
+    # A worker of the right tile loads food from the ghost
+    worker = Worker(tiled_game_state.players[0], right.nests[0], population=right.world.population)
+    worker.position = array([0.5, 500.])
+    right.world.insert_objects([worker])
+    tiled_game_state.update()
+    assert worker.has_food == 1.
+    tiled_game_state.update()
+    assert food.size == 4., 'food taken from a ghost is taken from the food of the other tile'
+    tiled_game_state.update()
+    assert right.ghosts[food.id].size == 4.
+
+
+def test_pheromone_halo(tiled_game_state):
+    player = tiled_game_state.players[0]
+    left, right = get_tile(tiled_game_state, 0), get_tile(tiled_game_state, 1)
+    left.world.get_pheromone_field(player).deposit(array([[-10.5, 500.5], [-300.5, 500.5]]), 1.)
+    tiled_game_state.update()
+    tiled_game_state.update()
+    field = right.world.get_pheromone_field(player)
+    strengths = field.sample(array([[-10.5, 500.5], [-300.5, 500.5]]))
+    assert strengths[0] > 0 and strengths[1] == 0, 'only cells within the halo are copied'
+    assert np.isclose(strengths[0], left.world.get_pheromone_field(player).sample(array([-10.5, 500.5]))[0])
+
+
+def test_save_and_load(tiled_game_state, tmp_path):
+    player = tiled_game_state.players[0]
+    nest = tiled_game_state.get_nests()[0]
+    tiled_game_state.create_ants(nest, "worker", 20)
+    tiled_game_state.create_ants(nest, "scout", 5)
+    tiled_game_state.create_food([array([-0.5, 500.])], [5.])
+    get_tile(tiled_game_state, 0).world.get_pheromone_field(player).deposit(array([[-10.5, 500.5]]), 1.)
+    for _ in range(3):
+        tiled_game_state.update()
+    tiled_game_state.save(tmp_path / "game.npz")
+    loaded = GameState.load(tmp_path / "game.npz")
+
+    assert loaded.tick == 3 and [player.name for player in loaded.players] == ["Ash"]
+    assert sorted(ant.energy for ant in loaded.get_ants()) == sorted(ant.energy for ant in tiled_game_state.get_ants())
+    owning_tile = get_tile(tiled_game_state, int(tile_of(nest.position, tiled_game_state.edges)))
+    assert loaded.get_nests()[0].food == owning_tile.nests[0].food
+    food = [obj for obj in tiled_game_state.get_objects_in_region(array([-1000., 1000.]), array([1000., -1000.]))
+            if obj.type is Food]
+    assert len([obj for obj in loaded.world if isinstance(obj, Food)]) == len(food), 'ghosts are not saved'
+    # Every tile contributes the cells it owns, not the halos copied from its neighbours
+    strengths = loaded.world.get_pheromone_field(loaded.players[0]).get_strengths()
+    assert strengths.any()
+    for index in range(2):
+        tile = get_tile(tiled_game_state, index)
+        field = tile.world.get_pheromone_field(player)
+        window = field.window(tile.bottom_left, tile.top_right)
+        assert np.allclose(strengths[window], field.read_window(window))
+    for ant in loaded.get_ants():
+        assert ant.home is loaded.get_nests()[0]
+
+
+def test_processes():
+    with TiledGameState([Player("Ash", (87, 112, 219)), Player("Misty", (0, 0, 255))], seed=1) as game_state:
+        for nest in game_state.get_nests():
+            game_state.create_ants(nest, "worker", 50)
+        for _ in range(5):
+            game_state.update()
+        ants = game_state.get_ants()
+        assert len(ants) == 100 and len({ant.id for ant in ants}) == 100
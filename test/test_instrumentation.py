@@ -0,0 +1,70 @@
+from threading import Thread
+
+import numpy as np
+import pytest
+
+from src.instrumentation import Instrumentation, RingBuffer, ANT_UPDATE, QUERY
+
+
+def test_ring_buffer():
+    buffer = RingBuffer(3)
+    assert len(buffer) == 0 and len(buffer.values()) == 0
+    for value in range(5):
+        buffer.append(value)
+    assert len(buffer) == 3 and buffer.count == 5
+    assert np.array_equal(buffer.values(), [2, 3, 4])
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+
+def test_disabled_records_nothing():
+    instrumentation = Instrumentation()
+    with instrumentation.phase(QUERY):
+        pass
+    instrumentation.end_tick()
+    assert instrumentation.summary() == {} and instrumentation.percentiles(QUERY) == {}
+
+
+def test_percentiles():
+    instrumentation = Instrumentation(capacity=100, enabled=True)
+    for tick in range(200):
+        instrumentation.record(ANT_UPDATE, tick)
+        instrumentation.record(ANT_UPDATE, tick)
+        instrumentation.end_tick()
+    percentiles = instrumentation.percentiles(ANT_UPDATE)
+    assert list(percentiles) == ["p50", "p95", "p99"]
+    assert np.isclose(percentiles["p50"], np.percentile(2 * np.arange(100, 200), 50))
+    assert len(instrumentation.buffers[ANT_UPDATE]) == 100
+
+
+def test_phase_and_timed():
+    instrumentation = Instrumentation(enabled=True)
+
+    @instrumentation.timed(QUERY)
+    def query(value):
+        return value
+
+    with instrumentation.phase(ANT_UPDATE):
+        assert query(3) == 3
+    instrumentation.end_tick()
+    instrumentation.end_tick()
+    ant_update, queries = instrumentation.buffers[ANT_UPDATE].values(), instrumentation.buffers[QUERY].values()
+    assert ant_update[0] >= queries[0] > 0
+    assert ant_update[1] == queries[1] == 0, 'phases that were not entered take no time'
+
+
+def test_threads_have_their_own_ticks():
+    instrumentation = Instrumentation(enabled=True)
+
+    def simulate():
+        for _ in range(5):
+            instrumentation.record(ANT_UPDATE, 1.)
+            instrumentation.end_tick()
+
+    thread = Thread(target=simulate)
+    thread.start()
+    instrumentation.record(QUERY, 2.)
+    thread.join()
+    instrumentation.end_tick()
+    assert np.array_equal(instrumentation.buffers[ANT_UPDATE].values(), [1.] * 5)
+    assert np.array_equal(instrumentation.buffers[QUERY].values(), [2.]), 'the other thread ends its own ticks only'
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+from src.model.replay import ReplayReader
+from src.sim import build_game_state, main
+
+
+def test_build_game_state():
+    game_state = build_game_state(n_players=3, n_workers=4, n_scouts=2, n_food=10, seed=0)
+    assert len(game_state.get_nests()) == 3
+    assert len(game_state.get_ants()) == 3 * (4 + 2)
+
+
+def test_main(capsys):
+    stats = main(["--players", "2", "--workers", "10", "--scouts", "5", "--ticks", "5", "--warmup", "1",
+                  "--world", "spatial_hash", "--seed", "1"])
+    assert stats["ticks"] == 5
+    assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert "5 ticks" in capsys.readouterr().out
+
+
+def test_record(tmp_path):
+    path = str(tmp_path / "replay")
+    main(["--workers", "10", "--ticks", "5", "--warmup", "2", "--seed", "1", "--record", path,
+          "--keyframe-interval", "2"])
+    reader = ReplayReader(path)
+    assert list(reader.ticks) == [3, 4, 5, 6, 7]
+    assert reader.keyframe_interval == 2
+    assert len(reader.snapshot(4)) > 2 * 10
+
+
+def test_does_not_import_view():
+    code = "import sys, src.sim; sys.exit(any(m.startswith(('src.view', 'pygame')) for m in sys.modules))"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
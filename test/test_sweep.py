@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from src.model.ant_population import SCOUT, WORKER
+from src.settings import all_params
+from src.sim import build_game_state
+from src.sweep import aggregate, expand_grid, format_table, parse_grid, run_once, set_ant_traits, settings, sweep
+
+
+def test_expand_grid():
+    points = expand_grid({"speed": [1., 2.], "foodiness": [0.5, 1., 2.]})
+    assert len(points) == 6
+    assert {"speed": 2., "foodiness": 0.5} in points
+    assert parse_grid(["speed=1,2", "scout.foodiness=0.5"]) == {"speed": [1., 2.], "scout.foodiness": [0.5]}
+    with pytest.raises(ValueError):
+        parse_grid(["speed"])
+
+
+def test_settings_are_restored():
+    params = all_params.pheromone_model_params
+    decay_factor = params.decay_factor
+    with settings({"pheromone_model_params.decay_factor": 0.1, "speed": 3.}):
+        assert params.decay_factor == 0.1
+    assert params.decay_factor == decay_factor
+    with pytest.raises(ValueError):
+        with settings({"pheromone_model_params.unknown": 1.}):
+            pass
+    with pytest.raises(ValueError):
+        with settings({"soldier.speed": 1.}):
+            pass
+
+
+def test_set_ant_traits():
+    game_state = build_game_state(n_players=2, n_workers=5, n_scouts=3, n_food=0, seed=0)
+    set_ant_traits(game_state, {"speed": 2., "scout.foodiness": 4.})
+    population = game_state.world.population
+    slots = np.array([ant.slot for ant in game_state.get_ants()])
+    assert np.all(population.speed[slots] == 2.)
+    kinds = population.kind[slots]
+    assert np.all(population.foodiness[slots[kinds == SCOUT]] == 4.)
+    assert np.all(population.foodiness[slots[kinds == WORKER]] != 4.)
+
+
+def test_run_once():
+    game = {"n_players": 1, "n_workers": 20, "n_scouts": 2, "n_food": 5, "ticks": 30}
+    result = run_once({"speed": 0.}, seed=1, **game)
+    assert result["food"] == 0, 'ants that do not move collect nothing'
+    assert result["seed"] == 1 and result["speed"] == 0.
+    assert run_once({"speed": 2.}, seed=1, **game) == run_once({"speed": 2.}, seed=1, **game)
+
+
+def test_sweep():
+    grid = {"speed": [0., 2.], "ant_model_params.energy_increase": [10.]}
+    results = sweep(grid, runs=2, seed=0, processes=2, n_players=1, n_workers=10, n_scouts=1, n_food=5, ticks=20)
+    assert len(results) == 4
+    assert len({result["seed"] for result in results}) == 4
+    rows = aggregate(results, list(grid))
+    assert [(row["speed"], row["runs"]) for row in rows] == [(0., 2), (2., 2)]
+    assert rows[0]["food_mean"] == 0
+    assert "food_mean" in format_table(rows).splitlines()[0]
@@ -0,0 +1,64 @@
+import pygame
+
+from src.view.assets import Assets, COLORED_IMAGES, IMAGE_DIRECTORY
+from src.view.view import View
+
+color = (145, 209, 87)
+
+
+def test_images_are_loaded_once():
+    View(1300, 800)
+    assets = Assets()
+    path = f"{IMAGE_DIRECTORY}/food.png"
+    image = assets.load(path)
+    assert assets.load(path) is image
+    assert image.get_flags() & pygame.SRCALPHA, 'images are converted to the display format with alpha'
+    assert assets.scaled(path, (40, 40)) is assets.scaled(path, (40, 40))
+    assert assets.scaled(path, (40, 40)).get_size() == (40, 40)
+
+
+def test_scaled_images_are_bounded():
+    View(1300, 800)
+    assets = Assets(scaled_capacity=2)
+    path = f"{IMAGE_DIRECTORY}/food.png"
+    small = assets.scaled(path, (10, 10))
+    assets.scaled(path, (20, 20))
+    assert assets.scaled(path, (10, 10)) is small
+    assets.scaled(path, (30, 30))
+    assert len(assets._scaled) == 2
+    assert assets.scaled(path, (10, 10)) is small, 'the last used image is kept'
+    assert (path, (20, 20)) not in assets._scaled
+
+
+def test_images_loaded_before_the_display_are_converted_later():
+    pygame.display.quit()
+    assets = Assets()
+    path = f"{IMAGE_DIRECTORY}/food.png"
+    image = assets.load(path)
+    scaled = assets.scaled(path, (40, 40))
+    View(1300, 800)
+    converted = assets.load(path)
+    assert converted is not image and assets.load(path) is converted
+    assert converted.get_flags() & pygame.SRCALPHA
+    assert assets.scaled(path, (40, 40)) is not scaled
+    assert not assets._unconverted
+
+
+def test_preload():
+    View(1300, 800)
+    assets = Assets()
+    assets.preload(color)
+    assert len(assets._images) == len(COLORED_IMAGES)
+    assert assets.colored(color, "nest") is assets.load(f"{IMAGE_DIRECTORY}/145_209_87_nest.png")
+
+
+def test_text_is_rendered_once():
+    View(1300, 800)
+    assets = Assets(text_capacity=2)
+    font = assets.font(None, 32)
+    assert assets.font(None, 32) is font and assets.font(None, 16) is not font
+    text = assets.text("12/100", pygame.Color("black"), 32)
+    assert assets.text("12/100", (0, 0, 0, 255), 32) is text
+    assert assets.text("12/100", (0, 0, 0), 48) is not text
+    assert assets.text("13/100", (0, 0, 0, 255), 32) is not text
+    assert assets.text("12/100", (0, 0, 0, 255), 32) is not text, 'the least recently used text was dropped'
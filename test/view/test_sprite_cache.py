@@ -0,0 +1,65 @@
+from src.view.sprite_cache import SpriteCache
+from src.view.view import View
+
+color = (145, 209, 87)
+
+
+def test_bucket():
+    cache = SpriteCache(rotation_steps=64)
+    assert cache.bucket((0., 1.)) == 0
+    assert cache.bucket((-1., 0.)) == 16
+    assert cache.bucket((0., -1.)) == 32
+    assert cache.bucket((1., 0.)) == 48
+    assert cache.bucket((0.01, 1.)) == 0, 'angles just below 360 degrees wrap around to the first bucket'
+
+
+def test_get():
+    View(1300, 800)
+    cache = SpriteCache(rotation_steps=64, capacity=10)
+    sprite = cache.get(color, "worker", False, (0., 1.))
+    assert cache.get(color, "worker", False, (0.001, 1.)) is sprite
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get(color, "worker", True, (0., 1.)) is not sprite
+    assert cache.get(color, "scout", False, (0., 1.)) is not sprite
+    rotated = cache.get(color, "worker", False, (1., 1.))
+    assert rotated.get_width() > sprite.get_width()
+
+
+def test_default_capacity_holds_all_sprites_of_a_color():
+    View(1300, 800)
+    cache = SpriteCache(rotation_steps=4, alpha_steps=3)
+    assert cache.capacity >= cache.sprites_per_color() == 4 * (2 * 3 + 1)
+    for direction in ((0., 1.), (1., 0.), (0., -1.), (-1., 0.)):
+        cache.get(color, "scout", False, direction)
+        for has_food in (False, True):
+            for opacity in (0, 128, 255):
+                cache.get(color, "worker", has_food, direction, opacity)
+    assert len(cache) == cache.misses == cache.sprites_per_color()
+
+
+def test_least_recently_used_are_evicted():
+    View(1300, 800)
+    cache = SpriteCache(rotation_steps=4, capacity=2)
+    up = cache.get(color, "worker", False, (0., 1.))
+    cache.get(color, "worker", False, (1., 0.))
+    assert cache.get(color, "worker", False, (0., 1.)) is up
+    cache.get(color, "worker", False, (0., -1.))
+    assert len(cache) == 2
+    assert cache.get(color, "worker", False, (0., 1.)) is up, 'the last used sprite is kept'
+    misses = cache.misses
+    cache.get(color, "worker", False, (1., 0.))
+    assert cache.misses == misses + 1
+
+
+def test_faded_sprites():
+    View(1300, 800)
+    cache = SpriteCache(rotation_steps=4, capacity=10, alpha_steps=5)
+    assert [cache.alpha_level(opacity) for opacity in (-10, 0, 64, 128, 255, 2550)] == [0, 0, 1, 2, 4, 4]
+    opaque = cache.get(color, "worker", False, (0., 1.))
+    assert cache.get(color, "worker", False, (0., 1.), opacity=300) is opaque
+    half = cache.get(color, "worker", False, (0., 1.), opacity=128)
+    assert half is not opaque and half.get_size() == opaque.get_size()
+    center = (opaque.get_width() // 2, opaque.get_height() // 2)
+    assert opaque.get_at(center).a == 255
+    assert half.get_at(center).a == 128
+    assert half.get_at(center)[:3] == opaque.get_at(center)[:3]
@@ -0,0 +1,13 @@
+from src.view.text import Text
+from src.view.view import View
+
+
+def test_text_surface_is_reused():
+    view = View(1300, 800)
+    text = Text(view, "headline", 0.04, 0.05, -1, 0.125)
+    text.set_text("ElegANT")
+    surface = text.TextSurf
+    text.draw()
+    assert text.TextSurf is surface
+    text.set_text("Elegant")
+    assert text.TextSurf is not surface
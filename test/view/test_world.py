@@ -0,0 +1,87 @@
+from src.model.food import Food
+from src.model.nest import Nest
+from src.model.player import Player
+from src.model.snapshot import ObjectSnapshot, Snapshot
+from src.model.worker import Worker
+from src.utils import array
+from src.view.view import View
+from src.view.world import World
+
+player = Player("Ash", (145, 209, 87))
+
+
+def state(id, type, x, y):
+    owner = player if type is Nest else None
+    return ObjectSnapshot(id, type, array([x, y]), None, None, None, 5., 100., owner)
+
+
+def drawn_ids(world):
+    return [element_id for z_index in world.layer_order for element_id in world.layers[z_index]]
+
+
+def test_delta_sync():
+    view = View(1300, 800)
+    world = World(view, "world", 0, 0, 250, 250)
+    first = Snapshot(1, [state(1, Food, 0, 0), state(2, Nest, 10, 10), state(3, Food, 20, 20)])
+    world.update(first)
+    assert drawn_ids(world) == [1, 3, 2], 'food is drawn below nests'
+
+    second = Snapshot(2, [state(1, Food, 5, 0), state(2, Nest, 10, 10), state(4, Food, 30, 30)], previous=first)
+    world.update(second)
+    assert set(world.game_elements) == {1, 2, 4}
+    assert drawn_ids(world) == [1, 4, 2]
+    assert world.game_elements[1].x == 5 - view.pos[0][0]
+    assert world.game_elements[4].value == 5., 'spawned food shows the size of the snapshot'
+
+    # Moving the view repositions all elements, also the ones that did not move in the model
+    view.pos[0][0] -= 10
+    third = Snapshot(3, second.objects, previous=second)
+    world.update(third)
+    assert world.game_elements[2].x == 10 - view.pos[0][0]
+
+
+def test_skipped_snapshot():
+    world = World(View(1300, 800), "world", 0, 0, 250, 250)
+    first = Snapshot(1, [state(1, Food, 0, 0), state(2, Food, 10, 10)])
+    second = Snapshot(2, [state(2, Food, 10, 10)], previous=first)
+    third = Snapshot(3, [state(2, Food, 10, 10), state(3, Food, 0, 0)], previous=second)
+    world.update(first)
+    world.update(third)
+    assert set(world.game_elements) == {2, 3}, 'a snapshot that does not follow the shown one is synced fully'
+    assert drawn_ids(world) == [2, 3]
+
+
+def test_elements_are_reused():
+    world = World(View(1300, 800), "world", 0, 0, 250, 250)
+    first = Snapshot(1, [state(1, Food, 0, 0)])
+    world.update(first)
+    element = world.game_elements[1]
+    second = Snapshot(2, [state(2, Food, 50, 0)], previous=first)
+    world.update(second)
+    assert world.game_elements[2] is element, 'the element of a removed object is reused for a new one'
+    assert element.identifier == 2 and element.x == 50 - world.view.pos[0][0]
+    assert world.pool[type(element)] == []
+
+    third = Snapshot(3, [ObjectSnapshot(3, Worker, array([0, 0]), array([0., 1.]), False, 50., None, None, player)],
+                     previous=second)
+    world.update(third)
+    ant = world.game_elements[3]
+    fourth = Snapshot(4, [ObjectSnapshot(4, Worker, array([5, 0]), array([1., 0.]), True, 20., None, None, player)],
+                      previous=third)
+    world.update(fourth)
+    assert world.game_elements[4] is ant
+    assert ant.has_food and ant.health == 20., 'a reused ant shows the state of its new object'
+
+
+def test_draw_batches_sprites():
+    view = View(1300, 800)
+    world = World(view, "world", 0, 0, 250, 250)
+    worker = ObjectSnapshot(1, Worker, array([0, 0]), array([0., 1.]), False, 50., None, None, player)
+    world.update(Snapshot(1, [worker, state(2, Nest, 10, 10), state(3, Food, -10, 0)]))
+    view.screen.fill((255, 255, 255))
+    world.draw()
+    ant = world.game_elements[1]
+    image, position = ant.sprite()
+    assert position == (ant.x - image.get_width() // 2, ant.y - image.get_height() // 2)
+    assert world.game_elements[2].sprite() is None
+    assert view.screen.get_at((ant.x, ant.y - 5)) != (255, 255, 255, 255), 'the ant is drawn'